@@ -91,6 +91,10 @@ class TestSecurityPolicyEngine(SecurityPolicyEngine):
             "query_ai_assistant",
             self.query_ai_assistant_policy,
         ),  # This must be here.
+        (
+            "query_ai_assistant_batch",
+            self.query_ai_assistant_policy,
+        ),  # This must be here.
     ]
     # Below we list tools that don't have side effects.
     self.no_side_effect_tools = []
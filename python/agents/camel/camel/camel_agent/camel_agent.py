@@ -15,10 +15,9 @@
 """CaMeL agent implementation."""
 
 import asyncio
-from collections.abc import Iterator
+from collections.abc import Awaitable, Iterator
+import dataclasses
 import queue
-import re
-import threading
 from typing import Any, AsyncGenerator, Callable, Optional
 
 from google.adk import runners
@@ -39,9 +38,13 @@ from ..camel_library import result
 from ..camel_library import security_policy
 from ..camel_library.capabilities import capabilities
 from ..camel_library.interpreter import camel_value
+from ..camel_library.interpreter import instrumentation
 from ..camel_library.interpreter import interpreter
 from ..camel_library.interpreter import library
+from ..camel_library.interpreter import snapshot
 from . import prompts
+from . import qllm_cache
+from . import session_pool
 from . import utils
 
 BaseModel = pydantic.BaseModel
@@ -60,6 +63,7 @@ DependenciesPropagationMode = interpreter.DependenciesPropagationMode
 
 FunctionCall = function_types.FunctionCall
 CaMeLFunction = camel_value.CaMeLFunction
+CaMeLMappedFunction = camel_value.CaMeLMappedFunction
 Namespace = camel_value.Namespace
 CaMeLValue = camel_value.Value
 
@@ -72,21 +76,30 @@ CaMeLException = interpreter.CaMeLException
 
 Tool = tuple[Callable[..., Any], Any, Any]
 
+_SUPPORTED_OUTPUT_SCHEMAS = ("int", "str", "float", "bool")
+
 int_validator = validators.int_validator
 float_validator = validators.float_validator
 bool_validator = validators.bool_validator
 
 
+# Serves the Q-LLM calls of all the services of the process.
+_QLLM_BACKGROUND_LOOP = utils.BackgroundEventLoop(name="QLLM_Service_loop")
+
+
 class QuarantinedLlmService(BaseModel):
   """Manages synchronous interactions with the Quarantined LLM (Q-LLM)."""
 
   model: str | BaseLlm
   name: str
   user_id: str
+  batch_concurrency: int
+  cache: qllm_cache.QLlmCache | None
 
   agent: LlmAgent
   runner: runners.InMemoryRunner
-  pattern: re.Pattern
+  sessions: session_pool.SessionPool
+  background_loop: utils.BackgroundEventLoop
 
   model_config = {"arbitrary_types_allowed": True}
 
@@ -95,11 +108,15 @@ class QuarantinedLlmService(BaseModel):
       model: str | BaseLlm,
       name: str = "QLLM_Service",
       user_id: str = "test_user_id",
+      batch_concurrency: int = 10,
+      cache: qllm_cache.QLlmCache | None = None,
   ):
     agent = LlmAgent(
         model=model,
         name=name,
         instruction=prompts.QLLM_SYSTEM_PROMPT,
+        # Each query only sees its own content, so sessions can be reused.
+        include_contents="none",
     )
 
     runner = runners.InMemoryRunner(
@@ -107,54 +124,88 @@ class QuarantinedLlmService(BaseModel):
         app_name=name,
     )
 
-    pattern = re.compile(re.escape(name))
+    # Concurrent queries each need their own session.
+    sessions = session_pool.SessionPool(
+        runner.session_service,
+        app_name=name,
+        user_id=user_id,
+        max_idle_sessions=batch_concurrency,
+    )
 
     super().__init__(
         model=model,
         name=name,
         user_id=user_id,
+        batch_concurrency=batch_concurrency,
+        cache=cache,
         agent=agent,
         runner=runner,
-        pattern=pattern,
+        sessions=sessions,
+        background_loop=_QLLM_BACKGROUND_LOOP,
     )
+    # Create the sessions of the first queries ahead of them.
+    asyncio.run_coroutine_threadsafe(
+        sessions.fill(batch_concurrency), self.background_loop.loop
+    )
+
+  def close(self) -> None:
+    """Deletes the idle sessions of the service.
+
+    Must not be called from the background event loop.
+    """
+    asyncio.run_coroutine_threadsafe(
+        self.sessions.drain(), self.background_loop.loop
+    ).result()
 
   async def _run_async(
       self, query: str, output_schema: str
   ) -> AsyncGenerator[Event, None]:
-    """Runs a query on the Q-LLM session."""
+    """Runs a query on a pooled Q-LLM session."""
 
-    qllm_session = await self.runner.session_service.create_session(
-        app_name=self.name, user_id=self.user_id
-    )
+    session_id = await self.sessions.acquire()
+    try:
+      async for e in self.runner.run_async(
+          user_id=self.user_id,
+          session_id=session_id,
+          new_message=types.UserContent(
+              f"{query} \n\n output_schema: {output_schema}"
+          ),
+      ):
+        yield e
+    finally:
+      await self.sessions.release(session_id)
 
-    qllm_query = f"{query} \n\n output_schema: {output_schema}"
-    content = types.Content(role="user", parts=[types.Part(text=qllm_query)])
+  async def query(self, query: str, output_schema: str) -> str:
+    """Runs a query on the Q-LLM and returns the text of its response.
 
-    async for e in self.runner.run_async(
-        user_id=qllm_session.user_id,  # Session object contains user_id
-        session_id=qllm_session.id,
-        new_message=content,
-    ):
-      yield e
+    The cache is not used, see `_query_and_parse`.
 
-    await self.runner.session_service.delete_session(
-        app_name=self.name, user_id=self.user_id, session_id=qllm_session.id
-    )
+    Args:
+      query: The query to run.
+      output_schema: The expected output schema.
+
+    Returns:
+      The text of the response.
+    """
+    response_parts = []
+    async for e in self._run_async(query, output_schema):
+      if e.content and e.author == self.name:
+        response_parts.extend(e.content.parts)
+    return "".join(map(utils.sanitized_part, response_parts))
+
+  @property
+  def _model_name(self) -> str:
+    return self.model if isinstance(self.model, str) else self.model.model
 
   def run(self, query: str, output_schema: str) -> Iterator[Event]:
-    """Runs the QLLM agent synchronously in a new thread.
+    """Runs the QLLM agent synchronously on the background event loop.
 
-    NOTE: This sync interface is solely because the CaMeL interpreter is
-    synchronous and does not suuport the `await` keyword. The
-    `query_ai_assistant` function is a wrapper around this synchronous run
-    method.
+    NOTE: The `query_ai_assistant` function does not use this method, as the
+    CaMeL interpreter awaits it directly via `query`.
 
     NOTE: This method is similar to the `run` method in the `runners.Runner`
     class.
 
-    TODO: Later versions of CaMeL should support asynchronous execution and
-    this method will be removed.
-
     Args:
       query: The query to run.
       output_schema: The output schema of the query.
@@ -171,14 +222,9 @@ class QuarantinedLlmService(BaseModel):
       finally:
         event_queue.put(None)
 
-    def _asyncio_thread_main():
-      try:
-        asyncio.run(_invoke_run_async())
-      finally:
-        event_queue.put(None)
-
-    thread = threading.Thread(target=_asyncio_thread_main)
-    thread.start()
+    future = asyncio.run_coroutine_threadsafe(
+        _invoke_run_async(), self.background_loop.loop
+    )
 
     # consumes and re-yield the events from background thread.
     while True:
@@ -188,20 +234,21 @@ class QuarantinedLlmService(BaseModel):
       else:
         yield e
 
-    thread.join()
+    future.result()
 
   def get_query_ai_assistant_function(
       self,
-  ) -> Callable[[str, str], str | int | float | bool]:
+  ) -> Callable[[str, str], Awaitable[str | int | float | bool]]:
     """Returns a function that queries a Large Language Model with `query` and returns the language model's output.
 
-    The `query_ai_assistant` function is a wrapper around the `run` method of
+    The `query_ai_assistant` function is a wrapper around the `query` method of
     the `QuarantinedLlmService` class. `query_ai_assistant` needs the `self`
     object but it can't be passed as a parameter because it needs to be added to
     the namespace of the CaMeL interpreter as a standalone built-in function.
+    It is a coroutine function, which the CaMeL interpreter awaits when called.
     """
 
-    def query_ai_assistant(
+    async def query_ai_assistant(
         query: str, output_schema: str
     ) -> str | int | float | bool:
       """Queries a Large Language Model with `query` and returns the language model's output.
@@ -248,38 +295,112 @@ class QuarantinedLlmService(BaseModel):
         The parsed output of the model.
       """
 
-      if output_schema not in ["int", "str", "float", "bool"]:
+      if output_schema not in _SUPPORTED_OUTPUT_SCHEMAS:
+        raise ValueError(f"Unsupported output schema: `{output_schema}`")
+
+      return await self._query_and_parse(query, output_schema)
+
+    return query_ai_assistant
+
+  def get_query_ai_assistant_batch_function(
+      self,
+  ) -> Callable[[list[str], str], Awaitable[list[str | int | float | bool]]]:
+    """Returns a function that runs `query_ai_assistant` on a list of queries.
+
+    The queries are run concurrently, at most `batch_concurrency` at a time.
+    """
+
+    async def query_ai_assistant_batch(
+        queries: list[str], output_schema: str
+    ) -> list[str | int | float | bool]:
+      """Queries a Large Language Model with each of `queries` and returns the list of the language model's outputs.
+
+      It is equivalent to `[query_ai_assistant(query, output_schema) for query
+      in queries]`, but much faster as the queries are run concurrently. Use it
+      whenever you need to extract the same information from each element of a
+      list.
+
+      Each query must follow the same guidelines as the `query` argument of
+      `query_ai_assistant`: the assistant does not have direct access to the
+      variables, so you need to insert **all the relevant information in each
+      query**.
+      Args:
+        queries: a list of strings with the queries, one for each output.
+        output_schema: a string represeting the type of each of the outputs.
+          Allowed types are: 'int' , 'str' ,'float' , 'bool'
+
+      Example:
+        senders = query_ai_assistant_batch(
+            [f"Who sent this email? {email}" for email in emails], "str"
+        )
+
+      Returns:
+        The list of the parsed outputs of the model, in the same order as
+        `queries`.
+      """
+
+      if output_schema not in _SUPPORTED_OUTPUT_SCHEMAS:
         raise ValueError(f"Unsupported output schema: `{output_schema}`")
 
-      response_parts = []
+      semaphore = asyncio.Semaphore(self.batch_concurrency)
+
+      async def query_with_semaphore(query: str) -> str | int | float | bool:
+        async with semaphore:
+          return await self._query_and_parse(query, output_schema)
+
+      return list(
+          await asyncio.gather(*map(query_with_semaphore, queries))
+      )
+
+    return query_ai_assistant_batch
+
+  async def _query_and_parse(
+      self, query: str, output_schema: str
+  ) -> str | int | float | bool:
+    """Runs a query on the Q-LLM and parses the response to `output_schema`.
 
-      for e in self.run(
+    If the service has a cache, the response is looked up there first. Live
+    responses are only stored in it once they parse, so that a query whose
+    response failed to parse is sent to the model again when retried.
+    """
+    cache_key = None
+    response_text = None
+    if self.cache is not None:
+      cache_key = qllm_cache.make_key(query, output_schema, self._model_name)
+      response_text = self.cache.get(cache_key)
+    is_live = response_text is None
+    if is_live:
+      response_text = await self.query(
           query=query,
           output_schema=output_schema,
-      ):
-        if e.content and self.pattern.fullmatch(e.author):
-          response_parts.extend(e.content.parts)
+      )
 
-      response_text = "".join(map(utils.sanitized_part, response_parts))
+    print(
+        f"query_ai_assistant(query='{query}',"
+        f" output_schema='{output_schema}') -> {response_text}",
+        end="\n\n",
+    )
 
-      print(
-          f"query_ai_assistant(query='{query}',"
-          f" output_schema='{output_schema}') -> {response_text}",
-          end="\n\n",
-      )
+    output = _parse_response(response_text, output_schema)
+    if is_live and cache_key is not None and response_text:
+      self.cache.set(cache_key, response_text)
+    return output
 
-      if output_schema == "int":
-        return int_validator(response_text)
-      elif output_schema == "str":
-        return str(response_text)
-      elif output_schema == "float":
-        return float_validator(response_text)
-      elif output_schema == "bool":
-        return bool_validator(response_text)
-      else:
-        raise ValueError(f"Unsupported output schema: `{output_schema}`")
 
-    return query_ai_assistant
+def _parse_response(
+    response_text: str, output_schema: str
+) -> str | int | float | bool:
+  """Parses a response of the Q-LLM to `output_schema`."""
+  if output_schema == "int":
+    return int_validator(response_text)
+  elif output_schema == "str":
+    return str(response_text)
+  elif output_schema == "float":
+    return float_validator(response_text)
+  elif output_schema == "bool":
+    return bool_validator(response_text)
+  else:
+    raise ValueError(f"Unsupported output schema: `{output_schema}`")
 
 
 class CaMelInterpreterService(BaseModel):
@@ -290,7 +411,9 @@ class CaMelInterpreterService(BaseModel):
   classes_to_exclude: frozenset[str]
   eval_args: interpreter.EvalArgs
   namespace: Namespace
+  base_namespace: Namespace
   quarantined_llm_service: QuarantinedLlmService
+  last_execution_stats: instrumentation.ExecutionStats | None = None
 
   model_config = {"arbitrary_types_allowed": True}
 
@@ -299,10 +422,12 @@ class CaMelInterpreterService(BaseModel):
       model: str | BaseLlm,
       tools: list[Tool],
       eval_args: interpreter.EvalArgs,
+      qllm_cache: qllm_cache.QLlmCache | None = None,
   ):
     quarantined_llm_service = QuarantinedLlmService(
         model=model,
         name="QLLM_Service",
+        cache=qllm_cache,
     )  # Manages interactions with the QLLM.
 
     classes_to_exclude: frozenset[str] = frozenset(
@@ -317,6 +442,15 @@ class CaMelInterpreterService(BaseModel):
         (capabilities.readers.Public(),),
     ))
 
+    query_ai_assistant_batch = (
+        quarantined_llm_service.get_query_ai_assistant_batch_function()
+    )
+    camel_tools.append((
+        query_ai_assistant_batch,
+        capabilities.Capabilities.camel(),
+        (capabilities.readers.Public(),),
+    ))
+
     namespace = library.make_builtins_namespace(
         variables={
             (func_name := f.__name__): CaMeLFunction(
@@ -326,7 +460,17 @@ class CaMelInterpreterService(BaseModel):
                 dependencies=deps,
             )
             for f, caps, deps in camel_tools
-            if hasattr(f, "__name__")
+            if hasattr(f, "__name__") and f is not query_ai_assistant_batch
+        }
+        | {
+            # Each output only depends on the query it was computed from.
+            "query_ai_assistant_batch": CaMeLMappedFunction(
+                name="query_ai_assistant_batch",
+                py_callable=query_ai_assistant_batch,
+                capabilities=capabilities.Capabilities.camel(),
+                dependencies=(capabilities.readers.Public(),),
+                mapped_argument="queries",
+            )
         }
     )
 
@@ -336,6 +480,7 @@ class CaMelInterpreterService(BaseModel):
         classes_to_exclude=classes_to_exclude,
         eval_args=eval_args,
         namespace=namespace,
+        base_namespace=namespace,
         quarantined_llm_service=quarantined_llm_service,
     )
 
@@ -345,6 +490,33 @@ class CaMelInterpreterService(BaseModel):
   def get_classes_to_exclude(self) -> frozenset[str]:
     return self.classes_to_exclude
 
+  def snapshot(self, dependencies: tuple[Any, ...] = ()) -> bytes:
+    """Serializes the variables defined by the code executed so far.
+
+    The snapshot can be restored by a service with the same tools, e.g., to
+    continue the session in another process.
+
+    Args:
+      dependencies: The dependencies of the session to store with the
+        variables.
+
+    Returns:
+      The snapshot.
+    """
+    return snapshot.dumps(self.namespace, self.base_namespace, dependencies)
+
+  def restore(self, data: bytes) -> tuple[Any, ...]:
+    """Replaces the internal namespace with the one in a snapshot.
+
+    Args:
+      data: A snapshot created by `snapshot`.
+
+    Returns:
+      The dependencies stored with the variables.
+    """
+    self.namespace, dependencies = snapshot.loads(data, self.base_namespace)
+    return dependencies
+
   def execute_code(
       self,
       code: str,
@@ -363,8 +535,41 @@ class CaMelInterpreterService(BaseModel):
       print(code)
 
     # The namespace passed here is self.namespace, which is managed internally
-    interpreter_res, updated_namespace, new_tool_calls, new_dependencies = (
-        interpreter.parse_and_interpret_code(
+    return self._process_eval_result(
+        len(tool_calls_chain),
+        *interpreter.parse_and_interpret_code_with_stats(
+            code,
+            self.namespace,
+            tool_calls_chain,
+            current_dependencies,
+            # Awaits the Q-LLM on its long-lived loop, not on a new thread.
+            dataclasses.replace(
+                self.eval_args,
+                event_loop=self.quarantined_llm_service.background_loop.loop,
+            ),
+        )
+    )
+
+  async def execute_code_async(
+      self,
+      code: str,
+      tool_calls_chain: list[function_types.FunctionCall],
+      current_dependencies: tuple[Any, ...],
+      verbose: bool = False,
+  ) -> tuple[
+      str,
+      list[function_types.FunctionCall],
+      CaMeLException | None,
+      camel_value.Namespace,
+      tuple[Any, ...],
+  ]:
+    """Interprets the CaMeL code, awaiting the Q-LLM on the running loop."""
+    if verbose:
+      print(code)
+
+    return self._process_eval_result(
+        len(tool_calls_chain),
+        *await interpreter.parse_and_interpret_code_with_stats_async(
             code,
             self.namespace,
             tool_calls_chain,
@@ -372,9 +577,33 @@ class CaMelInterpreterService(BaseModel):
             self.eval_args,
         )
     )
+
+  def _process_eval_result(
+      self,
+      num_previous_tool_calls: int,
+      eval_result: interpreter.EvalResult,
+      stats: instrumentation.ExecutionStats | None,
+  ) -> tuple[
+      str,
+      list[function_types.FunctionCall],
+      CaMeLException | None,
+      camel_value.Namespace,
+      tuple[Any, ...],
+  ]:
+    """Updates the namespace and extracts the output of an evaluation.
+
+    Only the calls after the first `num_previous_tool_calls` ones belong to the
+    evaluation, so the output of previous executions is not printed again.
+    """
+    interpreter_res, updated_namespace, new_tool_calls, new_dependencies = (
+        eval_result
+    )
     self.namespace = updated_namespace  # Update internal namespace state
+    self.last_execution_stats = stats
 
-    printed_output = utils.extract_print_output(new_tool_calls)
+    printed_output = utils.extract_print_output(
+        new_tool_calls, start=num_previous_tool_calls
+    )
     ad_tool_calls = new_tool_calls
 
     final_eval_output_str = ""
@@ -391,7 +620,7 @@ class CaMelInterpreterService(BaseModel):
         ad_tool_calls,
         error_obj,
         updated_namespace,
-        new_dependencies,
+        tuple(new_dependencies),
     )
 
 
@@ -442,7 +671,7 @@ class CaMeLInterpreter(BaseAgent):
     dependencies = ctx.session.state.get("dependencies") or ()
 
     printed_output, ad_tool_calls, error, _, dependencies = (
-        self.camel_interpreter_service.execute_code(
+        await self.camel_interpreter_service.execute_code_async(
             p_llm_code, function_calls, dependencies
         )
     )  # printed_output, ad_tool_calls, error, namespace, dependencies
@@ -487,6 +716,18 @@ class CaMeLAgent(BaseAgent):
     model: The LLM model to use.
     instruction: The instruction to use.
     tools: The tools to use (py_callable, capabilities, dependencies)
+    max_concurrency: The maximum number of comprehension iterations (e.g.,
+      `query_ai_assistant` calls over a list) the interpreter runs
+      concurrently. Tools must be thread-safe if greater than 1.
+    qllm_cache: An optional cache for the responses of the Q-LLM (e.g.,
+      `qllm_cache.InMemoryQLlmCache` or `qllm_cache.SqliteQLlmCache`). Cached
+      outputs get the same capabilities as live ones.
+    execution_budget: Optional limits on the steps, time and memory of each
+      execution of the generated code. An execution exceeding them fails with a
+      code error, which the P-LLM can react to.
+    collect_execution_stats: Whether to collect per-node and per-tool
+      statistics of each execution, available in
+      `camel_interpreter_agent.camel_interpreter_service.last_execution_stats`.
   """
 
   model: str | BaseLlm
@@ -508,6 +749,10 @@ class CaMeLAgent(BaseAgent):
       tools: Optional[list[Tool]] = None,
       security_policy_engine: SecurityPolicyEngine = security_policy.NoSecurityPolicyEngine(),
       eval_mode: DependenciesPropagationMode = DependenciesPropagationMode.NORMAL,
+      max_concurrency: int = 1,
+      qllm_cache: qllm_cache.QLlmCache | None = None,
+      execution_budget: instrumentation.ExecutionBudget | None = None,
+      collect_execution_stats: bool = False,
   ):
 
     camel_interpreter_service = CaMelInterpreterService(
@@ -516,7 +761,11 @@ class CaMeLAgent(BaseAgent):
         eval_args=interpreter.EvalArgs(
             eval_mode=eval_mode,
             security_policy_engine=security_policy_engine,
+            max_concurrency=max_concurrency,
+            execution_budget=execution_budget,
+            collect_stats=collect_execution_stats,
         ),
+        qllm_cache=qllm_cache,
     )
     camel_interpreter_agent = CaMeLInterpreter(
         name="CaMeLInterpreter",
@@ -526,13 +775,8 @@ class CaMeLAgent(BaseAgent):
     pllm_agent = LlmAgent(
         name="PLLM",
         model=model,
-        instruction=prompts.generate_camel_system_prompt(
-            list(
-                map(
-                    prompts.make_function,
-                    camel_interpreter_service.get_funcs_for_pllm_prompt(),
-                )
-            ),
+        instruction=prompts.get_camel_system_prompt(
+            camel_interpreter_service.get_funcs_for_pllm_prompt(),
             camel_interpreter_service.get_classes_to_exclude(),
         ),
         output_key="p_llm_code",
@@ -555,6 +799,11 @@ class CaMeLAgent(BaseAgent):
         loop_agent=loop_agent,
     )
 
+  def close(self) -> None:
+    """Deletes the idle Q-LLM sessions of the agent."""
+    service = self.camel_interpreter_agent.camel_interpreter_service
+    service.quarantined_llm_service.close()
+
   @override
   async def _run_async_impl(
       self, ctx: InvocationContext
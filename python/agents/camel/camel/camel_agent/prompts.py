@@ -14,12 +14,17 @@
 
 """Pipeline element which generates a system prompt to generate code given the tools."""
 
+import collections
 from collections.abc import Callable, Iterable, Mapping, MutableMapping, Sequence
 import dataclasses
 import enum
+import functools
+import hashlib
+import importlib.metadata
 import inspect
 import re
 import textwrap
+import threading
 import types
 from typing import Annotated, Any, Concatenate, TypeAlias, get_args, get_origin, get_type_hints
 
@@ -371,6 +376,22 @@ def _get_available_classes_list(
   )
 
 
+# The built-ins do not change at runtime, so their lists are rendered once.
+_BUILT_IN_FUNCTIONS_LIST = _get_available_functions_list(
+    library.BUILT_IN_FUNCTIONS
+)
+_BUILT_IN_METHODS_LIST = _get_available_methods_list(
+    camel_value.SUPPORTED_BUILT_IN_METHODS
+)
+
+
+@functools.cache
+def _get_built_in_classes_list(classes_to_exclude: frozenset[str]) -> str:
+  return _get_available_classes_list(
+      library.BUILT_IN_CLASSES, classes_to_exclude
+  )
+
+
 NOTES = """\
 ## Important notes on the code
 
@@ -483,7 +504,7 @@ The types you can use are:
 ## Built-in functions
 
 You are allowed to use the following built-in functions:
-{_get_available_functions_list(library.BUILT_IN_FUNCTIONS)}
+{_BUILT_IN_FUNCTIONS_LIST}
 
 Note that the `type` function returns a string with the type name, rather than the type itself. So you can check if, e.g., something is an `int` \
 with `if type(x) == "int"`.
@@ -491,12 +512,12 @@ with `if type(x) == "int"`.
 ## Built-in methods
 
 For each of the following types you can use the following methods:
-{_get_available_methods_list(camel_value.SUPPORTED_BUILT_IN_METHODS)}
+{_BUILT_IN_METHODS_LIST}
 
 # Imported classes
 
 Moreover, you can assume that the following non-builtin classes are available:
-{_get_available_classes_list(library.BUILT_IN_CLASSES, classes_to_exclude)}
+{_get_built_in_classes_list(classes_to_exclude)}
 
 
 ## Tools functions
@@ -657,3 +678,65 @@ def make_function(function: Callable[..., T]) -> Function:
       full_docstring=function.__doc__,
       return_type=get_type_hints(function).get("return"),
   )
+
+
+def _get_library_version() -> str:
+  try:
+    return importlib.metadata.version("camel")
+  except importlib.metadata.PackageNotFoundError:
+    return "unknown"
+
+
+_LIBRARY_VERSION = _get_library_version()
+
+_MAX_CACHED_PROMPTS = 128
+
+_cached_prompts: collections.OrderedDict[str, str] = collections.OrderedDict()
+_cached_prompts_lock = threading.Lock()
+
+
+def _get_prompt_cache_key(
+    tools: Sequence[Callable[..., Any]], classes_to_exclude: frozenset[str]
+) -> str:
+  """Returns a digest of everything the prompt is rendered from."""
+  content = [_LIBRARY_VERSION, repr(sorted(classes_to_exclude))]
+  for tool in tools:
+    content.extend((
+        tool.__module__,
+        tool.__qualname__,
+        str(inspect.signature(tool)),
+        tool.__doc__ or "",
+    ))
+  return hashlib.sha256("\0".join(content).encode()).hexdigest()
+
+
+def get_camel_system_prompt(
+    tools: Sequence[Callable[..., Any]],
+    classes_to_exclude: frozenset[str] = frozenset(),
+) -> str:
+  """Returns the system prompt for `tools`, generating it only if needed.
+
+  Prompts are cached by the name, signature and docstring of the tools, the
+  excluded classes and the library version, so agents created with the same
+  tools share the prompt.
+
+  Args:
+    tools: The tools to describe in the prompt.
+    classes_to_exclude: The built-in classes not to list in the prompt.
+
+  Returns:
+    The system prompt.
+  """
+  key = _get_prompt_cache_key(tools, classes_to_exclude)
+  with _cached_prompts_lock:
+    if (prompt := _cached_prompts.get(key)) is not None:
+      _cached_prompts.move_to_end(key)
+      return prompt
+  prompt = generate_camel_system_prompt(
+      list(map(make_function, tools)), classes_to_exclude
+  )
+  with _cached_prompts_lock:
+    _cached_prompts[key] = prompt
+    while len(_cached_prompts) > _MAX_CACHED_PROMPTS:
+      _cached_prompts.popitem(last=False)
+  return prompt
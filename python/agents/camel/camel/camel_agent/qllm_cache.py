@@ -0,0 +1,227 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Caches for the responses of the Quarantined LLM (Q-LLM).
+
+Only the raw text of the responses is cached. The CaMeL interpreter wraps the
+parsed output of a cached response exactly like the output of a live call, so
+cached outputs get the same capabilities and dependencies.
+"""
+
+import collections
+import dataclasses
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import typing
+import weakref
+
+
+def make_key(query: str, output_schema: str, model: str) -> str:
+  """Returns the cache key for a query to the Q-LLM."""
+  serialized = json.dumps([query, output_schema, model])
+  return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+@dataclasses.dataclass
+class CacheStats:
+  """Statistics about the usage of a cache."""
+
+  hits: int = 0
+  """Number of lookups that found a valid entry."""
+  misses: int = 0
+  """Number of lookups that did not find a valid entry."""
+
+  @property
+  def hit_rate(self) -> float:
+    lookups = self.hits + self.misses
+    return self.hits / lookups if lookups else 0.0
+
+
+@typing.runtime_checkable
+class QLlmCache(typing.Protocol):
+  """Protocol for a cache of Q-LLM responses."""
+
+  stats: CacheStats
+
+  def get(self, key: str) -> str | None:
+    """Returns the cached response for `key`, if any."""
+    ...
+
+  def set(self, key: str, response: str) -> None:
+    """Caches `response` for `key`."""
+    ...
+
+  def close(self) -> None:
+    """Releases the resources held by the cache."""
+    ...
+
+
+class InMemoryQLlmCache(QLlmCache):
+  """A thread-safe, process-local LRU cache with optional TTL."""
+
+  def __init__(
+      self, max_size: int = 1024, ttl_seconds: float | None = None
+  ) -> None:
+    self.stats = CacheStats()
+    self._max_size = max_size
+    self._ttl_seconds = ttl_seconds
+    self._entries: collections.OrderedDict[str, tuple[str, float]] = (
+        collections.OrderedDict()
+    )
+    self._lock = threading.Lock()
+
+  def get(self, key: str) -> str | None:
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is not None and self._ttl_seconds is not None:
+        if time.monotonic() - entry[1] > self._ttl_seconds:
+          del self._entries[key]
+          entry = None
+      if entry is None:
+        self.stats.misses += 1
+        return None
+      self._entries.move_to_end(key)
+      self.stats.hits += 1
+      return entry[0]
+
+  def set(self, key: str, response: str) -> None:
+    with self._lock:
+      self._entries[key] = (response, time.monotonic())
+      self._entries.move_to_end(key)
+      while len(self._entries) > self._max_size:
+        self._entries.popitem(last=False)
+
+  def close(self) -> None:
+    # The entries are only held in memory, and may be shared by several agents.
+    pass
+
+
+def _close_connections(
+    connections: list[sqlite3.Connection], lock: threading.Lock
+) -> None:
+  """Closes and forgets all the `connections`."""
+  with lock:
+    closed_connections = connections[:]
+    connections.clear()
+  for connection in closed_connections:
+    connection.close()
+
+
+class SqliteQLlmCache(QLlmCache):
+  """An LRU cache with optional TTL stored in a SQLite database.
+
+  The database can be shared between threads and processes (e.g., between
+  workers on the same host). Statistics are per instance. Each thread opens its
+  own connection, and `close` closes all of them; the cache can still be used
+  afterwards, in which case new connections are opened. The connections are
+  also closed once the cache is garbage collected or the process exits.
+  """
+
+  def __init__(
+      self,
+      path: str,
+      max_size: int = 100_000,
+      ttl_seconds: float | None = None,
+  ) -> None:
+    self.stats = CacheStats()
+    self._path = path
+    self._max_size = max_size
+    self._ttl_seconds = ttl_seconds
+    self._local = threading.local()
+    self._connections: list[sqlite3.Connection] = []
+    self._connections_lock = threading.Lock()
+    self._stats_lock = threading.Lock()
+    # Does not reference `self`, so that the cache can be garbage collected.
+    self._finalizer = weakref.finalize(
+        self, _close_connections, self._connections, self._connections_lock
+    )
+    with self._connection() as connection:
+      connection.execute("""
+          CREATE TABLE IF NOT EXISTS qllm_responses (
+              key TEXT PRIMARY KEY,
+              response TEXT NOT NULL,
+              created_at REAL NOT NULL,
+              accessed_at REAL NOT NULL
+          )""")
+      connection.execute("""
+          CREATE INDEX IF NOT EXISTS qllm_responses_accessed_at
+          ON qllm_responses (accessed_at)""")
+
+  def _connection(self) -> sqlite3.Connection:
+    """Returns the connection of the current thread to the database."""
+    local = self._local
+    connection = getattr(local, "connection", None)
+    if connection is None:
+      # Connections are only used by the thread that opened them, but are
+      # closed by the thread calling `close`.
+      connection = sqlite3.connect(
+          self._path, timeout=30, check_same_thread=False
+      )
+      connection.execute("PRAGMA journal_mode=WAL")
+      local.connection = connection
+      with self._connections_lock:
+        self._connections.append(connection)
+    return connection
+
+  def close(self) -> None:
+    with self._connections_lock:
+      self._local = threading.local()
+      connections = self._connections[:]
+      self._connections.clear()
+    for connection in connections:
+      connection.close()
+
+  def get(self, key: str) -> str | None:
+    now = time.time()
+    with self._connection() as connection:
+      row = connection.execute(
+          "SELECT response, created_at FROM qllm_responses WHERE key = ?",
+          (key,),
+      ).fetchone()
+      if row is not None and self._ttl_seconds is not None:
+        if now - row[1] > self._ttl_seconds:
+          connection.execute(
+              "DELETE FROM qllm_responses WHERE key = ?", (key,)
+          )
+          row = None
+      if row is not None:
+        connection.execute(
+            "UPDATE qllm_responses SET accessed_at = ? WHERE key = ?",
+            (now, key),
+        )
+    with self._stats_lock:
+      if row is None:
+        self.stats.misses += 1
+        return None
+      self.stats.hits += 1
+    return row[0]
+
+  def set(self, key: str, response: str) -> None:
+    now = time.time()
+    with self._connection() as connection:
+      connection.execute(
+          "INSERT OR REPLACE INTO qllm_responses VALUES (?, ?, ?, ?)",
+          (key, response, now, now),
+      )
+      connection.execute(
+          """
+          DELETE FROM qllm_responses WHERE key IN (
+              SELECT key FROM qllm_responses
+              ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+          )""",
+          (self._max_size,),
+      )
@@ -0,0 +1,111 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A pool of reusable sessions for the Quarantined LLM (Q-LLM)."""
+
+import threading
+
+from google.adk.sessions import base_session_service
+
+BaseSessionService = base_session_service.BaseSessionService
+
+
+class SessionPool:
+  """A pool of sessions, created ahead of the queries that use them.
+
+  No query to the Q-LLM may see the content of another one. A session is only
+  used by one query at a time, and is then reused by later queries: this is
+  only isolated if the agent running the queries does not include the contents
+  of the session (`include_contents="none"`). To bound the number of events
+  kept in a session, a session is deleted after `max_session_uses` queries and,
+  as long as the pool is not full, replaced by a new session, so that creating
+  sessions is not on the path of the next queries.
+
+  The pool can be used from any thread and event loop.
+  """
+
+  def __init__(
+      self,
+      session_service: BaseSessionService,
+      app_name: str,
+      user_id: str,
+      max_idle_sessions: int = 16,
+      max_session_uses: int = 32,
+  ):
+    self._session_service = session_service
+    self._app_name = app_name
+    self._user_id = user_id
+    self._max_idle_sessions = max_idle_sessions
+    self._max_session_uses = max_session_uses
+    self._idle_session_ids: list[str] = []
+    self._session_uses: dict[str, int] = {}
+    self._lock = threading.Lock()
+
+  async def fill(self, num_sessions: int) -> None:
+    """Pre-creates sessions until `num_sessions` of them are idle."""
+    num_sessions = min(num_sessions, self._max_idle_sessions)
+    while True:
+      with self._lock:
+        if len(self._idle_session_ids) >= num_sessions:
+          return
+      session = await self._session_service.create_session(
+          app_name=self._app_name, user_id=self._user_id
+      )
+      with self._lock:
+        self._idle_session_ids.append(session.id)
+
+  async def acquire(self) -> str:
+    """Returns the ID of an idle session, creating one if none is idle."""
+    with self._lock:
+      if self._idle_session_ids:
+        return self._idle_session_ids.pop()
+    session = await self._session_service.create_session(
+        app_name=self._app_name, user_id=self._user_id
+    )
+    return session.id
+
+  async def release(self, session_id: str) -> None:
+    """Returns the session to the pool, or deletes it once used up."""
+    with self._lock:
+      uses = self._session_uses.pop(session_id, 0) + 1
+      is_full = len(self._idle_session_ids) >= self._max_idle_sessions
+      if uses < self._max_session_uses and not is_full:
+        self._session_uses[session_id] = uses
+        self._idle_session_ids.append(session_id)
+        return
+    await self._delete(session_id)
+    if is_full:
+      return
+    session = await self._session_service.create_session(
+        app_name=self._app_name, user_id=self._user_id
+    )
+    with self._lock:
+      if len(self._idle_session_ids) < self._max_idle_sessions:
+        self._idle_session_ids.append(session.id)
+        return
+    await self._delete(session.id)
+
+  async def drain(self) -> None:
+    """Deletes the idle sessions."""
+    with self._lock:
+      session_ids, self._idle_session_ids = self._idle_session_ids, []
+      for session_id in session_ids:
+        self._session_uses.pop(session_id, None)
+    for session_id in session_ids:
+      await self._delete(session_id)
+
+  async def _delete(self, session_id: str) -> None:
+    await self._session_service.delete_session(
+        app_name=self._app_name, user_id=self._user_id, session_id=session_id
+    )
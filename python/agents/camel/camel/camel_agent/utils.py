@@ -14,7 +14,9 @@
 
 """Utils for CaMeL agent implementation."""
 
-from collections.abc import Iterable
+import asyncio
+from collections.abc import Sequence
+import threading
 
 from google.genai import types
 
@@ -53,13 +55,48 @@ def sanitized_part(part: types.Part) -> str:
 
 
 def extract_print_output(
-    tool_calls: Iterable[FunctionCall],
+    tool_calls: Sequence[FunctionCall],
+    start: int = 0,
 ) -> str:
-  """Extracts and concatenates arguments from print calls."""
-
-  printed_output = ""
-  print_calls = [tc for tc in tool_calls if tc.function == "print"]
-  for print_call in print_calls:
-    for arg_value in print_call.args.values():
-      printed_output += str(arg_value)
-  return printed_output
+  """Extracts and concatenates arguments from print calls.
+
+  Args:
+    tool_calls: The chain of tool calls, which is only ever appended to.
+    start: The index of the first call to process, e.g., the length of the
+      chain before the latest execution, so that only its output is returned.
+
+  Returns:
+    The concatenated arguments of the print calls from `start` onwards.
+  """
+  return "".join(
+      str(arg_value)
+      for i in range(start, len(tool_calls))
+      if tool_calls[i].function == "print"
+      for arg_value in tool_calls[i].args.values()
+  )
+
+
+class BackgroundEventLoop:
+  """An event loop that runs forever in a daemon thread.
+
+  The thread is started on first use, and serves all the coroutines submitted
+  to it, so that synchronous code does not need a new thread and event loop
+  per call.
+  """
+
+  def __init__(self, name: str = "BackgroundEventLoop"):
+    self._name = name
+    self._loop: asyncio.AbstractEventLoop | None = None
+    self._lock = threading.Lock()
+
+  @property
+  def loop(self) -> asyncio.AbstractEventLoop:
+    """Returns the event loop, starting its thread if needed."""
+    with self._lock:
+      if self._loop is None:
+        loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=loop.run_forever, name=self._name, daemon=True
+        ).start()
+        self._loop = loop
+      return self._loop
@@ -14,7 +14,10 @@
 
 """Module containing definitions for the capabilities in CaMeL."""
 
+from collections.abc import Mapping
 import dataclasses
+import functools
+import types
 from typing import Any, Self
 
 from . import readers
@@ -27,19 +30,47 @@ class Capabilities:
 
   sources_set: frozenset[sources.Source]
   readers_set: readers.Readers[Any]
-  other_metadata: dict[str, Any] = dataclasses.field(default_factory=dict)
+  other_metadata: Mapping[str, Any] = dataclasses.field(default_factory=dict)
 
   def __hash__(self) -> int:
+    # Only the hash of the shared capabilities is cached, as the metadata of
+    # the other ones can still change.
+    cached_hash = self.__dict__.get("_hash")
+    if cached_hash is not None:
+      return cached_hash
     return (
         hash(self.sources_set)
         ^ hash(self.readers_set)
         ^ hash(tuple(self.other_metadata.items()))
     )
 
+  def __getstate__(self) -> dict[str, Any]:
+    # Mapping proxies, which protect the metadata of the shared capabilities,
+    # cannot be pickled, and string hashes differ between processes.
+    state = self.__dict__ | {"other_metadata": dict(self.other_metadata)}
+    state.pop("_hash", None)
+    return state
+
   @classmethod
+  def _shared(cls, source: sources.SourceEnum) -> Self:
+    """Returns new public capabilities with read-only metadata and hash."""
+    shared = cls(
+        frozenset({source}), readers.Public(), types.MappingProxyType({})
+    )
+    object.__setattr__(shared, "_hash", hash(shared))
+    return shared
+
+  @classmethod
+  @functools.cache
   def default(cls) -> Self:
-    return cls(frozenset({sources.SourceEnum.USER}), readers.Public())
+    """Returns the shared capabilities of values created by the user.
+
+    Their metadata is read-only, as they are shared, and their hash is cached.
+    """
+    return cls._shared(sources.SourceEnum.USER)
 
   @classmethod
+  @functools.cache
   def camel(cls) -> Self:
-    return cls(frozenset({sources.SourceEnum.CAMEL}), readers.Public())
+    """Returns the shared capabilities of values created by CaMeL."""
+    return cls._shared(sources.SourceEnum.CAMEL)
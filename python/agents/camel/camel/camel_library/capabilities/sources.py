@@ -16,7 +16,7 @@
 
 import dataclasses
 import enum
-from typing import TypeAlias
+from typing import Any, TypeAlias
 
 
 class SourceEnum(enum.Enum):
@@ -38,7 +38,18 @@ class Tool:
   """Sources within the tool (e.g., email addresses)."""
 
   def __hash__(self) -> int:
-    return hash(self.tool_name) ^ hash(tuple(self.inner_sources))
+    # Tool sources are immutable, so the hash is computed only once.
+    cached_hash = self.__dict__.get("_hash")
+    if cached_hash is None:
+      cached_hash = hash(self.tool_name) ^ hash(tuple(self.inner_sources))
+      object.__setattr__(self, "_hash", cached_hash)
+    return cached_hash
+
+  def __getstate__(self) -> dict[str, Any]:
+    # String hashes differ between processes, so the cached hash is not kept.
+    state = dict(self.__dict__)
+    state.pop("_hash", None)
+    return state
 
 
 Source: TypeAlias = SourceEnum | Tool
@@ -12,8 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Utility functions for capabilities."""
+"""Utility functions for capabilities.
 
+The readers and the sources of a value are the intersection and the union of
+those of all the values in its dependency closure, which can be large (e.g., a
+value computed in a loop over a list depends on the whole list). The closure is
+traversed lazily and once, so predicates stop as soon as their result is known,
+and `cached_readers` lets predicates evaluated together share their work.
+"""
+
+from collections.abc import Callable, Iterator
+import contextlib
+import contextvars
 from typing import Any, Protocol
 from . import capabilities
 from . import readers
@@ -28,11 +38,146 @@ class HasDependenciesAndCapabilities(Protocol):
   ) -> tuple[tuple[camel_value.Value, ...], frozenset[int]]:
     ...
 
+  def collect_dependencies(
+      self, accumulator: camel_value.DependencyAccumulator
+  ) -> None:
+    ...
+
   @property
   def capabilities(self) -> capabilities.Capabilities | None:
     ...
 
 
+class _ReadersCache:
+  """The readers of the dependency closures computed so far."""
+
+  def __init__(self) -> None:
+    # Keeps the values alive, so that their ids are not reused.
+    self._values: list[Any] = []
+    self._public_ids: set[int] = set()
+    self._readers: dict[int, readers.Readers[Any]] = {}
+
+  def get(self, value: Any) -> readers.Readers[Any] | None:
+    if id(value) in self._public_ids:
+      return readers.Public()
+    return self._readers.get(id(value))
+
+  def add(
+      self,
+      value: Any,
+      value_readers: readers.Readers[Any],
+      closure: list[Any],
+  ) -> None:
+    """Stores the readers of the closure of `value`."""
+    self._values.extend(closure)
+    if isinstance(value_readers, readers.Public):
+      # The closure of each value in a public closure is public too.
+      self._public_ids.update(id(v) for v in closure)
+    else:
+      self._readers[id(value)] = value_readers
+
+
+_readers_cache: contextvars.ContextVar[_ReadersCache | None] = (
+    contextvars.ContextVar("readers_cache", default=None)
+)
+
+
+@contextlib.contextmanager
+def cached_readers() -> Iterator[None]:
+  """Caches the readers of the values checked within the context.
+
+  The readers of a value depend on the values it depends on, some of which can
+  be mutated (e.g., the elements of a list), so the cache must only be used
+  while no code is evaluated, e.g., while checking a tool call against the
+  security policies.
+
+  Yields:
+    Nothing.
+  """
+  if _readers_cache.get() is not None:
+    yield
+    return
+  token = _readers_cache.set(_ReadersCache())
+  try:
+    yield
+  finally:
+    _readers_cache.reset(token)
+
+
+def _iter_closure(
+    value: HasDependenciesAndCapabilities,
+    visited_objects: frozenset[int] = frozenset(),
+    is_known: Callable[[Any], bool] = lambda _: False,
+) -> Iterator[Any]:
+  """Lazily yields `value` and the values it transitively depends on.
+
+  Args:
+    value: The value to start from.
+    visited_objects: Values which are yielded without their dependencies.
+    is_known: Whether the dependencies of a value are not needed, e.g., as the
+      result for its closure is already known.
+
+  Yields:
+    Each value of the closure once.
+  """
+  accumulator = camel_value.DependencyAccumulator()
+  accumulator.add((value,))
+  dependencies = accumulator.dependencies
+  i = 0
+  while i < len(dependencies):
+    dependency = dependencies[i]
+    i += 1
+    if isinstance(dependency, readers.Public):
+      continue
+    yield dependency
+    if (
+        dependency.capabilities is None
+        or id(dependency) in visited_objects
+        or is_known(dependency)
+    ):
+      continue
+    dependency.collect_dependencies(accumulator)
+
+
+def _iter_readers(
+    value: HasDependenciesAndCapabilities,
+    closure: list[Any],
+    visited_objects: frozenset[int] = frozenset(),
+) -> Iterator[readers.Readers[Any]]:
+  """Lazily yields the readers of the values in the closure of `value`.
+
+  Args:
+    value: The value to get the readers for.
+    closure: The list the traversed values are appended to.
+    visited_objects: Values whose dependencies are not traversed.
+
+  Yields:
+    The readers of each value, or of its closure if cached.
+  """
+  cache = _readers_cache.get()
+  get_cached = (lambda _: None) if cache is None else cache.get
+  for dependency in _iter_closure(
+      value,
+      visited_objects,
+      lambda dependency: get_cached(dependency) is not None,
+  ):
+    closure.append(dependency)
+    cached = get_cached(dependency)
+    if cached is not None:
+      yield cached
+    elif (dependency_capabilities := dependency.capabilities) is None:
+      yield frozenset()
+    else:
+      yield dependency_capabilities.readers_set
+
+
+def _cache_readers(
+    value: Any, value_readers: readers.Readers[Any], closure: list[Any]
+) -> None:
+  if (cache := _readers_cache.get()) is not None:
+    cache.add(value, value_readers, closure)
+
+
 def get_all_readers(
     value: HasDependenciesAndCapabilities,
     visited_objects: frozenset[int] = frozenset(),
@@ -46,39 +191,66 @@ def get_all_readers(
   Returns:
     A tuple containing the set of readers and the set of visited objects.
   """
-  value_capabilities = value.capabilities
-  if value_capabilities is None:
-    return frozenset(), frozenset()
-  value_readers = value_capabilities.readers_set
-  if id(value) in visited_objects:
-    # Catch circular dependencies.
-    return value_readers, visited_objects
-  for dependency in value.get_dependencies()[0]:
-    if dependency == readers.Public():
-      continue
-    new_value_readers, visited_objects = get_all_readers(
-        dependency, visited_objects | {id(value)}
-    )
-    if new_value_readers is not None:
-      value_readers &= new_value_readers
-  return value_readers, visited_objects | {id(value)}
+  closure = []
+  value_readers = readers.Public()
+  for dependency_readers in _iter_readers(value, closure, visited_objects):
+    value_readers &= dependency_readers
+  if not visited_objects:
+    _cache_readers(value, value_readers, closure)
+  return value_readers, visited_objects | {id(v) for v in closure}
 
 
-def is_public(value: HasDependenciesAndCapabilities):
-  value_readers = get_all_readers(value)[0]
-  if isinstance(value_readers, frozenset):
-    return readers.Public() in value_readers
-  else:
-    return value_readers == readers.Public()
+def is_public(value: HasDependenciesAndCapabilities) -> bool:
+  """Returns whether `value` is public, stopping at the first private value."""
+  closure = []
+  value_readers = readers.Public()
+  for dependency_readers in _iter_readers(value, closure):
+    value_readers &= dependency_readers
+    if (
+        isinstance(value_readers, frozenset)
+        and readers.Public() not in value_readers
+    ):
+      return False
+  _cache_readers(value, value_readers, closure)
+  return True
 
 
 def can_readers_read_value(
     potential_readers: set[Any], value: camel_value.Value
 ) -> bool:
-  value_readers, _ = get_all_readers(value)
-  if isinstance(value_readers, readers.Public):
-    return True
-  return potential_readers.issubset(value_readers)
+  """Returns whether all of `potential_readers` can read `value`.
+
+  Stops at the first value in the closure of `value` which some of the
+  `potential_readers` can't read.
+
+  Args:
+    potential_readers: The readers to check.
+    value: The value to check.
+
+  Returns:
+    Whether the value can be read.
+  """
+  closure = []
+  value_readers = readers.Public()
+  for dependency_readers in _iter_readers(value, closure):
+    value_readers &= dependency_readers
+    if isinstance(
+        value_readers, frozenset
+    ) and not potential_readers.issubset(value_readers):
+      return False
+  _cache_readers(value, value_readers, closure)
+  return True
+
+
+def _iter_sources(
+    value: HasDependenciesAndCapabilities,
+    closure: list[Any],
+    visited_objects: frozenset[int] = frozenset(),
+) -> Iterator[frozenset[sources.Source]]:
+  for dependency in _iter_closure(value, visited_objects):
+    closure.append(dependency)
+    if (dependency_capabilities := dependency.capabilities) is not None:
+      yield dependency_capabilities.sources_set
 
 
 def get_all_sources(
@@ -94,19 +266,11 @@ def get_all_sources(
   Returns:
     A tuple containing the set of sources and the set of visited objects.
   """
-  value_capabilities = value.capabilities
-  if value_capabilities is None:
-    return frozenset(), frozenset()
-  value_sources = value_capabilities.sources_set
-  # Catch circular dependencies.
-  if id(value) in visited_objects:
-    return value_sources, visited_objects
-  for dependency in value.get_dependencies()[0]:
-    new_value_sources, visited_objects = get_all_sources(
-        dependency, visited_objects | {id(value)}
-    )
-    value_sources |= new_value_sources
-  return value_sources, visited_objects
+  closure = []
+  value_sources = frozenset()
+  for dependency_sources in _iter_sources(value, closure, visited_objects):
+    value_sources |= dependency_sources
+  return value_sources, visited_objects | {id(v) for v in closure}
 
 
 _TRUSTED_SET = frozenset({
@@ -145,5 +309,6 @@ def is_trusted(
   trusted_set = trusted_set or _TRUSTED_SET
   return all(
       _source_is_trusted(source, trusted_set)
-      for source in get_all_sources(value)[0]
+      for dependency_sources in _iter_sources(value, [])
+      for source in dependency_sources
   )
@@ -0,0 +1,142 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Lightweight records of the tool calls made during an evaluation."""
+
+from collections.abc import Mapping, Sequence
+import itertools
+from typing import Any
+
+from .. import function_types
+from . import camel_value
+
+
+MAX_RECORDED_ELEMENTS = 100
+"""The number of elements of a lazy sequence recorded in a tool call."""
+
+
+def _compact(value: Any) -> Any:
+  """Returns `value`, with a short description instead of a long lazy sequence.
+
+  Lazy sequences (e.g., the output of `range(n)`) are only listed if they have
+  at most `MAX_RECORDED_ELEMENTS` elements, so that recording them takes
+  bounded time and memory.
+
+  Args:
+    value: The value to record.
+
+  Returns:
+    The value to record in the `FunctionCall`.
+  """
+  if not isinstance(value, camel_value.LazySequence):
+    return value
+  if len(value) <= MAX_RECORDED_ELEMENTS:
+    return list(value)
+  if isinstance(value, range):
+    return repr(value)
+  preview = ", ".join(
+      map(repr, itertools.islice(value, MAX_RECORDED_ELEMENTS))
+  )
+  return f"[{preview}, ...] ({len(value)} elements)"
+
+
+class ToolCallRecord:
+  """A tool call made by the interpreter.
+
+  Has the same fields as `function_types.FunctionCall`, without the cost of
+  creating and validating a Pydantic model for each call. The output and the
+  arguments can be `camel_value.LazySequence`s, which are only listed in the
+  `FunctionCall` if they are short, and described otherwise.
+  """
+
+  __slots__ = ("function", "object_type", "args", "output", "is_builtin")
+
+  def __init__(
+      self,
+      function: str,
+      object_type: str | None,
+      args: Mapping[str, Any],
+      output: Any,
+      is_builtin: bool,
+  ):
+    self.function = function
+    self.object_type = object_type
+    self.args = args
+    self.output = output
+    self.is_builtin = is_builtin
+
+  def to_function_call(self) -> function_types.FunctionCall[Any]:
+    # The fields are built by the interpreter, so validation is not needed.
+    return function_types.FunctionCall.model_construct(
+        function=self.function,
+        object_type=self.object_type,
+        args={k: _compact(v) for k, v in self.args.items()},
+        output=_compact(self.output),
+        is_builtin=self.is_builtin,
+    )
+
+
+class _Node:
+  __slots__ = ("record", "parent", "length")
+
+  def __init__(self, record: ToolCallRecord, parent: "_Node | None"):
+    self.record = record
+    self.parent = parent
+    self.length = 1 if parent is None else parent.length + 1
+
+
+class ToolCallsChain:
+  """An immutable chain of tool calls, sharing structure between versions.
+
+  The chain starts from the calls of previous evaluations, and appending a
+  call is O(1) instead of copying the chain.
+  """
+
+  __slots__ = ("_previous_calls", "_head")
+
+  def __init__(
+      self,
+      previous_calls: Sequence[function_types.FunctionCall[Any]] = (),
+      head: _Node | None = None,
+  ):
+    self._previous_calls = previous_calls
+    self._head = head
+
+  def append(self, record: ToolCallRecord) -> "ToolCallsChain":
+    """Returns a new chain ending with `record`."""
+    return ToolCallsChain(self._previous_calls, _Node(record, self._head))
+
+  def extend(self, other: "ToolCallsChain") -> "ToolCallsChain":
+    """Returns a new chain ending with the calls appended to `other`."""
+    head = self._head
+    for record in other.records():
+      head = _Node(record, head)
+    return ToolCallsChain(self._previous_calls, head)
+
+  def records(self) -> list[ToolCallRecord]:
+    """Returns the calls appended to the chain, in order."""
+    records = []
+    node = self._head
+    while node is not None:
+      records.append(node.record)
+      node = node.parent
+    records.reverse()
+    return records
+
+  def to_function_calls(self) -> list[function_types.FunctionCall[Any]]:
+    """Returns all the calls of the chain as Pydantic models."""
+    return [
+        *self._previous_calls,
+        *(record.to_function_call() for record in self.records()),
+    ]
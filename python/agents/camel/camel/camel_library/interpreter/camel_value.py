@@ -15,10 +15,11 @@
 """CaMeL values."""
 
 import ast
-from collections.abc import Callable, Iterable, Iterator, Mapping, MutableMapping, MutableSequence, Sequence
+from collections.abc import Awaitable, Callable, Iterable, Iterator, Mapping, MutableMapping, MutableSequence, Sequence
 import copy
 import dataclasses
 import enum
+import inspect
 import types
 from typing import Any, Generic, Protocol, Self, TypeVar, runtime_checkable
 
@@ -49,10 +50,41 @@ class Namespace:
 _T = TypeVar("_T", bound=Any)
 
 
+class DependencyAccumulator:
+  """Collects the dependencies of nested values, skipping duplicates.
+
+  A single accumulator is threaded through the traversal, so collecting the
+  dependencies of a container is linear in its size rather than quadratic.
+  """
+
+  __slots__ = ("dependencies", "visited_objects", "_dependency_ids")
+
+  def __init__(self, visited_objects: Iterable[int] = ()):
+    self.dependencies: list["Value"] = []
+    self.visited_objects: set[int] = set(visited_objects)
+    self._dependency_ids: set[int] = set()
+
+  def add(self, dependencies: Iterable["Value"]) -> None:
+    """Adds the dependencies that were not added yet."""
+    for dependency in dependencies:
+      if id(dependency) not in self._dependency_ids:
+        self._dependency_ids.add(id(dependency))
+        self.dependencies.append(dependency)
+
+  def visit(self, value: "Value") -> bool:
+    """Marks `value` as visited, and returns whether it was not already."""
+    if id(value) in self.visited_objects:
+      return False
+    self.visited_objects.add(id(value))
+    return True
+
+
 @runtime_checkable
 class Value(Generic[_T], Protocol):
   """A value in CaMeL."""
 
+  __slots__ = ("python_value", "_capabilities", "outer_dependencies")
+
   python_value: _T
   _capabilities: camel_capabilities.Capabilities
   outer_dependencies: tuple["Value", ...]
@@ -76,7 +108,16 @@ class Value(Generic[_T], Protocol):
   def get_dependencies(
       self, visited_objects: frozenset[int] = frozenset()
   ) -> tuple[tuple["Value", ...], frozenset[int]]:
-    return self.outer_dependencies, frozenset({id(self)})
+    accumulator = DependencyAccumulator(visited_objects)
+    self.collect_dependencies(accumulator)
+    return tuple(accumulator.dependencies), frozenset(
+        accumulator.visited_objects
+    )
+
+  def collect_dependencies(self, accumulator: DependencyAccumulator) -> None:
+    """Adds the dependencies of this and of the values it contains."""
+    accumulator.add(self.outer_dependencies)
+    accumulator.visit(self)
 
   @property
   def capabilities(self) -> camel_capabilities.Capabilities:
@@ -189,6 +230,8 @@ _RT = TypeVar("_RT", bound=Value)
 @runtime_checkable
 class SupportsAdd(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def add(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -196,6 +239,8 @@ class SupportsAdd(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsSub(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def sub(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -203,6 +248,8 @@ class SupportsSub(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsMult(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def mult(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -210,6 +257,8 @@ class SupportsMult(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsTrueDiv(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def truediv(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -217,6 +266,8 @@ class SupportsTrueDiv(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsFloorDiv(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def floor_div(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -224,6 +275,8 @@ class SupportsFloorDiv(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsMod(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def mod(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -231,6 +284,8 @@ class SupportsMod(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsPow(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def pow(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -238,6 +293,8 @@ class SupportsPow(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsLShift(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def l_shift(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -245,6 +302,8 @@ class SupportsLShift(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsRShift(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def r_shift(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -252,6 +311,8 @@ class SupportsRShift(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsBitOr(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def bit_or(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -259,6 +320,8 @@ class SupportsBitOr(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsBitXor(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def bit_xor(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -266,6 +329,8 @@ class SupportsBitXor(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsBitAnd(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def bit_and(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -273,6 +338,8 @@ class SupportsBitAnd(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsRAdd(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def r_add(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -280,6 +347,8 @@ class SupportsRAdd(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsRSub(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def r_sub(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -287,6 +356,8 @@ class SupportsRSub(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsRMult(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def r_mult(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -294,6 +365,8 @@ class SupportsRMult(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsRTrueDiv(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def r_truediv(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -301,6 +374,8 @@ class SupportsRTrueDiv(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsRFloorDiv(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def r_floor_div(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -308,6 +383,8 @@ class SupportsRFloorDiv(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsRMod(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def r_mod(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -315,6 +392,8 @@ class SupportsRMod(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsRPow(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def r_pow(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -322,6 +401,8 @@ class SupportsRPow(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsRLShift(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def r_l_shift(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -329,6 +410,8 @@ class SupportsRLShift(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsRRShift(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def r_r_shift(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -336,6 +419,8 @@ class SupportsRRShift(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsRBitOr(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def r_bit_or(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -343,6 +428,8 @@ class SupportsRBitOr(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsRBitXor(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def r_bit_xor(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -350,6 +437,8 @@ class SupportsRBitXor(Generic[_RT], Protocol):
 @runtime_checkable
 class SupportsRBitAnd(Generic[_RT], Protocol):
 
+  __slots__ = ()
+
   def r_bit_and(self, other: Value) -> _RT | types.NotImplementedType:
     ...
 
@@ -363,6 +452,8 @@ def is_value(obj: Any) -> bool:
 
 class PythonComparable(Protocol):
 
+  __slots__ = ()
+
   def __lt__(self, other: Self, /) -> bool:
     ...
 
@@ -375,6 +466,8 @@ _CT = TypeVar("_CT", bound=PythonComparable)
 
 class TotallyOrdered(Value[_CT]):
 
+  __slots__ = ()
+
   def cmp(self, y: Self) -> "CaMeLInt":
     if self.raw > y.raw:
       return CaMeLInt(1, camel_capabilities.Capabilities.camel(), (self, y))
@@ -386,6 +479,8 @@ class TotallyOrdered(Value[_CT]):
 @runtime_checkable
 class HasAttrs(Generic[_T], Value[_T], Protocol):
 
+  __slots__ = ()
+
   def attr(self, name: str) -> Value | None:
     ...
 
@@ -458,6 +553,7 @@ class CaMeLCallable(Generic[_T], Value[Callable[..., _T]], Protocol):
       args: "CaMeLTuple",
       kwargs: "CaMeLDict[CaMeLStr, Value]",
       namespace: Namespace,
+      run_awaitable: Callable[[Awaitable[Any]], Any] | None = None,
   ) -> tuple[Value[_T], dict[str, Any]]:
     """Calls the callable value with the given arguments.
 
@@ -466,6 +562,8 @@ class CaMeLCallable(Generic[_T], Value[Callable[..., _T]], Protocol):
         kwargs: The keyword arguments to pass to the callable.
         namespace: The current namespace. Needed to convert the output Python
           values to CaMeL values.
+        run_awaitable: Function that runs an awaitable to completion and returns
+          its result. Needed if the callable is a coroutine function.
 
     Returns:
         A tuple containing the wrapped output of the callable and a dictionary
@@ -477,6 +575,10 @@ class CaMeLCallable(Generic[_T], Value[Callable[..., _T]], Protocol):
     raw_args = args.raw
     raw_kwargs = kwargs.raw
     output = self.python_value(*raw_args, **raw_kwargs)
+    if inspect.isawaitable(output):
+      if run_awaitable is None:
+        raise TypeError(f"{self._name} is a coroutine function")
+      output = run_awaitable(output)
     if args.raw != raw_args or kwargs.raw != raw_kwargs:
       raise FunctionCallWithSideEffectError(
           "Call to a function or method with side-effects detected. "
@@ -507,7 +609,11 @@ class CaMeLCallable(Generic[_T], Value[Callable[..., _T]], Protocol):
       self, args: "CaMeLTuple", kwargs: "CaMeLDict[CaMeLStr, Value]"
   ) -> dict[str, Any]:
     args_by_keyword = self.make_args_by_keyword_preserve_values(args, kwargs)
-    return {k: v.raw for k, v in args_by_keyword.items()}
+    # Lazy lists (e.g., `range(n)`) are recorded without materializing them.
+    return {
+        k: v.lazy_raw if isinstance(v, CaMeLLazyList) else v.raw
+        for k, v in args_by_keyword.items()
+    }
 
 
 _IT = TypeVar("_IT", bound=Iterable)
@@ -516,18 +622,14 @@ _IT = TypeVar("_IT", bound=Iterable)
 class CaMeLIterable(Generic[_IT, _V], Value[_IT]):
   """Represents an iterable value in CaMeL."""
 
-  def get_dependencies(
-      self, visited_objects: frozenset[int] = frozenset()
-  ) -> tuple[tuple["Value", ...], frozenset[int]]:
-    dependencies = self.outer_dependencies
-    if id(self) in visited_objects:
-      return dependencies, visited_objects
+  __slots__ = ()
+
+  def collect_dependencies(self, accumulator: DependencyAccumulator) -> None:
+    accumulator.add(self.outer_dependencies)
+    if not accumulator.visit(self):
+      return
     for el in self.python_value:
-      (new_dependencies, visited_objects) = el.get_dependencies(
-          visited_objects | {id(self)}
-      )
-      dependencies += new_dependencies
-    return dependencies, visited_objects | {id(self)}
+      el.collect_dependencies(accumulator)
 
   def iterate(self) -> "CaMeLIterator[_V]":
     return CaMeLIterator(
@@ -537,7 +639,9 @@ class CaMeLIterable(Generic[_IT, _V], Value[_IT]):
     )
 
   def eq(self, value: "Value") -> "CaMeLBool":
-    if not isinstance(value, type(self)):
+    if not isinstance(value, type(self)) or len(self.python_value) != len(
+        value.python_value
+    ):
       return CaMeLFalse(camel_capabilities.Capabilities.camel(), (self, value))
     for self_c, value_c in zip(self.python_value, value.python_value):
       if not self_c.eq(value_c).raw:
@@ -571,6 +675,8 @@ _ST = TypeVar("_ST", bound=Sequence[Value])
 class CaMeLSequence(Generic[_ST, _V], CaMeLIterable[_ST, _V]):
   """Represents a sequence value in CaMeL."""
 
+  __slots__ = ()
+
   python_value: _ST
 
   def index(self, index: "CaMeLInt") -> _V:
@@ -602,6 +708,8 @@ _MCT = TypeVar("_MCT", bound=MutableSequence[Value])
 class CaMeLMutableSequence(Generic[_MCT, _V], CaMeLSequence[_MCT, _V]):
   """Represents a mutable sequence value in CaMeL."""
 
+  __slots__ = ()
+
   def set_index(self, index: "CaMeLInt", value: _V) -> "CaMeLNone":
     self.python_value[index.raw] = value
     return CaMeLNone(camel_capabilities.Capabilities.camel(), (self, index))
@@ -610,6 +718,8 @@ class CaMeLMutableSequence(Generic[_MCT, _V], CaMeLSequence[_MCT, _V]):
 class CaMeLIterator(Generic[_V], Value[Iterator[_V]]):
   """Represents an iterator value in CaMeL."""
 
+  __slots__ = ()
+
   def freeze(self) -> "CaMeLNone":
     return CaMeLNone(
         camel_capabilities.Capabilities.camel(), (self,)
@@ -637,19 +747,15 @@ _VV = TypeVar("_VV", bound=Value)
 class CaMeLMapping(Generic[_MT, _KV, _VV], Value[_MT]):
   """Represents a mapping value in CaMeL."""
 
-  def get_dependencies(
-      self, visited_objects: frozenset[int] = frozenset()
-  ) -> tuple[tuple["Value", ...], frozenset[int]]:
-    dependencies = self.outer_dependencies
-    if id(self) in visited_objects:
-      return dependencies, visited_objects
-    visited_objects |= {id(self)}
+  __slots__ = ()
+
+  def collect_dependencies(self, accumulator: DependencyAccumulator) -> None:
+    accumulator.add(self.outer_dependencies)
+    if not accumulator.visit(self):
+      return
     for k, v in self.python_value.items():
-      k_dependencies, k_visited_objects = k.get_dependencies(visited_objects)
-      v_dependencies, v_visited_objects = v.get_dependencies(k_visited_objects)
-      dependencies += k_dependencies + v_dependencies
-      visited_objects = v_visited_objects
-    return dependencies, visited_objects
+      k.collect_dependencies(accumulator)
+      v.collect_dependencies(accumulator)
 
   def get(self, key: _KV) -> _VV:
     dict_key = next((el for el in self.iterate_python() if el.eq(key)), None)
@@ -658,7 +764,9 @@ class CaMeLMapping(Generic[_MT, _KV, _VV], Value[_MT]):
     return self.python_value[dict_key].new_with_dependencies((self, key))
 
   def eq(self, value: "Value") -> "CaMeLBool":
-    if not isinstance(value, type(self)):
+    if not isinstance(value, type(self)) or len(self.python_value) != len(
+        value.python_value
+    ):
       return CaMeLFalse(camel_capabilities.Capabilities.camel(), (self, value))
     for (self_k, self_v), (value_k, value_v) in zip(
         self.python_value.items(), value.python_value.items()
@@ -726,6 +834,8 @@ class CaMeLMutableMapping(
 ):
   """Represents a mutable mapping value in CaMeL."""
 
+  __slots__ = ()
+
   python_value: _MMT
 
   def set_key(self, key: _KV, value: _VV) -> "CaMeLNone":
@@ -756,13 +866,18 @@ class CaMeLMutableMapping(
 class CaMeLNone(Value[None]):
   """Represents the None value in CaMeL."""
 
-  python_value = None
+  __slots__ = ()
+
+  python_value: None
 
   def __init__(
       self,
       capabilities: camel_capabilities.Capabilities,
       dependencies: tuple["Value", ...],
   ) -> None:
+    # Set on the instance rather than the class, where it would shadow the
+    # slot and break copying.
+    self.python_value = None
     self._capabilities = capabilities
     self.outer_dependencies = dependencies
 
@@ -773,7 +888,10 @@ class CaMeLNone(Value[None]):
 class _Bool(TotallyOrdered[bool]):
   """Base class for CaMeL boolean values."""
 
+  __slots__ = ()
+
   python_value: bool
+  _value: bool
 
   def __bool__(self):
     return self.python_value
@@ -783,6 +901,9 @@ class _Bool(TotallyOrdered[bool]):
       capabilities: camel_capabilities.Capabilities,
       dependencies: tuple[Value, ...],
   ) -> None:
+    # Set on the instance rather than the class, where it would shadow the
+    # slot and break copying.
+    self.python_value = self._value
     self._capabilities = capabilities
     self.outer_dependencies = dependencies
 
@@ -791,11 +912,13 @@ class _Bool(TotallyOrdered[bool]):
 
 
 class CaMeLTrue(_Bool):  # noqa: N801
-  python_value = True
+  __slots__ = ()
+  _value = True
 
 
 class CaMeLFalse(_Bool):  # noqa: N801
-  python_value = False
+  __slots__ = ()
+  _value = False
 
 
 CaMeLBool = CaMeLTrue | CaMeLFalse
@@ -804,6 +927,8 @@ CaMeLBool = CaMeLTrue | CaMeLFalse
 @runtime_checkable
 class HasUnary(Protocol):
 
+  __slots__ = ()
+
   def unary(self, op: ast.unaryop) -> Self | types.NotImplementedType:
     ...
 
@@ -828,6 +953,8 @@ class CaMeLFloat(
 ):
   """Represents a floating point number in CaMeL."""
 
+  __slots__ = ()
+
   def __init__(
       self,
       val: float,
@@ -1000,6 +1127,8 @@ class CaMeLInt(
 ):
   """Represents an integer value in CaMeL."""
 
+  __slots__ = ()
+
   def __init__(
       self,
       val: int,
@@ -1137,6 +1266,8 @@ class CaMeLInt(
 class _Char(TotallyOrdered[str]):
   """Represents a single character in CaMeL."""
 
+  __slots__ = ()
+
   def __init__(
       self,
       val: str,
@@ -1173,6 +1304,8 @@ class CaMeLStr(
 ):
   """Represents a string in CaMeL."""
 
+  __slots__ = ()
+
   def __init__(
       self,
       string: Sequence[_Char],
@@ -1183,6 +1316,18 @@ class CaMeLStr(
     self._capabilities = capabilities
     self.outer_dependencies = dependencies
 
+  def collect_dependencies(self, accumulator: DependencyAccumulator) -> None:
+    accumulator.add(self.outer_dependencies)
+    if not accumulator.visit(self):
+      return
+    # Characters contain no values, and those of a string created at once
+    # share their dependencies, so runs of them are added once.
+    previous_dependencies = None
+    for char in self.python_value:
+      if char.outer_dependencies is not previous_dependencies:
+        previous_dependencies = char.outer_dependencies
+        accumulator.add(previous_dependencies)
+
   def contains(self, other: Value) -> "CaMeLBool":
     if not isinstance(other, CaMeLStr | _Char):
       raise TypeError(
@@ -1281,6 +1426,8 @@ class CaMeLTuple(
 ):
   """Represents a tuple in CaMeL."""
 
+  __slots__ = ()
+
   def __init__(
       self,
       it: Iterable[_V],
@@ -1330,6 +1477,8 @@ class CaMeLList(
 ):
   """Represents a list in CaMeL."""
 
+  __slots__ = ("_frozen",)
+
   def __init__(
       self,
       it: Iterable[_V],
@@ -1383,6 +1532,155 @@ class CaMeLList(
   r_mult = mult
 
 
+class LazySequence(Sequence[Any]):
+  """A read-only sequence whose elements are computed when accessed.
+
+  Built-ins return them instead of lists to avoid materializing their output
+  (e.g., `range`). They are converted to `CaMeLLazyList`s.
+  """
+
+  __slots__ = ()
+
+
+LazySequence.register(range)
+
+
+class CaMeLLazyList(Generic[_V], CaMeLList[_V]):
+  """A list whose elements are converted to CaMeL values on demand.
+
+  Iterating over it, indexing it and taking its length do not materialize the
+  list, so, e.g., `for i in range(n)` takes constant memory. Any other operation
+  materializes it, after which it behaves as a `CaMeLList`.
+
+  The elements are converted like the elements of a list returned by a
+  function, i.e., without dependencies and with the capabilities of CaMeL, so
+  the dependencies of the list are only its outer dependencies until it is
+  materialized.
+  """
+
+  __slots__ = ("_raw_elements", "_namespace", "_elements")
+
+  def __init__(
+      self,
+      raw_elements: LazySequence,
+      capabilities: camel_capabilities.Capabilities,
+      namespace: Namespace,
+      dependencies: tuple[Value, ...],
+  ) -> None:
+    self._raw_elements = raw_elements
+    self._namespace = namespace
+    self._elements: list[_V] | None = None
+    self._frozen = False
+    self._capabilities = capabilities
+    self.outer_dependencies = dependencies
+
+  @property
+  def python_value(self) -> list[_V]:  # type: ignore[override]
+    if self._elements is None:
+      self._elements = [self._convert(el) for el in self._raw_elements]
+    return self._elements
+
+  @python_value.setter
+  def python_value(self, value: list[_V]) -> None:
+    self._elements = value
+
+  @property
+  def lazy_raw(self) -> LazySequence | list[Any]:
+    """The raw elements, without materializing them if possible."""
+    if self._elements is None:
+      return self._raw_elements
+    return self.raw
+
+  def __copy__(self) -> Self:
+    new_self = type(self).__new__(type(self))
+    new_self._raw_elements = self._raw_elements
+    new_self._namespace = self._namespace
+    new_self._elements = self._elements
+    new_self._frozen = self._frozen
+    new_self._capabilities = self._capabilities
+    new_self.outer_dependencies = self.outer_dependencies
+    return new_self
+
+  def _length(self) -> int:
+    if self._elements is None:
+      return len(self._raw_elements)
+    return len(self._elements)
+
+  def _convert(self, raw_element: Any) -> _V:
+    return value_from_raw(
+        raw_element,
+        camel_capabilities.Capabilities.camel(),
+        self._namespace,
+        (),
+    )
+
+  @property
+  def raw_type(self) -> str:
+    return "list"
+
+  @property
+  def raw(self) -> list[Any]:
+    if self._elements is None and isinstance(self._raw_elements, range):
+      return list(self._raw_elements)
+    if self._elements is None:
+      return [self._convert(el).raw for el in self._raw_elements]
+    return super().raw
+
+  def collect_dependencies(self, accumulator: DependencyAccumulator) -> None:
+    if self._elements is not None:
+      super().collect_dependencies(accumulator)
+      return
+    # The elements are created without dependencies.
+    accumulator.add(self.outer_dependencies)
+    accumulator.visit(self)
+
+  def iterate_python(self) -> Iterator[_V]:
+    if self._elements is not None:
+      return iter(self._elements)
+    return map(self._convert, self._raw_elements)
+
+  def iterate(self) -> "CaMeLIterator[_V]":
+    return CaMeLIterator(
+        self.iterate_python(),
+        camel_capabilities.Capabilities.camel(),
+        (self,),
+    )
+
+  def eq(self, value: "Value") -> "CaMeLBool":
+    # Also equal to a `CaMeLList` with the same elements.
+    if not isinstance(value, CaMeLList):
+      return CaMeLFalse(camel_capabilities.Capabilities.camel(), (self, value))
+    value_length = (
+        value._length()  # pylint: disable=protected-access
+        if isinstance(value, CaMeLLazyList)
+        else len(value.python_value)
+    )
+    if self._length() != value_length:
+      return CaMeLFalse(camel_capabilities.Capabilities.camel(), (self, value))
+    for self_c, value_c in zip(self.iterate_python(), value.iterate_python()):
+      if not self_c.eq(value_c).raw:
+        return CaMeLFalse(
+            camel_capabilities.Capabilities.camel(), (self, value)
+        )
+    return CaMeLTrue(camel_capabilities.Capabilities.camel(), (self, value))
+
+  def index(self, index: "CaMeLInt") -> _V:
+    if self._elements is not None:
+      return super().index(index)
+    return self._convert(self._raw_elements[index.raw]).new_with_dependencies(
+        (self, index)
+    )
+
+  def len(self) -> "CaMeLInt":
+    if self._elements is not None:
+      return super().len()
+    return CaMeLInt(
+        len(self._raw_elements),
+        camel_capabilities.Capabilities.camel(),
+        (self,),
+    )
+
+
 class CaMeLSet(
     Generic[_V],
     TotallyOrdered[set[_V]],
@@ -1393,6 +1691,8 @@ class CaMeLSet(
 ):
   """Represents a set in CaMeL."""
 
+  __slots__ = ("_frozen",)
+
   def __init__(
       self,
       it: Iterable[_V],
@@ -1400,6 +1700,7 @@ class CaMeLSet(
       dependencies: tuple[Value, ...],
   ) -> None:
     self.python_value = set(it)
+    self._frozen = False
     self._capabilities = capabilities
     self.outer_dependencies = dependencies
 
@@ -1459,6 +1760,8 @@ class CaMeLDict(
 ):
   """Represents a dictionary in CaMeL."""
 
+  __slots__ = ("_frozen",)
+
   def __init__(
       self,
       it: Mapping[_KV, _VV],
@@ -1534,6 +1837,7 @@ class CaMeLClass(Generic[_T], CaMeLCallable[_T], HasAttrs):
       base_classes: tuple["CaMeLClass", ...] = (),
       is_totally_ordered: bool = False,
       is_builtin: bool = False,
+      definition: str | None = None,
   ):
     self.python_value = py_callable  # type: ignore
     self._capabilities = capabilities
@@ -1547,22 +1851,19 @@ class CaMeLClass(Generic[_T], CaMeLCallable[_T], HasAttrs):
     self._is_totally_ordered = is_totally_ordered
     self.outer_dependencies = dependencies
     self.is_builtin = is_builtin
+    # The source code of classes defined in CaMeL code, used to re-create them
+    # when restoring a namespace snapshot.
+    self.definition = definition
 
   def __hash__(self) -> int:
     return super().__hash__()
 
-  def get_dependencies(
-      self, visited_objects: frozenset[int] = frozenset()
-  ) -> tuple[tuple["Value", ...], frozenset[int]]:
-    dependencies = self.outer_dependencies
-    if id(self) in visited_objects:
-      return dependencies, visited_objects
+  def collect_dependencies(self, accumulator: DependencyAccumulator) -> None:
+    accumulator.add(self.outer_dependencies)
+    if not accumulator.visit(self):
+      return
     for method in self.methods.values():
-      new_dependencies, visited_objects = method.get_dependencies(
-          visited_objects | {id(self)}
-      )
-      dependencies += new_dependencies
-    return dependencies, visited_objects
+      method.collect_dependencies(accumulator)
 
   def init(
       self,
@@ -1592,7 +1893,9 @@ class CaMeLClass(Generic[_T], CaMeLCallable[_T], HasAttrs):
       args: CaMeLTuple,
       kwargs: CaMeLDict[CaMeLStr, Value],
       namespace: Namespace,
+      run_awaitable: Callable[[Awaitable[Any]], Any] | None = None,
   ) -> tuple["CaMeLClassInstance[_T]", dict[str, Any]]:
+    del run_awaitable  # Unused: class constructors are never coroutines.
     return self.init(
         namespace, *args.raw, **kwargs.raw
     ), self._make_args_by_keyword(args, kwargs)
@@ -1660,20 +1963,14 @@ class CaMeLClassInstance(Generic[_T], HasSetField[_T]):
   def __hash__(self) -> int:
     return super().__hash__()
 
-  def get_dependencies(
-      self, visited_objects: frozenset[int] = frozenset()
-  ) -> tuple[tuple["Value", ...], frozenset[int]]:
-    dependencies = self.outer_dependencies
-    if id(self) in visited_objects:
-      return dependencies, visited_objects
+  def collect_dependencies(self, accumulator: DependencyAccumulator) -> None:
+    accumulator.add(self.outer_dependencies)
+    if not accumulator.visit(self):
+      return
     for attr_name in self.attr_names():
       attr = self.attr(attr_name)
       if attr is not None and attr_name not in self._camel_class.methods:
-        new_dependencies, visited_objects = attr.get_dependencies(
-            visited_objects | {id(self)}
-        )
-        dependencies += new_dependencies
-    return dependencies, visited_objects
+        attr.collect_dependencies(accumulator)
 
   def _cmp(self, y: Self) -> "CaMeLInt":
     if self.raw > y.raw:  # type: ignore  # this is hardcoded
@@ -1719,7 +2016,8 @@ class CaMeLClassInstance(Generic[_T], HasSetField[_T]):
     if name not in self.attr_names():
       return None
     if name in self._camel_class.methods:
-      return self._camel_class.methods[name]
+      # Return a copy, as the method gets bound to this instance by the caller.
+      return copy.copy(self._camel_class.methods[name])
     attr = getattr(self.python_value, name)
     if not isinstance(attr, Value):
       return value_from_raw(
@@ -1762,10 +2060,9 @@ class ValueAsWrapper(Generic[_T], CaMeLClassInstance[_T]):
   def raw(self) -> _T:
     return self.python_value
 
-  def get_dependencies(
-      self, visited_objects: frozenset[int] = frozenset()
-  ) -> tuple[tuple["Value", ...], frozenset[int]]:
-    return self.outer_dependencies, visited_objects | {id(self)}
+  def collect_dependencies(self, accumulator: DependencyAccumulator) -> None:
+    accumulator.add(self.outer_dependencies)
+    accumulator.visit(self)
 
   def attr(self, name: str) -> Value | None:
     if name not in self.attr_names():
@@ -1813,6 +2110,69 @@ class CaMeLFunction(Generic[_T], CaMeLCallable[_T]):
     }
 
 
+class CaMeLMappedFunction(Generic[_T], CaMeLFunction[list[_T]]):
+  """Represents a function in CaMeL which maps one argument element-wise.
+
+  The i-th element of the output list only depends on the i-th element of the
+  mapped argument (and on the other arguments), as if the function was called
+  on each element in a list comprehension.
+  """
+
+  def __init__(
+      self,
+      name: str,
+      py_callable: Callable[..., list[_T]],
+      capabilities: camel_capabilities.Capabilities,
+      dependencies: tuple[Value, ...],
+      mapped_argument: str,
+  ):
+    super().__init__(name, py_callable, capabilities, dependencies)
+    self._mapped_argument = mapped_argument
+
+  def wrap_output(
+      self,
+      value: list[_T],
+      args: "CaMeLTuple",
+      kwargs: "CaMeLDict[CaMeLStr, Value]",
+      namespace: Namespace,
+  ) -> "CaMeLList[Value[_T]]":
+    arguments = (
+        inspect.signature(self.python_value)
+        .bind(
+            *args.python_value,
+            **{k.raw: v for k, v in kwargs.python_value.items()},
+        )
+        .arguments
+    )
+    mapped = arguments[self._mapped_argument]
+    other_arguments = tuple(
+        v for k, v in arguments.items() if k != self._mapped_argument
+    )
+    output_capabilities = camel_capabilities.Capabilities(
+        frozenset({sources.Tool(self._name)}),
+        readers.Public(),
+    )
+    mapped_elements = list(mapped.iterate_python())
+    if len(value) != len(mapped_elements):
+      # Raised as a tool error, as the outputs cannot be matched to elements.
+      raise ValueError(
+          f"{self._name} returned {len(value)} outputs for"
+          f" {len(mapped_elements)} elements of `{self._mapped_argument}`"
+      )
+    elements = [
+        value_from_raw(
+            element_output,
+            output_capabilities,
+            namespace,
+            (self, element, *other_arguments),
+        )
+        for element_output, element in zip(
+            value, mapped_elements, strict=True
+        )
+    ]
+    return CaMeLList(elements, output_capabilities, (self, args, kwargs))
+
+
 class UndefinedClassError(Exception):
   ...
 
@@ -1884,6 +2244,8 @@ def value_from_raw(
           capabilities,
           dependencies,
       )
+    case LazySequence():
+      return CaMeLLazyList(raw_value, capabilities, namespace, dependencies)
     case type():
       return CaMeLClass(
           raw_value.__name__, raw_value, capabilities, dependencies, {}
@@ -0,0 +1,99 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Persistent stack of the dependencies of the control flow."""
+
+from collections.abc import Iterable, Iterator
+from typing import Generic, TypeVar
+
+_T = TypeVar("_T")
+
+
+class _Node(Generic[_T]):
+  __slots__ = ("value", "parent", "length")
+
+  def __init__(self, value: _T, parent: "_Node[_T] | None"):
+    self.value = value
+    self.parent = parent
+    self.length = 1 if parent is None else parent.length + 1
+
+
+class DependencyStack(Generic[_T]):
+  """An immutable stack of dependencies, sharing structure between versions.
+
+  The interpreter pushes the test of an `if` or the iterable of a `for` before
+  evaluating the body, and removes it afterwards. Both operations are O(1) when
+  the body does not add dependencies, instead of copying the whole collection.
+  Iteration yields the dependencies in the order they were pushed.
+  """
+
+  __slots__ = ("_head",)
+
+  def __init__(self, head: _Node[_T] | None = None):
+    self._head = head
+
+  @classmethod
+  def of(cls, dependencies: Iterable[_T]) -> "DependencyStack[_T]":
+    """Returns `dependencies` as a stack, without copying if already one."""
+    if isinstance(dependencies, DependencyStack):
+      return dependencies
+    return cls().extend(dependencies)
+
+  def push(self, value: _T) -> "DependencyStack[_T]":
+    """Returns a new stack with `value` on top."""
+    return DependencyStack(_Node(value, self._head))
+
+  def extend(self, values: Iterable[_T]) -> "DependencyStack[_T]":
+    """Returns a new stack with `values` pushed in order."""
+    head = self._head
+    for value in values:
+      head = _Node(value, head)
+    return DependencyStack(head)
+
+  def remove(self, value: _T) -> "DependencyStack[_T]":
+    """Returns a new stack without the most recently pushed `value`.
+
+    Only the dependencies pushed after `value` are copied.
+
+    Args:
+      value: The value to remove, compared by identity.
+
+    Returns:
+      The new stack.
+
+    Raises:
+      ValueError: If `value` is not in the stack.
+    """
+    above: list[_T] = []
+    node = self._head
+    while node is not None and node.value is not value:
+      above.append(node.value)
+      node = node.parent
+    if node is None:
+      raise ValueError(f"{value!r} is not in the dependencies")
+    return DependencyStack(node.parent).extend(reversed(above))
+
+  def __iter__(self) -> Iterator[_T]:
+    values = []
+    node = self._head
+    while node is not None:
+      values.append(node.value)
+      node = node.parent
+    return reversed(values)
+
+  def __len__(self) -> int:
+    return 0 if self._head is None else self._head.length
+
+  def __repr__(self) -> str:
+    return f"DependencyStack({list(self)!r})"
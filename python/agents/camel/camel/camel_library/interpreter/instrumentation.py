@@ -0,0 +1,188 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Execution budgets and profiling for the CaMeL interpreter."""
+
+import ast
+import collections
+import dataclasses
+import threading
+import time
+import tracemalloc
+
+
+@dataclasses.dataclass(frozen=True)
+class ExecutionBudget:
+  """Limits on the resources used to interpret a piece of code.
+
+  Exceeding any of them stops the evaluation with an
+  `ExecutionBudgetExceededError`.
+  """
+
+  max_steps: int | None = None
+  """The maximum number of AST nodes evaluated."""
+  max_seconds: float | None = None
+  """The maximum wall time, including tool calls."""
+  max_allocated_bytes: int | None = None
+  """The maximum memory allocated on top of what was allocated at the start.
+
+  Measured with `tracemalloc`, which is started for the evaluation if needed.
+  Tracing is process-wide: the memory allocated by other threads (e.g., by
+  concurrent evaluations) during the evaluation is counted too. Note that
+  tracing slows down the evaluation considerably.
+  """
+
+
+class ExecutionBudgetExceededError(Exception):
+  """Raised when an evaluation exceeds its execution budget."""
+
+
+@dataclasses.dataclass
+class ExecutionStats:
+  """Statistics about an evaluation."""
+
+  steps: int = 0
+  """The number of AST nodes evaluated."""
+  seconds: float = 0.0
+  """The wall time of the evaluation."""
+  node_counts: collections.Counter[str] = dataclasses.field(
+      default_factory=collections.Counter
+  )
+  """The number of evaluations per AST node type."""
+  node_seconds: collections.Counter[str] = dataclasses.field(
+      default_factory=collections.Counter
+  )
+  """The wall time per AST node type, including the time of nested nodes."""
+  tool_call_counts: collections.Counter[str] = dataclasses.field(
+      default_factory=collections.Counter
+  )
+  """The number of calls per function."""
+  tool_call_seconds: collections.Counter[str] = dataclasses.field(
+      default_factory=collections.Counter
+  )
+  """The wall time per function."""
+  peak_allocated_bytes: int | None = None
+  """The peak memory allocated on top of what was allocated at the start, if
+  measured."""
+
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_started = False
+
+
+def _acquire_tracemalloc() -> None:
+  """Starts tracing memory allocations for one more user, if needed."""
+  global _tracemalloc_users, _tracemalloc_started
+  with _tracemalloc_lock:
+    if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+      tracemalloc.start()
+      _tracemalloc_started = True
+    _tracemalloc_users += 1
+
+
+def _release_tracemalloc() -> None:
+  """Stops tracing once no user needs it, if tracing was started here."""
+  global _tracemalloc_users, _tracemalloc_started
+  with _tracemalloc_lock:
+    _tracemalloc_users -= 1
+    if _tracemalloc_users == 0 and _tracemalloc_started:
+      tracemalloc.stop()
+      _tracemalloc_started = False
+
+
+class Profiler:
+  """Collects the statistics and enforces the budget of one evaluation.
+
+  The same profiler can be used by the threads evaluating comprehensions
+  concurrently.
+  """
+
+  def __init__(self, budget: ExecutionBudget | None = None):
+    self._budget = budget or ExecutionBudget()
+    self._stats = ExecutionStats()
+    self._lock = threading.Lock()
+    self._start_time = 0.0
+    self._deadline: float | None = None
+    self._traces_memory = False
+    self._baseline_allocated_bytes = 0
+
+  def start(self) -> None:
+    """Starts measuring the evaluation."""
+    self._start_time = time.perf_counter()
+    if self._budget.max_seconds is not None:
+      self._deadline = self._start_time + self._budget.max_seconds
+    if self._budget.max_allocated_bytes is not None:
+      # Tracing is shared with the other evaluations, so the global peak is
+      # not used: the peak of this evaluation is sampled relative to its start.
+      _acquire_tracemalloc()
+      self._traces_memory = True
+      self._baseline_allocated_bytes = tracemalloc.get_traced_memory()[0]
+      self._stats.peak_allocated_bytes = 0
+
+  def stop(self) -> ExecutionStats:
+    """Stops measuring the evaluation and returns its statistics."""
+    self._stats.seconds = time.perf_counter() - self._start_time
+    if self._traces_memory:
+      self._traces_memory = False
+      _release_tracemalloc()
+    return self._stats
+
+  def enter_node(self, node: ast.AST) -> None:
+    """Records the evaluation of `node`.
+
+    Args:
+      node: The node about to be evaluated.
+
+    Raises:
+      ExecutionBudgetExceededError: If the budget is exceeded.
+    """
+    budget = self._budget
+    with self._lock:
+      self._stats.steps += 1
+      self._stats.node_counts[type(node).__name__] += 1
+      steps = self._stats.steps
+    if budget.max_steps is not None and steps > budget.max_steps:
+      raise ExecutionBudgetExceededError(
+          f"Exceeded the budget of {budget.max_steps} evaluation steps."
+      )
+    if self._deadline is not None and time.perf_counter() > self._deadline:
+      raise ExecutionBudgetExceededError(
+          f"Exceeded the budget of {budget.max_seconds} seconds."
+      )
+    if budget.max_allocated_bytes is not None:
+      allocated_bytes = max(
+          tracemalloc.get_traced_memory()[0] - self._baseline_allocated_bytes,
+          0,
+      )
+      with self._lock:
+        self._stats.peak_allocated_bytes = max(
+            self._stats.peak_allocated_bytes or 0, allocated_bytes
+        )
+      if allocated_bytes > budget.max_allocated_bytes:
+        raise ExecutionBudgetExceededError(
+            f"Exceeded the budget of {budget.max_allocated_bytes} allocated"
+            " bytes."
+        )
+
+  def exit_node(self, node: ast.AST, seconds: float) -> None:
+    """Records that `node` took `seconds` to evaluate."""
+    with self._lock:
+      self._stats.node_seconds[type(node).__name__] += seconds
+
+  def record_tool_call(self, function_name: str, seconds: float) -> None:
+    """Records a call to `function_name` which took `seconds`."""
+    with self._lock:
+      self._stats.tool_call_counts[function_name] += 1
+      self._stats.tool_call_seconds[function_name] += seconds
@@ -21,10 +21,14 @@ calls would create circular imports.
 """
 
 import ast
-from collections.abc import Callable, Iterable, Mapping, Sequence
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable, Mapping, Sequence
+import concurrent.futures
 import dataclasses
 import enum
+import functools
 import re
+import time
 from typing import Any, Generic, NamedTuple, TypeAlias, TypeVar
 
 import pydantic
@@ -36,7 +40,10 @@ from .. import security_policy
 from ..capabilities import capabilities as camel_capabilities
 from ..capabilities import readers
 from ..capabilities import sources
+from . import call_chain
 from . import camel_value
+from . import dependency_stack
+from . import instrumentation
 from . import library
 
 
@@ -109,7 +116,11 @@ class EvalResult(NamedTuple):
 
   result: CaMeLResult
   namespace: camel_value.Namespace
-  tool_calls_chain: Sequence[function_types.FunctionCall[Any]]
+  # A `ToolCallsChain` while evaluating, converted to `FunctionCall`s by
+  # `parse_and_interpret_code`.
+  tool_calls_chain: (
+      call_chain.ToolCallsChain | Sequence[function_types.FunctionCall[Any]]
+  )
   dependencies: Iterable[camel_value.Value[Any]]
 
 
@@ -129,6 +140,16 @@ class DependenciesPropagationMode(str, enum.Enum):
     return self.value
 
 
+QUERY_AI_ASSISTANT_FUNCTIONS = frozenset({
+    "query_ai_assistant",
+    "query_ai_assistant_batch",
+})
+"""Names of the functions querying the Q-LLM.
+
+In `STRICT` mode, their arguments are added to the dependencies of what follows.
+"""
+
+
 @dataclasses.dataclass(frozen=True)
 class EvalArgs:
   """Evaluation arguments that remain fixed throughout execution."""
@@ -137,12 +158,60 @@ class EvalArgs:
   """The list of security policies to apply."""
   eval_mode: DependenciesPropagationMode
   """The evaluation mode, either `STRICT` or `NORMAL`."""
+  max_concurrency: int = 1
+  """The maximum number of comprehension iterations evaluated concurrently."""
+  event_loop: asyncio.AbstractEventLoop | None = None
+  """The event loop coroutine tools are run on. If `None`, each coroutine tool
+  call is run on a new event loop in a separate thread."""
+  execution_budget: instrumentation.ExecutionBudget | None = None
+  """The limits on the resources used by each `parse_and_interpret_code` call."""
+  collect_stats: bool = False
+  """Whether to collect the statistics of each `parse_and_interpret_code` call,
+  which are always collected if there is an execution budget."""
+  profiler: instrumentation.Profiler | None = None
+  """The profiler of the current evaluation, set by `parse_and_interpret_code`."""
+
+
+async def _as_coroutine(awaitable: Awaitable[Any]) -> Any:
+  return await awaitable
+
+
+def _run_awaitable_in_new_loop(awaitable: Awaitable[Any]) -> Any:
+  """Runs `awaitable` to completion on a new event loop in a separate thread.
+
+  A separate thread is needed as the interpreter could be called from a thread
+  which is already running an event loop (e.g., by an ADK agent).
+
+  Args:
+      awaitable: The awaitable to run.
+
+  Returns:
+      The result of the awaitable.
+  """
+  with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+    return executor.submit(asyncio.run, _as_coroutine(awaitable)).result()
+
+
+def _run_awaitable_in_loop(
+    loop: asyncio.AbstractEventLoop, awaitable: Awaitable[Any]
+) -> Any:
+  return asyncio.run_coroutine_threadsafe(
+      _as_coroutine(awaitable), loop
+  ).result()
+
+
+def _make_awaitable_runner(
+    eval_args: EvalArgs,
+) -> Callable[[Awaitable[Any]], Any]:
+  if eval_args.event_loop is None:
+    return _run_awaitable_in_new_loop
+  return functools.partial(_run_awaitable_in_loop, eval_args.event_loop)
 
 
 def _eval_formatted_value(
     node: ast.FormattedValue,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -237,7 +306,7 @@ def _eval_formatted_value(
 def _eval_starred_iterable(
     node: ast.Starred,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -295,7 +364,7 @@ def _eval_starred_iterable(
 def _eval_iterable(
     elts: Iterable[ExceptionASTNodes],
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -368,7 +437,7 @@ def _eval_iterable(
 def _eval_joined_str(
     node: ast.JoinedStr,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -418,7 +487,7 @@ def _eval_joined_str(
 def _eval_constant(
     node: ast.Constant,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,  # pylint: disable=unused-argument
 ) -> EvalResult:
@@ -472,7 +541,7 @@ def _eval_constant(
 def _eval_module(
     node: ast.Module,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -496,7 +565,7 @@ def _eval_module(
 def _eval_name_load(
     node: ast.Name,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,  # pylint: disable=unused-argument
 ) -> EvalResult:
@@ -537,7 +606,7 @@ def has_attr(obj: camel_value.HasAttrs[Any], name: str) -> bool:
 def _eval_attribute_load(
     node: ast.Attribute,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -607,7 +676,7 @@ def _eval_attribute_load(
 def _eval_subscript_load(
     node: ast.Subscript,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -716,7 +785,7 @@ def _eval_subscript_load(
 def _eval_list(
     node: ast.List,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -767,7 +836,7 @@ def _eval_list(
 def _eval_tuple(
     node: ast.Tuple,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -818,7 +887,7 @@ def _eval_tuple(
 def _eval_set(
     node: ast.Set,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -866,7 +935,7 @@ def _eval_set(
 def _eval_dict(
     node: ast.Dict,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -963,7 +1032,7 @@ def _assign_name(
     name: ast.Name,
     v: camel_value.Value,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -1015,7 +1084,7 @@ def _assign_tuple_list(
     names: ast.Tuple | ast.List,
     v: camel_value.Value[Any],
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -1103,7 +1172,7 @@ def _assign_attribute(
     attribute: ast.Attribute,
     val: camel_value.Value[Any],
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -1172,7 +1241,7 @@ def _assign_subscript(
     subscript: ast.Subscript,
     val: camel_value.Value[Any],
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -1281,7 +1350,7 @@ def _assign(
     evaled_value: camel_value.Value[Any],
     target: ast.expr,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -1355,7 +1424,7 @@ def _assign(
 def _eval_assign(
     node: ast.Assign,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -1409,7 +1478,7 @@ def _eval_assign(
 def _eval_ann_assign(
     node: ast.AnnAssign,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -1465,7 +1534,7 @@ def _eval_ann_assign(
 def _eval_aug_assign(
     node: ast.AugAssign,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -1582,7 +1651,7 @@ def _eval_comprehensions(
     generators: list[ast.comprehension],
     elts: tuple[ast.expr] | tuple[ast.expr, ast.expr],  # pylint: disable=g-one-element-tuple
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
     evaled_iterators: tuple[camel_value.Value[Any], ...],
@@ -1673,65 +1742,60 @@ def _eval_comprehensions(
       camel_value.CaMeLList([], camel_capabilities.Capabilities.camel(), ())
       for _ in elts
   )
-  for element in iterable.iterate_python():
-    inner_namespace = dataclasses.replace(namespace)
-    assign_res, inner_namespace, tool_calls_chain, dependencies = _assign(
-        element,
-        current_comprehension.target,
-        inner_namespace,
-        tool_calls_chain,
+  if _can_eval_comprehension_concurrently(
+      generators, elts, namespace, eval_args
+  ):
+    elements_results = _eval_comprehension_elements_concurrently(
+        list(iterable.iterate_python()),
+        generators,
+        elts,
+        namespace,
         dependencies,
         eval_args,
     )
-    if isinstance(assign_res, result.Error):
-      return (
-          EvalResult(assign_res, namespace, tool_calls_chain, dependencies),
-          (),
+  else:
+    elements_results = None
+
+  for i, element in enumerate(iterable.iterate_python()):
+    if elements_results is not None:
+      # Merge the results of the concurrent evaluation in order. The namespace
+      # and the dependencies are not updated by independent iterations.
+      (element_res, _, element_tool_calls, _), element_iterators = (
+          elements_results[i]
       )
-
-    # evaluate ifs
-    all_ifs_true = True
-    for if_expr in current_comprehension.ifs:
-      if_res, inner_namespace, tool_calls_chain, dependencies = camel_eval(
-          if_expr, inner_namespace, tool_calls_chain, dependencies, eval_args
+      tool_calls_chain = tool_calls_chain.extend(element_tool_calls)
+      evaled_iterators = (*evaled_iterators, *element_iterators)
+    else:
+      (
+          element_res,
+          namespace,
+          tool_calls_chain,
+          dependencies,
+      ), evaled_iterators = _eval_comprehension_element(
+          element,
+          generators,
+          elts,
+          namespace,
+          tool_calls_chain,
+          dependencies,
+          eval_args,
+          evaled_iterators,
       )
-      if isinstance(if_res, result.Error):
-        return EvalResult(if_res, namespace, tool_calls_chain, dependencies), ()
-      if not if_res.value.truth().raw:
-        all_ifs_true = False
-        break
-    if not all_ifs_true:
-      continue
-
-    (
-        recursive_res,
-        resulting_namespace,
-        tool_calls_chain,
-        dependencies,
-    ), evaled_iterators = _eval_comprehensions(
-        generators[1:],
-        elts,
-        inner_namespace,
-        tool_calls_chain,
-        dependencies,
-        eval_args,
-        evaled_iterators,
-    )
-
-    namespace = _restore_or_delete_variables(
-        namespace,
-        resulting_namespace,
-        _get_assigned_names(current_comprehension.target),
-    )
-
-    if isinstance(recursive_res, result.Error):
+    if isinstance(element_res, result.Error):
+      if elements_results is not None:
+        # Later iterations may have run before the error was seen: record
+        # their tool calls too.
+        for later_results in elements_results[i + 1 :]:
+          if later_results is not None:
+            tool_calls_chain = tool_calls_chain.extend(
+                later_results[0].tool_calls_chain
+            )
       return (
-          EvalResult(recursive_res, namespace, tool_calls_chain, dependencies),
+          EvalResult(element_res, namespace, tool_calls_chain, dependencies),
           (),
       )
-
     for acc_res, rec_res in zip(
-        accumulated_results, recursive_res.value.python_value
+        accumulated_results, element_res.value.python_value
     ):
       acc_res.python_value.extend(rec_res.python_value)
 
@@ -1747,10 +1811,240 @@ def _eval_comprehensions(
   ), (*evaled_iterators, iterable)
 
 
+def _eval_comprehension_element(
+    element: camel_value.Value[Any],
+    generators: list[ast.comprehension],
+    elts: tuple[ast.expr] | tuple[ast.expr, ast.expr],  # pylint: disable=g-one-element-tuple
+    namespace: camel_value.Namespace,
+    tool_calls_chain: call_chain.ToolCallsChain,
+    dependencies: Iterable[camel_value.Value[Any]],
+    eval_args: EvalArgs,
+    evaled_iterators: tuple[camel_value.Value[Any], ...],
+) -> tuple[EvalResult, tuple[camel_value.Value[Any], ...]]:
+  """Evaluates a comprehension for an element of its first generator.
+
+  Args:
+      element: The element of the iterable of the first generator.
+      generators: The AST nodes representing the comprehension generators.
+      elts: The AST nodes representing the comprehension elements.
+      namespace: The current namespace.
+      tool_calls_chain: The current chain of tool calls.
+      dependencies: The current dependencies.
+      eval_args: The evaluation arguments.
+      evaled_iterators: The iterators that have been evaluated so far.
+
+  Returns:
+      The result of the evaluation and the evaluated iterators. The result is
+      a tuple with one (possibly empty) list for each of `elts`.
+  """
+  current_comprehension = generators[0]
+  inner_namespace = dataclasses.replace(namespace)
+  assign_res, inner_namespace, tool_calls_chain, dependencies = _assign(
+      element,
+      current_comprehension.target,
+      inner_namespace,
+      tool_calls_chain,
+      dependencies,
+      eval_args,
+  )
+  if isinstance(assign_res, result.Error):
+    return (
+        EvalResult(assign_res, namespace, tool_calls_chain, dependencies),
+        (),
+    )
+
+  # evaluate ifs
+  for if_expr in current_comprehension.ifs:
+    if_res, inner_namespace, tool_calls_chain, dependencies = camel_eval(
+        if_expr, inner_namespace, tool_calls_chain, dependencies, eval_args
+    )
+    if isinstance(if_res, result.Error):
+      return EvalResult(if_res, namespace, tool_calls_chain, dependencies), ()
+    if not if_res.value.truth().raw:
+      skipped = camel_value.CaMeLTuple(
+          tuple(
+              camel_value.CaMeLList(
+                  [], camel_capabilities.Capabilities.camel(), ()
+              )
+              for _ in elts
+          ),
+          camel_capabilities.Capabilities.default(),
+          (),
+      )
+      return (
+          EvalResult(
+              result.Ok(skipped), namespace, tool_calls_chain, dependencies
+          ),
+          evaled_iterators,
+      )
+
+  (
+      recursive_res,
+      resulting_namespace,
+      tool_calls_chain,
+      dependencies,
+  ), evaled_iterators = _eval_comprehensions(
+      generators[1:],
+      elts,
+      inner_namespace,
+      tool_calls_chain,
+      dependencies,
+      eval_args,
+      evaled_iterators,
+  )
+
+  namespace = _restore_or_delete_variables(
+      namespace,
+      resulting_namespace,
+      _get_assigned_names(current_comprehension.target),
+  )
+
+  if isinstance(recursive_res, result.Error):
+    return (
+        EvalResult(recursive_res, namespace, tool_calls_chain, dependencies),
+        (),
+    )
+  return (
+      EvalResult(recursive_res, namespace, tool_calls_chain, dependencies),
+      evaled_iterators,
+  )
+
+
+def _can_eval_comprehension_concurrently(
+    generators: list[ast.comprehension],
+    elts: tuple[ast.expr] | tuple[ast.expr, ast.expr],  # pylint: disable=g-one-element-tuple
+    namespace: camel_value.Namespace,
+    eval_args: EvalArgs,
+) -> bool:
+  """Returns whether the iterations of a comprehension can run concurrently.
+
+  Iterations can affect later ones by assigning variables with named
+  expressions, or, in `STRICT` mode, by adding the arguments of
+  `query_ai_assistant` calls to the dependencies. Moreover, only comprehensions
+  whose calls have no side effects are evaluated concurrently: an iteration
+  failing (e.g., because of a policy violation) must prevent the tool calls of
+  the following ones, as it does when they are evaluated in order.
+
+  Args:
+      generators: The AST nodes representing the comprehension generators.
+      elts: The AST nodes representing the comprehension elements.
+      namespace: The current namespace.
+      eval_args: The evaluation arguments.
+
+  Returns:
+      Whether the iterations can be evaluated concurrently.
+  """
+  if eval_args.max_concurrency <= 1:
+    return False
+  if eval_args.eval_mode != DependenciesPropagationMode.NORMAL:
+    return False
+  side_effect_free_tools = QUERY_AI_ASSISTANT_FUNCTIONS | frozenset(
+      eval_args.security_policy_engine.no_side_effect_tools
+  )
+  comprehension_targets = {
+      name
+      for generator in generators
+      for name in _get_assigned_names(generator.target)
+  }
+  for root in (*generators, *elts):
+    for node in ast.walk(root):
+      if isinstance(node, ast.NamedExpr):
+        return False
+      if not isinstance(node, ast.Call):
+        continue
+      if isinstance(node.func, ast.Attribute):
+        # The supported built-in methods do not mutate their receiver.
+        if node.func.attr not in _BUILT_IN_METHOD_NAMES:
+          return False
+        continue
+      if (
+          not isinstance(node.func, ast.Name)
+          or node.func.id in comprehension_targets
+      ):
+        return False
+      if node.func.id in side_effect_free_tools:
+        continue
+      if not isinstance(
+          namespace.get(node.func.id),
+          camel_value.CaMeLBuiltin | camel_value.CaMeLClass,
+      ):
+        return False
+  return True
+
+
+_BUILT_IN_METHOD_NAMES = frozenset(
+    name
+    for methods in camel_value.SUPPORTED_BUILT_IN_METHODS.values()
+    for name in methods
+)
+
+
+def _eval_comprehension_elements_concurrently(
+    elements: list[camel_value.Value[Any]],
+    generators: list[ast.comprehension],
+    elts: tuple[ast.expr] | tuple[ast.expr, ast.expr],  # pylint: disable=g-one-element-tuple
+    namespace: camel_value.Namespace,
+    dependencies: Iterable[camel_value.Value[Any]],
+    eval_args: EvalArgs,
+) -> list[tuple[EvalResult, tuple[camel_value.Value[Any], ...]] | None]:
+  """Evaluates a comprehension for each element concurrently.
+
+  Each element is evaluated starting from an empty tool calls chain and no
+  evaluated iterators, so that the caller can merge them in order. Iterations
+  are started in order, and the ones not started yet are cancelled as soon as
+  one fails.
+
+  Args:
+      elements: The elements of the iterable of the first generator.
+      generators: The AST nodes representing the comprehension generators.
+      elts: The AST nodes representing the comprehension elements.
+      namespace: The current namespace.
+      dependencies: The current dependencies.
+      eval_args: The evaluation arguments.
+
+  Returns:
+      The result of `_eval_comprehension_element` for each element, in order,
+      or `None` for the iterations cancelled after a failure.
+  """
+  if not elements:
+    return []
+  # Nested comprehensions are evaluated sequentially within each worker.
+  element_eval_args = dataclasses.replace(eval_args, max_concurrency=1)
+  dependencies = tuple(dependencies)
+
+  def eval_element(
+      element: camel_value.Value[Any],
+  ) -> tuple[EvalResult, tuple[camel_value.Value[Any], ...]]:
+    return _eval_comprehension_element(
+        element,
+        generators,
+        elts,
+        namespace,
+        call_chain.ToolCallsChain(),
+        dependencies,
+        element_eval_args,
+        (),
+    )
+
+  with concurrent.futures.ThreadPoolExecutor(
+      max_workers=min(eval_args.max_concurrency, len(elements))
+  ) as executor:
+    futures = [executor.submit(eval_element, element) for element in elements]
+    try:
+      for future in futures:
+        if isinstance(future.result()[0].result, result.Error):
+          break
+    finally:
+      # Iterations that have not started yet would not run sequentially.
+      for pending in futures:
+        pending.cancel()
+  return [None if future.cancelled() else future.result() for future in futures]
+
+
 def _eval_list_comp(
     node: ast.ListComp,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -1808,7 +2102,7 @@ def _eval_list_comp(
 def _eval_set_comp(
     node: ast.SetComp,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -1865,7 +2159,7 @@ def _eval_set_comp(
 def _eval_dict_comp(
     node: ast.DictComp,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -1923,7 +2217,7 @@ def _eval_dict_comp(
 def _eval_expr(
     node: ast.Expr,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -1947,7 +2241,7 @@ def _eval_expr(
 def _eval_named_expr(
     node: ast.NamedExpr,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -2005,7 +2299,7 @@ def unary(op: ast.unaryop, val: S) -> S:
 def _eval_unary_op(
     node: ast.UnaryOp,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -2246,7 +2540,7 @@ def _eval_bin_op_inner(
 def _eval_bin_op(
     node: ast.BinOp,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -2295,7 +2589,7 @@ def _eval_bin_op(
 def _eval_bool_op(
     node: ast.BoolOp,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -2416,7 +2710,7 @@ _CMP_OPS_REPR = {ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">="}
 def _eval_compare(
     node: ast.Compare,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -2547,7 +2841,7 @@ def _eval_compare(
 def _eval_if(
     node: ast.If,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -2578,7 +2872,7 @@ def _eval_if(
         node.body,
         namespace,
         tool_calls_chain,
-        [*dependencies, test],
+        dependency_stack.DependencyStack.of(dependencies).push(test),
         eval_args,
     )
   elif node.orelse:
@@ -2586,7 +2880,7 @@ def _eval_if(
         node.orelse,
         namespace,
         tool_calls_chain,
-        [*dependencies, test],
+        dependency_stack.DependencyStack.of(dependencies).push(test),
         eval_args,
     )
   # If/else statements can't be assigned, so what is returned is meaningless.
@@ -2600,8 +2894,7 @@ def _eval_if(
         dependencies,
     )
 
-  dependencies = list(dependencies)
-  dependencies.remove(test)
+  dependencies = dependency_stack.DependencyStack.of(dependencies).remove(test)
 
   if isinstance(body_res, result.Error):
     return EvalResult(body_res, namespace, tool_calls_chain, dependencies)
@@ -2619,7 +2912,7 @@ def _eval_if(
 def _eval_if_exp(
     node: ast.IfExp,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -2646,7 +2939,9 @@ def _eval_if_exp(
     case _:
       raise ValueError("Invalid eval result type")
 
-  inner_dependencies = [*dependencies, test]
+  inner_dependencies = dependency_stack.DependencyStack.of(dependencies).push(
+      test
+  )
   if test.truth().python_value:
     body_res, namespace, tool_calls_chain, dependencies = camel_eval(
         node.body,
@@ -2660,8 +2955,7 @@ def _eval_if_exp(
         node.orelse, namespace, tool_calls_chain, inner_dependencies, eval_args
     )
 
-  dependencies = list(dependencies)
-  dependencies.remove(test)
+  dependencies = dependency_stack.DependencyStack.of(dependencies).remove(test)
 
   if isinstance(body_res, result.Error):
     return EvalResult(body_res, namespace, tool_calls_chain, dependencies)
@@ -2679,7 +2973,7 @@ def _eval_if_exp(
 def _eval_for(
     node: ast.For,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -2739,7 +3033,9 @@ def _eval_for(
         dependencies,
     )
 
-  dependencies = [*dependencies, iterable]
+  dependencies = dependency_stack.DependencyStack.of(dependencies).push(
+      iterable
+  )
   for elt in iterable.iterate_python():
     assign_res, namespace, tool_calls_chain, dependencies = _assign(
         elt,
@@ -2768,8 +3064,9 @@ def _eval_for(
           final_val_res, namespace, tool_calls_chain, dependencies
       )
 
-  dependencies = list(dependencies)
-  dependencies.remove(iterable)
+  dependencies = dependency_stack.DependencyStack.of(dependencies).remove(
+      iterable
+  )
 
   return EvalResult(
       result.Ok(
@@ -2784,7 +3081,7 @@ def _eval_for(
 def _eval_stmt_list(
     stmts: Sequence[ast.stmt],
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -2822,7 +3119,7 @@ def _eval_args(
     args: list[ast.expr],
     fn: camel_value.Value[Any],
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -2906,7 +3203,7 @@ def _eval_keywords(
     node: ast.Call,
     fn: camel_value.Value[Any],
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -3020,7 +3317,7 @@ def _eval_keywords(
 def _eval_call(
     node: ast.Call,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -3129,18 +3426,22 @@ def _eval_call(
     )
 
   if (
-      evaled_fn.name().raw == "query_ai_assistant"
+      evaled_fn.name().raw in QUERY_AI_ASSISTANT_FUNCTIONS
       and eval_args.eval_mode == DependenciesPropagationMode.STRICT
   ):
-    dependencies = [
-        *dependencies,
-        *evaled_args.python_value,
-        *evaled_kwargs.python_value.values(),
-    ]
+    dependencies = (
+        dependency_stack.DependencyStack.of(dependencies)
+        .extend(evaled_args.python_value)
+        .extend(evaled_kwargs.python_value.values())
+    )
 
+  call_start_time = time.perf_counter()
   try:
     ret_res, args_by_keyword = evaled_fn.call(
-        evaled_args, evaled_kwargs, namespace
+        evaled_args,
+        evaled_kwargs,
+        namespace,
+        _make_awaitable_runner(eval_args),
     )
   except Exception as e:  # pylint: disable=broad-except  # catch all exceptions to be able to return them to the P-LLM
     if isinstance(e, library.NotEnoughInformationError):
@@ -3194,6 +3495,11 @@ def _eval_call(
         tool_calls_chain,
         dependencies,
     )
+  finally:
+    if eval_args.profiler is not None:
+      eval_args.profiler.record_tool_call(
+          evaled_fn.name().raw, time.perf_counter() - call_start_time
+      )
 
   receiver = evaled_fn.receiver()
   if receiver is not None:
@@ -3208,11 +3514,16 @@ def _eval_call(
   else:
     object_type = None
 
-  tool_call = function_types.FunctionCall(
+  tool_call = call_chain.ToolCallRecord(
       function=evaled_fn.name().raw,
       object_type=object_type,
       args=args_by_keyword,
-      output=ret_res.raw,
+      # Lazy lists (e.g., `range(n)`) are only materialized when converted.
+      output=(
+          ret_res.lazy_raw
+          if isinstance(ret_res, camel_value.CaMeLLazyList)
+          else ret_res.raw
+      ),
       is_builtin=isinstance(
           evaled_fn, camel_value.CaMeLBuiltin | camel_value.CaMeLClass
       ),
@@ -3221,7 +3532,7 @@ def _eval_call(
   return EvalResult(
       result.Ok(ret_res),
       namespace,
-      [*tool_calls_chain, tool_call],
+      tool_calls_chain.append(tool_call),
       dependencies,
   )
 
@@ -3229,7 +3540,7 @@ def _eval_call(
 def _eval_expr_list(
     nodes: Iterable[ast.expr],
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -3386,7 +3697,7 @@ def _parse_data_value_fields(
 def _eval_class_def(
     node: ast.ClassDef,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -3501,6 +3812,7 @@ def _eval_class_def(
       (),
       methods={},
       base_classes=bases.python_value,
+      definition=ast.unparse(node),
   )
   assign_res, new_namespace, new_tool_calls_chain, dependencies = _assign(
       value_value,
@@ -3522,7 +3834,7 @@ def _eval_class_def(
 def _eval_raise(
     node: ast.Raise,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
@@ -3587,7 +3899,7 @@ def _eval_raise(
 def _eval_function_def(
     node: ast.FunctionDef,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,  # pylint: disable=unused-argument
 ) -> EvalResult:
@@ -3605,11 +3917,42 @@ def _eval_function_def(
 def camel_eval(
     node: ast.AST,
     namespace: camel_value.Namespace,
-    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    tool_calls_chain: call_chain.ToolCallsChain,
     dependencies: Iterable[camel_value.Value[Any]],
     eval_args: EvalArgs,
 ) -> EvalResult:
   """Interprets the given AST enforcing security policies."""
+  profiler = eval_args.profiler
+  if profiler is None:
+    return _eval_node(
+        node, namespace, tool_calls_chain, dependencies, eval_args
+    )
+  try:
+    profiler.enter_node(node)
+  except instrumentation.ExecutionBudgetExceededError as e:
+    return EvalResult(
+        result.Error(CaMeLException(e, (node,), ())),
+        namespace,
+        tool_calls_chain,
+        dependencies,
+    )
+  start_time = time.perf_counter()
+  try:
+    return _eval_node(
+        node, namespace, tool_calls_chain, dependencies, eval_args
+    )
+  finally:
+    profiler.exit_node(node, time.perf_counter() - start_time)
+
+
+def _eval_node(
+    node: ast.AST,
+    namespace: camel_value.Namespace,
+    tool_calls_chain: call_chain.ToolCallsChain,
+    dependencies: Iterable[camel_value.Value[Any]],
+    eval_args: EvalArgs,
+) -> EvalResult:
+  """Dispatches the evaluation of `node` to the handler of its type."""
   match node:
     # Literals
     case ast.Constant():
@@ -4022,6 +4365,32 @@ def parse_and_interpret_code(
   Returns:
       The result of the evaluation.
   """
+  eval_result, _ = parse_and_interpret_code_with_stats(
+      code, namespace, tool_calls_chain, dependencies, eval_args
+  )
+  return eval_result
+
+
+def parse_and_interpret_code_with_stats(
+    code: str,
+    namespace: camel_value.Namespace,
+    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    dependencies: Iterable[camel_value.Value[Any]],
+    eval_args: EvalArgs,
+) -> tuple[EvalResult, instrumentation.ExecutionStats | None]:
+  """Parses and interprets the given code, and returns its statistics.
+
+  Args:
+      code: The code to parse and interpret.
+      namespace: The current namespace.
+      tool_calls_chain: The current chain of tool calls.
+      dependencies: The current dependencies.
+      eval_args: The evaluation arguments.
+
+  Returns:
+      The result of the evaluation, and its statistics if
+      `eval_args.execution_budget` or `eval_args.collect_stats` is set.
+  """
   try:
     code = extract_code_block(code)
   except InvalidOutputError as e:
@@ -4036,7 +4405,7 @@ def parse_and_interpret_code(
         namespace,
         tool_calls_chain,
         dependencies,
-    )
+    ), None
   try:
     parsed_code = ast.parse(code)
   except SyntaxError as e:
@@ -4051,9 +4420,91 @@ def parse_and_interpret_code(
         namespace,
         tool_calls_chain,
         dependencies,
+    ), None
+  profiler = None
+  if eval_args.execution_budget is not None or eval_args.collect_stats:
+    profiler = instrumentation.Profiler(eval_args.execution_budget)
+    eval_args = dataclasses.replace(eval_args, profiler=profiler)
+    profiler.start()
+  try:
+    eval_res, namespace, new_tool_calls_chain, dependencies = camel_eval(
+        parsed_code,
+        namespace,
+        call_chain.ToolCallsChain(tool_calls_chain),
+        dependencies,
+        eval_args,
     )
+  finally:
+    stats = profiler.stop() if profiler is not None else None
   return EvalResult(
-      *camel_eval(
-          parsed_code, namespace, tool_calls_chain, dependencies, eval_args
-      )
+      eval_res,
+      namespace,
+      new_tool_calls_chain.to_function_calls(),
+      dependencies,
+  ), stats
+
+
+async def parse_and_interpret_code_async(
+    code: str,
+    namespace: camel_value.Namespace,
+    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    dependencies: Iterable[camel_value.Value[Any]],
+    eval_args: EvalArgs,
+) -> EvalResult:
+  """Asynchronous version of `parse_and_interpret_code`.
+
+  See `parse_and_interpret_code_with_stats_async` for how it is interpreted.
+
+  Args:
+      code: The code to parse and interpret.
+      namespace: The current namespace.
+      tool_calls_chain: The current chain of tool calls.
+      dependencies: The current dependencies.
+      eval_args: The evaluation arguments.
+
+  Returns:
+      The result of the evaluation.
+  """
+  eval_result, _ = await parse_and_interpret_code_with_stats_async(
+      code, namespace, tool_calls_chain, dependencies, eval_args
+  )
+  return eval_result
+
+
+async def parse_and_interpret_code_with_stats_async(
+    code: str,
+    namespace: camel_value.Namespace,
+    tool_calls_chain: Sequence[function_types.FunctionCall[Any]],
+    dependencies: Iterable[camel_value.Value[Any]],
+    eval_args: EvalArgs,
+) -> tuple[EvalResult, instrumentation.ExecutionStats | None]:
+  """Asynchronous version of `parse_and_interpret_code_with_stats`.
+
+  The code is interpreted in a worker thread, while coroutine tools (e.g.,
+  `query_ai_assistant`) are awaited on the running event loop. If
+  `eval_args.max_concurrency` is greater than 1, the iterations of
+  comprehensions which do not affect each other are evaluated concurrently.
+  The tool calls chain is in the same order as with sequential evaluation.
+
+  Args:
+      code: The code to parse and interpret.
+      namespace: The current namespace.
+      tool_calls_chain: The current chain of tool calls.
+      dependencies: The current dependencies.
+      eval_args: The evaluation arguments.
+
+  Returns:
+      The result of the evaluation, and its statistics if
+      `eval_args.execution_budget` or `eval_args.collect_stats` is set.
+  """
+  eval_args = dataclasses.replace(
+      eval_args, event_loop=asyncio.get_running_loop()
+  )
+  return await asyncio.to_thread(
+      parse_and_interpret_code_with_stats,
+      code,
+      namespace,
+      tool_calls_chain,
+      dependencies,
+      eval_args,
   )
@@ -20,6 +20,7 @@ From https://github.com/google/starlark-go/blob/master/starlark/library.go#L157
 import collections.abc
 import datetime
 import enum
+import operator
 import typing
 from typing import Any
 
@@ -30,25 +31,93 @@ from ..capabilities import capabilities
 from . import camel_value
 
 
+_T = typing.TypeVar("_T")
+
+
+# `zip`, `enumerate`, `reversed` and `range` return lazy sequences rather than
+# iterators, as CaMeL values must behave like lists: they can be iterated over
+# multiple times, indexed, compared, etc. They are converted to
+# `CaMeLLazyList`s, whose elements are only converted when used.
+
+
+def _as_sequence(
+    x: collections.abc.Iterable[_T],
+) -> collections.abc.Sequence[_T]:
+  if isinstance(x, collections.abc.Sequence):
+    return x
+  return tuple(x)
+
+
+class _ZipSequence(camel_value.LazySequence):
+  """The lazy equivalent of `list(zip(*sequences))`."""
+
+  __slots__ = ("_sequences", "_len")
+
+  def __init__(self, sequences: tuple[collections.abc.Sequence[Any], ...]):
+    self._sequences = sequences
+    self._len = min(map(len, sequences), default=0)
+
+  def __len__(self) -> int:
+    return self._len
+
+  def __getitem__(self, index: int) -> tuple[Any, ...]:  # type: ignore[override]
+    i = range(self._len)[index]
+    return tuple(sequence[i] for sequence in self._sequences)
+
+
+class _EnumerateSequence(camel_value.LazySequence):
+  """The lazy equivalent of `list(enumerate(sequence, start))`."""
+
+  __slots__ = ("_sequence", "_start")
+
+  def __init__(self, sequence: collections.abc.Sequence[Any], start: int):
+    self._sequence = sequence
+    self._start = start
+
+  def __len__(self) -> int:
+    return len(self._sequence)
+
+  def __getitem__(self, index: int) -> tuple[int, Any]:  # type: ignore[override]
+    i = range(len(self._sequence))[index]
+    return self._start + i, self._sequence[i]
+
+
+class _ReversedSequence(camel_value.LazySequence):
+  """The lazy equivalent of `list(reversed(sequence))`."""
+
+  __slots__ = ("_sequence",)
+
+  def __init__(self, sequence: collections.abc.Sequence[Any]):
+    self._sequence = sequence
+
+  def __len__(self) -> int:
+    return len(self._sequence)
+
+  def __getitem__(self, index: int) -> Any:  # type: ignore[override]
+    i = range(len(self._sequence))[index]
+    return self._sequence[len(self._sequence) - 1 - i]
+
+
 # This can't be typed in a more narrow way bc of limitations of the Python type
 # system.
 def camel_zip(
     *x: collections.abc.Iterable[typing.Any],
-) -> list[tuple[typing.Any, ...]]:
-  return list(zip(*x))
-
-
-_T = typing.TypeVar("_T")
+) -> camel_value.LazySequence:
+  return _ZipSequence(tuple(map(_as_sequence, x)))
 
 
 def camel_enumerate(
     x: collections.abc.Iterable[_T], start: int = 0
-) -> list[tuple[int, _T]]:
-  return list(enumerate(x, start))
+) -> camel_value.LazySequence:
+  return _EnumerateSequence(_as_sequence(x), operator.index(start))
 
 
-def camel_reversed(x: collections.abc.Reversible[_T]) -> list[_T]:
-  return list(reversed(x))
+def camel_reversed(
+    x: collections.abc.Reversible[_T],
+) -> camel_value.LazySequence | list[_T]:
+  if not isinstance(x, collections.abc.Sequence):
+    return list(reversed(x))
+  return _ReversedSequence(x)
 
 
 def camel_bool(x: object) -> bool:
@@ -61,16 +130,16 @@ def camel_dir(x: object) -> list[str]:
 
 def camel_range(
     start: int, stop: int | None = None, step: int | None = None, /
-) -> list[int]:
+) -> range:
   match (stop, step):
     case None, None:
-      return list(range(start))
+      return range(start)
     case (_, None):
-      return list(range(start, stop))
+      return range(start, stop)
     case (None, _):
       raise TypeError("'NoneType' object cannot be interpreted as an integer")
     case (_, _):
-      return list(range(start, stop, step))
+      return range(start, stop, step)
 
 
 # pylint: disable=unused-argument
@@ -96,7 +165,6 @@ BUILT_IN_FUNCTIONS: dict[str, camel_value.CaMeLBuiltin] = {
     "bool": camel_value.make_builtin("bool", camel_bool),
     "dir": camel_value.make_builtin("dir", camel_dir),
     "divmod": camel_value.make_builtin("divmod", divmod),
-    # We don't want lazy objects, so `enumerate` must return a list
     "enumerate": camel_value.make_builtin("enumerate", camel_enumerate),
     "float": camel_value.make_builtin("float", float),
     "hash": camel_value.make_builtin("hash", hash),
@@ -108,14 +176,12 @@ BUILT_IN_FUNCTIONS: dict[str, camel_value.CaMeLBuiltin] = {
     "print": camel_value.make_builtin("print", camel_print),
     "range": camel_value.make_builtin("range", camel_range),
     "repr": camel_value.make_builtin("repr", repr),
-    # We don't want lazy objects, so `reversed` must return a list of tuples
     "reversed": camel_value.make_builtin("reversed", camel_reversed),
     "set": camel_value.make_builtin("set", set),
     "sorted": camel_value.make_builtin("sorted", sorted),
     "str": camel_value.make_builtin("str", str),
     "tuple": camel_value.make_builtin("tuple", tuple),
     "type": camel_value.make_builtin("type", lambda x: type(x).__name__),
-    # We don't want lazy objects, so `zip` must return a list of tuples
     "zip": camel_value.make_builtin("zip", camel_zip),
     "sum": camel_value.make_builtin("sum", sum),
 }
@@ -0,0 +1,741 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compact snapshots of the variables defined in a CaMeL namespace.
+
+A snapshot stores the values of the variables together with their capabilities
+and dependencies, so that an interpreter session can be resumed in another
+process. Values are stored once in a flat table, and referenced by index by the
+values which contain them or depend on them, so values shared between
+variables, containers and dependencies are stored once. Capabilities are
+deduplicated the same way.
+
+Values of the base namespace (built-in functions and classes, tools) are not
+stored, but referenced by name, so the same base namespace must be passed when
+restoring the snapshot. Classes defined in CaMeL code are re-created from their
+definition.
+"""
+
+# Snapshots store and restore the internal state of the values.
+# pylint: disable=protected-access
+
+import ast
+import copy
+import dataclasses
+import datetime
+import json
+from typing import Any
+import zlib
+
+import pydantic
+
+from .. import result
+from .. import security_policy
+from ..capabilities import capabilities as camel_capabilities
+from ..capabilities import readers
+from ..capabilities import sources
+from . import call_chain
+from . import camel_value
+from . import interpreter
+
+_VERSION = 1
+
+
+class _Tag:
+  """The tags identifying the kind of each stored value."""
+
+  NAME = "n"
+  METHOD = "m"
+  BUILTIN_METHOD = "b"
+  PUBLIC = "P"
+  NONE = "N"
+  TRUE = "T"
+  FALSE = "F"
+  INT = "i"
+  FLOAT = "f"
+  CHAR = "c"
+  STR = "s"
+  TUPLE = "t"
+  LIST = "l"
+  RANGE = "r"
+  SET = "S"
+  DICT = "d"
+  CALLABLE = "x"
+  CLASS = "C"
+  INSTANCE = "o"
+  WRAPPER = "w"
+
+
+class SnapshotError(Exception):
+  """Raised when a namespace can't be snapshotted or restored."""
+
+
+def _callable_key(value: camel_value.CaMeLCallable[Any]) -> tuple[Any, ...]:
+  return (type(value), value._name, id(value.python_value))
+
+
+def _known_callables(
+    base_namespace: camel_value.Namespace,
+) -> dict[tuple[Any, ...], list[str]]:
+  """Returns references to the callables which are not stored in snapshots."""
+  known: dict[tuple[Any, ...], list[str]] = {}
+  for type_name, methods in camel_value.SUPPORTED_BUILT_IN_METHODS.items():
+    for method_name, method in methods.items():
+      known.setdefault(
+          _callable_key(method), [_Tag.BUILTIN_METHOD, type_name, method_name]
+      )
+  for name, value in base_namespace.variables.items():
+    if isinstance(value, camel_value.CaMeLClass):
+      for method_name, method in value.methods.items():
+        known.setdefault(
+            _callable_key(method), [_Tag.METHOD, name, method_name]
+        )
+    if isinstance(value, camel_value.CaMeLCallable):
+      known.setdefault(_callable_key(value), [_Tag.NAME, name])
+  return known
+
+
+def _resolve_callable(
+    reference: list[str], base_namespace: camel_value.Namespace
+) -> camel_value.CaMeLCallable[Any]:
+  match reference:
+    case [_Tag.BUILTIN_METHOD, type_name, method_name]:
+      return camel_value.SUPPORTED_BUILT_IN_METHODS[type_name][method_name]
+    case [_Tag.METHOD, class_name, method_name]:
+      return base_namespace.variables[class_name].methods[method_name]
+    case [_Tag.NAME, name]:
+      return base_namespace.variables[name]
+    case _:
+      raise SnapshotError(f"Invalid callable reference {reference}")
+
+
+def _encode_wrapped(value: Any) -> list[Any]:
+  match value:
+    case datetime.datetime():
+      return ["datetime", value.isoformat()]
+    case datetime.date():
+      return ["date", value.isoformat()]
+    case datetime.time():
+      return ["time", value.isoformat()]
+    case datetime.timedelta():
+      return ["timedelta", value.days, value.seconds, value.microseconds]
+    case datetime.timezone():
+      return [
+          "timezone",
+          value.utcoffset(None).total_seconds(),
+          value.tzname(None),
+      ]
+    case _:
+      raise SnapshotError(
+          f"Values of type {type(value).__name__} can't be snapshotted"
+      )
+
+
+def _decode_wrapped(payload: list[Any]) -> Any:
+  match payload:
+    case ["datetime", iso]:
+      return datetime.datetime.fromisoformat(iso)
+    case ["date", iso]:
+      return datetime.date.fromisoformat(iso)
+    case ["time", iso]:
+      return datetime.time.fromisoformat(iso)
+    case ["timedelta", days, seconds, microseconds]:
+      return datetime.timedelta(days, seconds, microseconds)
+    case ["timezone", offset, name]:
+      return datetime.timezone(datetime.timedelta(seconds=offset), name)
+    case _:
+      raise SnapshotError(f"Invalid wrapped value {payload}")
+
+
+def _field_types(python_type: type[Any]) -> dict[str, Any] | None:
+  """Returns the fields of a model or dataclass type, `None` otherwise."""
+  if issubclass(python_type, pydantic.BaseModel):
+    return {
+        name: field.annotation
+        for name, field in python_type.model_fields.items()
+    }
+  if pydantic.dataclasses.is_pydantic_dataclass(python_type):
+    return {field.name: field.type for field in dataclasses.fields(python_type)}
+  return None
+
+
+class _Encoder:
+  """Assigns an index to each value, and encodes it in terms of the indices."""
+
+  def __init__(self, base_namespace: camel_value.Namespace):
+    self._base_namespace = base_namespace
+    self._base_values = {
+        id(value): name for name, value in base_namespace.variables.items()
+    }
+    self._known_callables = _known_callables(base_namespace)
+    self._capabilities_indices: dict[camel_capabilities.Capabilities, int] = {}
+    self.capabilities: list[list[Any]] = []
+    self._indices: dict[int, int] = {}
+    # Keeps the values alive, so that their ids are not reused.
+    self._values: list[Any] = []
+    self._pending: list[Any] = []
+    self.nodes: list[list[Any] | None] = []
+
+  def ref(self, value: Any) -> int:
+    """Returns the index of `value`, scheduling its encoding if new."""
+    index = self._indices.get(id(value))
+    if index is not None:
+      return index
+    index = len(self.nodes)
+    self._indices[id(value)] = index
+    self._values.append(value)
+    if (name := self._base_values.get(id(value))) is not None:
+      self.nodes.append([_Tag.NAME, name])
+    elif isinstance(value, readers.Public):
+      self.nodes.append([_Tag.PUBLIC])
+    else:
+      self.nodes.append(None)
+      self._pending.append((index, value))
+    return index
+
+  def encode_pending(self) -> None:
+    # Values are encoded iteratively, as chains of dependencies can be deeper
+    # than the recursion limit.
+    while self._pending:
+      index, value = self._pending.pop()
+      self.nodes[index] = self._encode(value)
+
+  def _capabilities_ref(
+      self, capabilities: camel_capabilities.Capabilities
+  ) -> int:
+    index = self._capabilities_indices.get(capabilities)
+    if index is not None:
+      return index
+    index = len(self.capabilities)
+    self._capabilities_indices[capabilities] = index
+    self.capabilities.append(_encode_capabilities(capabilities))
+    return index
+
+  def _refs(self, values: Any) -> list[int]:
+    return [self.ref(value) for value in values]
+
+  def _encode(self, value: Any) -> list[Any]:
+    head = [
+        self._capabilities_ref(value.capabilities),
+        self._refs(value.outer_dependencies),
+    ]
+    match value:
+      case camel_value.CaMeLNone():
+        return [_Tag.NONE, *head]
+      case camel_value.CaMeLTrue():
+        return [_Tag.TRUE, *head]
+      case camel_value.CaMeLFalse():
+        return [_Tag.FALSE, *head]
+      case camel_value.CaMeLInt():
+        return [_Tag.INT, *head, value.python_value]
+      case camel_value.CaMeLFloat():
+        return [_Tag.FLOAT, *head, value.python_value]
+      case camel_value._Char():
+        return [_Tag.CHAR, *head, value.python_value]
+      case camel_value.CaMeLStr():
+        return [
+            _Tag.STR,
+            *head,
+            value.raw,
+            self._encode_chars(value.python_value),
+        ]
+      case camel_value.CaMeLTuple():
+        return [_Tag.TUPLE, *head, self._refs(value.python_value)]
+      case camel_value.CaMeLLazyList() if isinstance(
+          lazy_raw := value.lazy_raw, range
+      ):
+        return [
+            _Tag.RANGE,
+            *head,
+            lazy_raw.start,
+            lazy_raw.stop,
+            lazy_raw.step,
+            value._frozen,
+        ]
+      case camel_value.CaMeLList():
+        return [
+            _Tag.LIST,
+            *head,
+            self._refs(value.python_value),
+            value._frozen,
+        ]
+      case camel_value.CaMeLSet():
+        return [
+            _Tag.SET,
+            *head,
+            self._refs(value.python_value),
+            value._frozen,
+        ]
+      case camel_value.CaMeLDict():
+        return [
+            _Tag.DICT,
+            *head,
+            [[self.ref(k), self.ref(v)] for k, v in value.python_value.items()],
+            value._frozen,
+        ]
+      case camel_value.CaMeLClass() if value.definition is not None:
+        return [
+            _Tag.CLASS,
+            *head,
+            value._name,
+            value.definition,
+            self._refs(value._base_classes),
+        ]
+      case camel_value.CaMeLCallable():
+        reference = self._known_callables.get(_callable_key(value))
+        if reference is None:
+          raise SnapshotError(
+              f"Function {value._name} can't be snapshotted"
+          )
+        receiver = value.receiver()
+        return [
+            _Tag.CALLABLE,
+            *head,
+            reference,
+            None if receiver is None else self.ref(receiver),
+        ]
+      case camel_value.ValueAsWrapper():
+        return [_Tag.WRAPPER, *head, _encode_wrapped(value.python_value)]
+      case camel_value.CaMeLClassInstance():
+        # Instances of built-in classes (e.g., `datetime`) are stored as
+        # wrapped values.
+        fields = self._encode_fields(value)
+        return [
+            _Tag.INSTANCE,
+            *head,
+            self.ref(value._camel_class),
+            fields,
+            _encode_wrapped(value.python_value) if fields is None else None,
+            value._frozen,
+        ]
+      case _:
+        raise SnapshotError(
+            f"Values of type {type(value).__name__} can't be snapshotted"
+        )
+
+  def _encode_chars(
+      self, chars: tuple[camel_value.Value[str], ...]
+  ) -> list[list[Any]]:
+    """Encodes the capabilities and dependencies of runs of characters."""
+    runs: list[list[Any]] = []
+    for char in chars:
+      capabilities = self._capabilities_ref(char.capabilities)
+      dependencies = self._refs(char.outer_dependencies)
+      if runs and runs[-1][1] == capabilities and runs[-1][2] == dependencies:
+        runs[-1][0] += 1
+      else:
+        runs.append([1, capabilities, dependencies])
+    return runs
+
+  def _encode_fields(
+      self, value: camel_value.CaMeLClassInstance[Any]
+  ) -> dict[str, int | list[Any]] | None:
+    """Encodes the fields of a model or dataclass instance.
+
+    Fields set with `set_field` or converted by `value_from_raw` are values,
+    which are referenced by index. Fields set by the constructor are raw, and
+    are stored as JSON in a one-element list.
+
+    Args:
+      value: The instance to encode.
+
+    Returns:
+      The encoded fields, or `None` if the instance is not of a model or a
+      dataclass.
+    """
+    field_types = _field_types(type(value.python_value))
+    if field_types is None:
+      return None
+    fields = {}
+    for name, field_type in field_types.items():
+      field = getattr(value.python_value, name)
+      if camel_value.is_value(field):
+        fields[name] = self.ref(field)
+        continue
+      try:
+        fields[name] = [
+            pydantic.TypeAdapter(field_type).dump_python(field, mode="json")
+        ]
+      except pydantic.PydanticSerializationError as e:
+        raise SnapshotError(f"Field {name} can't be snapshotted: {e}") from e
+    return fields
+
+
+def _encode_capabilities(
+    capabilities: camel_capabilities.Capabilities,
+) -> list[Any]:
+  if isinstance(capabilities.readers_set, readers.Public):
+    readers_set = None
+  elif all(isinstance(reader, str) for reader in capabilities.readers_set):
+    readers_set = sorted(capabilities.readers_set)
+  else:
+    raise SnapshotError("Only readers which are strings can be snapshotted")
+  return [
+      sorted(
+          (_encode_source(source) for source in capabilities.sources_set),
+          key=json.dumps,
+      ),
+      readers_set,
+      dict(capabilities.other_metadata),
+  ]
+
+
+def _encode_source(source: sources.Source) -> Any:
+  match source:
+    case sources.SourceEnum():
+      return source.name
+    case sources.Tool(tool_name, inner_sources):
+      return [
+          tool_name,
+          sorted(
+              (
+                  [inner.name] if isinstance(inner, sources.SourceEnum)
+                  else inner
+                  for inner in inner_sources
+              ),
+              key=json.dumps,
+          ),
+      ]
+    case _:
+      raise SnapshotError(f"Invalid source {source}")
+
+
+def _decode_source(encoded: Any) -> sources.Source:
+  if isinstance(encoded, str):
+    return sources.SourceEnum[encoded]
+  tool_name, inner_sources = encoded
+  return sources.Tool(
+      tool_name,
+      frozenset(
+          sources.SourceEnum[inner[0]] if isinstance(inner, list) else inner
+          for inner in inner_sources
+      ),
+  )
+
+
+def _decode_capabilities(encoded: list[Any]) -> camel_capabilities.Capabilities:
+  sources_set, readers_set, other_metadata = encoded
+  capabilities = camel_capabilities.Capabilities(
+      frozenset(_decode_source(source) for source in sources_set),
+      readers.Public() if readers_set is None else frozenset(readers_set),
+      other_metadata,
+  )
+  # Shares the interned capabilities, so identity checks keep working.
+  for interned in (
+      camel_capabilities.Capabilities.default(),
+      camel_capabilities.Capabilities.camel(),
+  ):
+    if capabilities == interned:
+      return interned
+  return capabilities
+
+
+def dumps(
+    namespace: camel_value.Namespace,
+    base_namespace: camel_value.Namespace,
+    dependencies: tuple[camel_value.Value[Any], ...] = (),
+) -> bytes:
+  """Serializes the variables of `namespace` which are not in `base_namespace`.
+
+  Args:
+    namespace: The namespace to serialize.
+    base_namespace: The namespace `namespace` was built upon, e.g., the one
+      containing the built-ins and the tools.
+    dependencies: Dependencies of the control flow to store together with the
+      namespace.
+
+  Returns:
+    The compressed snapshot.
+
+  Raises:
+    SnapshotError: If some value can't be serialized.
+  """
+  encoder = _Encoder(base_namespace)
+  variables = {
+      name: encoder.ref(value)
+      for name, value in namespace.variables.items()
+      if base_namespace.variables.get(name) is not value
+  }
+  dependency_indices = [encoder.ref(value) for value in dependencies]
+  encoder.encode_pending()
+  try:
+    data = json.dumps(
+        {
+            "version": _VERSION,
+            "capabilities": encoder.capabilities,
+            "values": encoder.nodes,
+            "variables": variables,
+            "dependencies": dependency_indices,
+        },
+        separators=(",", ":"),
+    )
+  except TypeError as e:
+    raise SnapshotError(f"Invalid capabilities metadata: {e}") from e
+  return zlib.compress(data.encode())
+
+
+class _Decoder:
+  """Re-creates the values of a snapshot.
+
+  Values can't be created depending on the values they refer to, as mutable
+  containers can form cycles (e.g., a dict containing a value which depends on
+  the dict). So all the values are allocated first, and then initialized.
+  """
+
+  def __init__(
+      self, snapshot: dict[str, Any], base_namespace: camel_value.Namespace
+  ):
+    self._base_namespace = base_namespace
+    self._capabilities = [
+        _decode_capabilities(encoded) for encoded in snapshot["capabilities"]
+    ]
+    self._nodes: list[list[Any]] = snapshot["values"]
+    self._classes = self._make_classes()
+    self.values = [self._allocate(node) for node in self._nodes]
+    self.namespace = base_namespace
+
+  def _make_classes(self) -> dict[int, type[Any]]:
+    """Re-creates the Python types of the classes defined in CaMeL code."""
+    pending = {
+        index: node for index, node in enumerate(self._nodes)
+        if node[0] == _Tag.CLASS
+    }
+    types_by_definition: dict[tuple[str, str], type[Any]] = {}
+    classes: dict[str, camel_value.CaMeLClass[Any]] = {}
+    # Classes can refer to each other in their bases and field annotations, so
+    # they are evaluated until no more of them can be.
+    while pending:
+      for index, node in list(pending.items()):
+        _, _, _, name, definition, _ = node
+        if (name, definition) in types_by_definition:
+          del pending[index]
+          continue
+        eval_res = interpreter.camel_eval(
+            ast.parse(definition).body[0],
+            self._base_namespace.add_variables(classes),
+            call_chain.ToolCallsChain(),
+            (),
+            interpreter.EvalArgs(
+                security_policy.NoSecurityPolicyEngine(),
+                interpreter.DependenciesPropagationMode.NORMAL,
+            ),
+        )
+        if isinstance(eval_res.result, result.Ok):
+          camel_class = eval_res.result.value
+          classes[name] = camel_class
+          types_by_definition[(name, definition)] = camel_class.python_value
+          del pending[index]
+          break
+      else:
+        raise SnapshotError(
+            "Can't re-create the classes"
+            f" {', '.join(node[3] for node in pending.values())}"
+        )
+    return {
+        index: types_by_definition[(node[3], node[4])]
+        for index, node in enumerate(self._nodes)
+        if node[0] == _Tag.CLASS
+    }
+
+  def _allocate(self, node: list[Any]) -> Any:
+    match node[0]:
+      case _Tag.NAME:
+        return self._base_namespace.variables[node[1]]
+      case _Tag.PUBLIC:
+        return readers.Public()
+      case _Tag.CALLABLE:
+        return copy.copy(_resolve_callable(node[3], self._base_namespace))
+      case _Tag.NONE:
+        return camel_value.CaMeLNone.__new__(camel_value.CaMeLNone)
+      case _Tag.TRUE:
+        return camel_value.CaMeLTrue.__new__(camel_value.CaMeLTrue)
+      case _Tag.FALSE:
+        return camel_value.CaMeLFalse.__new__(camel_value.CaMeLFalse)
+      case _Tag.INT:
+        return camel_value.CaMeLInt.__new__(camel_value.CaMeLInt)
+      case _Tag.FLOAT:
+        return camel_value.CaMeLFloat.__new__(camel_value.CaMeLFloat)
+      case _Tag.CHAR:
+        return camel_value._Char.__new__(camel_value._Char)
+      case _Tag.STR:
+        return camel_value.CaMeLStr.__new__(camel_value.CaMeLStr)
+      case _Tag.TUPLE:
+        return camel_value.CaMeLTuple.__new__(camel_value.CaMeLTuple)
+      case _Tag.LIST:
+        return camel_value.CaMeLList.__new__(camel_value.CaMeLList)
+      case _Tag.RANGE:
+        return camel_value.CaMeLLazyList.__new__(camel_value.CaMeLLazyList)
+      case _Tag.SET:
+        return camel_value.CaMeLSet.__new__(camel_value.CaMeLSet)
+      case _Tag.DICT:
+        return camel_value.CaMeLDict.__new__(camel_value.CaMeLDict)
+      case _Tag.CLASS:
+        return camel_value.CaMeLClass.__new__(camel_value.CaMeLClass)
+      case _Tag.INSTANCE:
+        return camel_value.CaMeLClassInstance.__new__(
+            camel_value.CaMeLClassInstance
+        )
+      case _Tag.WRAPPER:
+        return camel_value.ValueAsWrapper.__new__(camel_value.ValueAsWrapper)
+      case tag:
+        raise SnapshotError(f"Invalid value tag {tag}")
+
+  def initialize(self) -> None:
+    """Initializes the allocated values."""
+    hashed = []
+    callables = []
+    for index, node in enumerate(self._nodes):
+      if node[0] in (_Tag.NAME, _Tag.PUBLIC):
+        continue
+      if node[0] in (_Tag.SET, _Tag.DICT):
+        # The elements must be initialized before being hashed.
+        hashed.append(index)
+      elif node[0] == _Tag.CALLABLE:
+        # The receiver must be initialized before being bound.
+        callables.append(index)
+      else:
+        self._initialize(index, node)
+    for index in hashed + callables:
+      self._initialize(index, self._nodes[index])
+
+  def _values(self, indices: list[int]) -> tuple[Any, ...]:
+    return tuple(self.values[index] for index in indices)
+
+  def _initialize(self, index: int, node: list[Any]) -> None:
+    value = self.values[index]
+    tag, capabilities_index, dependency_indices, *payload = node
+    capabilities = self._capabilities[capabilities_index]
+    dependencies = self._values(dependency_indices)
+    match tag:
+      case _Tag.NONE | _Tag.TRUE | _Tag.FALSE:
+        type(value).__init__(value, capabilities, dependencies)
+      case _Tag.INT | _Tag.FLOAT | _Tag.CHAR:
+        type(value).__init__(value, payload[0], capabilities, dependencies)
+      case _Tag.STR:
+        text, runs = payload
+        chars = []
+        for length, char_capabilities, char_dependencies in runs:
+          char_capabilities = self._capabilities[char_capabilities]
+          char_dependencies = self._values(char_dependencies)
+          for char in text[len(chars):len(chars) + length]:
+            chars.append(
+                camel_value._Char(char, char_capabilities, char_dependencies)
+            )
+        value.__init__(chars, capabilities, dependencies)
+      case _Tag.TUPLE:
+        value.__init__(self._values(payload[0]), capabilities, dependencies)
+      case _Tag.LIST | _Tag.SET:
+        elements, frozen = payload
+        value.__init__(self._values(elements), capabilities, dependencies)
+        value._frozen = frozen
+      case _Tag.RANGE:
+        start, stop, step, frozen = payload
+        value.__init__(
+            range(start, stop, step), capabilities, self.namespace, dependencies
+        )
+        value._frozen = frozen
+      case _Tag.DICT:
+        items, frozen = payload
+        value.__init__(
+            ((self.values[k], self.values[v]) for k, v in items),
+            capabilities,
+            dependencies,
+        )
+        value._frozen = frozen
+      case _Tag.CLASS:
+        name, definition, bases = payload
+        value.__init__(
+            name,
+            self._classes[index],
+            capabilities,
+            dependencies,
+            methods={},
+            base_classes=self._values(bases),
+            definition=definition,
+        )
+      case _Tag.CALLABLE:
+        _, receiver = payload
+        value._capabilities = capabilities
+        value.outer_dependencies = dependencies
+        if receiver is not None:
+          value.bind_recv(self.values[receiver])
+      case _Tag.INSTANCE:
+        class_index, fields, wrapped, frozen = payload
+        camel_class = self.values[class_index]
+        python_type = camel_class.python_value
+        field_values = {}
+        for name, field in (fields or {}).items():
+          if isinstance(field, int):
+            field_values[name] = self.values[field]
+          else:
+            field_values[name] = pydantic.TypeAdapter(
+                _field_types(python_type)[name]
+            ).validate_python(field[0])
+        if fields is None:
+          instance = _decode_wrapped(wrapped)
+        elif issubclass(python_type, pydantic.BaseModel):
+          instance = python_type.model_construct(**field_values)
+        else:
+          instance = object.__new__(python_type)
+          for name, field in field_values.items():
+            object.__setattr__(instance, name, field)
+        value.__init__(
+            instance, camel_class, capabilities, self.namespace, dependencies
+        )
+        value._frozen = frozen
+      case _Tag.WRAPPER:
+        value.__init__(
+            _decode_wrapped(payload[0]),
+            capabilities,
+            self.namespace,
+            dependencies,
+        )
+
+
+def loads(
+    data: bytes, base_namespace: camel_value.Namespace
+) -> tuple[camel_value.Namespace, tuple[camel_value.Value[Any], ...]]:
+  """Restores a snapshot created by `dumps`.
+
+  Args:
+    data: The snapshot.
+    base_namespace: The namespace passed to `dumps`, or an equivalent one
+      (e.g., with the same built-ins and tools, created by another process).
+
+  Returns:
+    The restored namespace and dependencies.
+
+  Raises:
+    SnapshotError: If the snapshot can't be restored.
+  """
+  try:
+    snapshot = json.loads(zlib.decompress(data))
+  except (zlib.error, ValueError) as e:
+    raise SnapshotError(f"Invalid snapshot: {e}") from e
+  if snapshot.get("version") != _VERSION:
+    raise SnapshotError(
+        f"Unsupported snapshot version {snapshot.get('version')}"
+    )
+  try:
+    decoder = _Decoder(snapshot, base_namespace)
+    decoder.namespace = base_namespace.add_variables({
+        name: decoder.values[index]
+        for name, index in snapshot["variables"].items()
+    })
+    decoder.initialize()
+  except KeyError as e:
+    raise SnapshotError(f"{e} is not in the base namespace") from e
+  return decoder.namespace, tuple(
+      decoder.values[index] for index in snapshot["dependencies"]
+  )
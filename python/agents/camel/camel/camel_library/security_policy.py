@@ -17,6 +17,7 @@
 import collections.abc
 import dataclasses
 import fnmatch
+import re
 import typing
 
 from .capabilities import readers
@@ -53,8 +54,9 @@ class SecurityPolicy(typing.Protocol):
 
 
 NO_SIDE_EFFECT_TOOLS = frozenset({
-    # Query AI assistant function
+    # Query AI assistant functions
     "query_ai_assistant",
+    "query_ai_assistant_batch",
 })
 
 
@@ -75,11 +77,10 @@ def base_security_policy(
   Returns:
     The result of the security policy check. Can be Allowed() or Denied().
   """
-  r = [capabilities_utils.get_all_readers(data) for data in kwargs.values()]
-  if (
-      any(reader != readers.Public() for reader in r)
-      and tool_name not in no_side_effect_tools
-  ):
+  if tool_name in no_side_effect_tools:
+    return Allowed()
+  # Stops at the first argument which is not public.
+  if not all(capabilities_utils.is_public(data) for data in kwargs.values()):
     return Denied("Data is not public.")
   return Allowed()
 
@@ -87,13 +88,99 @@ def base_security_policy(
 class SecurityPolicyDeniedError(Exception):
   ...
 
+
+class PolicyMatcher:
+  """Finds the first policy whose pattern matches a tool name.
+
+  Patterns without wildcards are looked up in a dict, and the others are
+  compiled into a single regular expression. The matched policy is cached per
+  tool name, so each name is only matched once.
+  """
+
+  def __init__(
+      self, policies: collections.abc.Sequence[tuple[str, SecurityPolicy]]
+  ):
+    self._policies = [policy for _, policy in policies]
+    self._exact_indices: dict[str, int] = {}
+    patterns = []
+    for i, (pattern, _) in enumerate(policies):
+      if any(c in pattern for c in "*?["):
+        patterns.append(f"(?P<p{i}>{fnmatch.translate(pattern)})")
+      else:
+        self._exact_indices.setdefault(pattern, i)
+    self._patterns = re.compile("|".join(patterns)) if patterns else None
+    self._cache: dict[str, SecurityPolicy | None] = {}
+
+  def match(self, tool_name: str) -> SecurityPolicy | None:
+    """Returns the first policy matching `tool_name`, if any."""
+    try:
+      return self._cache[tool_name]
+    except KeyError:
+      pass
+    indices = []
+    if (exact_index := self._exact_indices.get(tool_name)) is not None:
+      indices.append(exact_index)
+    # Alternatives are tried in order, so this is the first matching pattern.
+    if self._patterns is not None and (
+        m := self._patterns.match(tool_name)
+    ):
+      indices.append(int(m.lastgroup.removeprefix("p")))
+    policy = self._policies[min(indices)] if indices else None
+    self._cache[tool_name] = policy
+    return policy
+
+
+@dataclasses.dataclass(frozen=True)
+class DependenciesSummary:
+  """What the security policy engine needs to know about the dependencies."""
+
+  non_public_values: tuple[typing.Any, ...]
+  """The raw values of the dependencies that are not public."""
+
+
+def summarize_dependencies(
+    dependencies: collections.abc.Iterable[camel_value.Value],
+) -> DependenciesSummary:
+  """Returns the summary of `dependencies`.
+
+  Only the raw values of the non-public dependencies are computed. The values
+  can be mutated by the code evaluated between two calls, so the summary is
+  computed again for each call.
+
+  Args:
+    dependencies: The dependencies to summarize.
+
+  Returns:
+    The summary of the dependencies.
+  """
+  return DependenciesSummary(
+      tuple(
+          dependency.raw
+          for dependency in dependencies
+          if not capabilities_utils.is_public(dependency)
+      )
+  )
+
+
 @typing.runtime_checkable
 class SecurityPolicyEngine(typing.Protocol):
   """Protocol for a Security policy engine."""
 
-  policies: list[tuple[str, SecurityPolicy]]
   no_side_effect_tools: set[str]
 
+  @property
+  def policies(self) -> tuple[tuple[str, SecurityPolicy], ...]:
+    """The tool name patterns and their policies, in order."""
+    return self._policies
+
+  @policies.setter
+  def policies(
+      self, policies: collections.abc.Iterable[tuple[str, SecurityPolicy]]
+  ) -> None:
+    # Stored as a tuple, so that the policies can only be changed here.
+    self._policies = tuple(policies)
+    self._compiled_policies = None
+
   def check_policy(
       self,
       tool_name: str,
@@ -105,6 +192,13 @@ class SecurityPolicyEngine(typing.Protocol):
     Policies in `POLICIES` are evaluated in order. If any evaluates to
     Allowed(), then the tool is executed.
 
+    The readers computed while checking the dependencies and the policy are
+    cached, so a policy checking a value derived from the same data as the
+    dependencies does not traverse that data again.
+
+    The policies are compiled on first use, and again after a new sequence is
+    assigned to `policies`.
+
     Args:
         tool_name: The name of the tool being called.
         kwargs: The arguments to the tool.
@@ -115,19 +209,26 @@ class SecurityPolicyEngine(typing.Protocol):
     """
     if tool_name in self.no_side_effect_tools:
       return Allowed()
-    non_public_variables = [
-        d.raw for d in dependencies if not capabilities_utils.is_public(d)
-    ]
-    if non_public_variables:
-      return Denied(
-          f"{tool_name} is state-changing and depends on private values"
-          f" {non_public_variables}."
-      )
-    for policy_name, policy in self.policies:
-      if fnmatch.fnmatch(tool_name, policy_name):
+    with capabilities_utils.cached_readers():
+      dependencies_summary = summarize_dependencies(dependencies)
+      if dependencies_summary.non_public_values:
+        return Denied(
+            f"{tool_name} is state-changing and depends on private values"
+            f" {list(dependencies_summary.non_public_values)}."
+        )
+      policy = self._policy_matcher().match(tool_name)
+      if policy is not None:
         return policy(tool_name, kwargs)
     return Denied("No security policy matched for tool. Defaulting to denial.")
 
+  def _policy_matcher(self) -> PolicyMatcher:
+    """Returns the matcher for the current policies, compiling it if needed."""
+    matcher = getattr(self, "_compiled_policies", None)
+    if matcher is None:
+      matcher = PolicyMatcher(self.policies)
+      self._compiled_policies = matcher
+    return matcher
+
 
 class NoSecurityPolicyEngine(SecurityPolicyEngine):
   """A security policy engine that allows all tools and arguments."""
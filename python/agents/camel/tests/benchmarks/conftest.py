@@ -0,0 +1,104 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Fixtures for the interpreter benchmarks."""
+
+from collections.abc import Callable
+import tracemalloc
+from typing import Any
+
+from camel.camel_library import result
+from camel.camel_library.capabilities import capabilities
+from camel.camel_library.interpreter import camel_value
+from camel.camel_library.interpreter import interpreter
+from camel.camel_library.interpreter import library
+import pytest
+import stubs
+
+
+@pytest.fixture
+def namespace() -> camel_value.Namespace:
+  """The built-ins and the stub tools."""
+  return library.make_builtins_namespace({
+      tool.__name__: camel_value.CaMeLFunction(
+          tool.__name__,
+          tool,
+          capabilities.Capabilities.default(),
+          (),
+      )
+      for tool in (stubs.get_emails, stubs.get_config, stubs.send_email)
+  })
+
+
+@pytest.fixture(params=list(interpreter.DependenciesPropagationMode))
+def eval_args(request: pytest.FixtureRequest) -> interpreter.EvalArgs:
+  """The evaluation arguments, in each dependencies propagation mode."""
+  return interpreter.EvalArgs(
+      stubs.BenchmarkSecurityPolicyEngine(), request.param
+  )
+
+
+_peak_memory_bytes_by_test: dict[str, int] = {}
+
+
+def _peak_memory_bytes(function: Callable[[], Any]) -> int:
+  """Returns the peak memory allocated while calling `function`."""
+  tracemalloc.start()
+  try:
+    function()
+    return tracemalloc.get_traced_memory()[1]
+  finally:
+    tracemalloc.stop()
+
+
+@pytest.fixture
+def run_program(
+    request: pytest.FixtureRequest,
+    benchmark,
+    namespace: camel_value.Namespace,
+    eval_args: interpreter.EvalArgs,
+) -> Callable[[str], interpreter.EvalResult]:
+  """Benchmarks the interpretation of a program.
+
+  The peak memory is measured in a separate run, as tracing allocations slows
+  down the interpreter. It is saved in the `extra_info` of the benchmark and
+  reported at the end of the session.
+  """
+
+  def run(code: str) -> interpreter.EvalResult:
+    def interpret() -> interpreter.EvalResult:
+      return interpreter.parse_and_interpret_code(
+          code, namespace, [], (), eval_args
+      )
+
+    peak_memory_bytes = _peak_memory_bytes(interpret)
+    benchmark.extra_info["peak_memory_bytes"] = peak_memory_bytes
+    _peak_memory_bytes_by_test[request.node.name] = peak_memory_bytes
+    eval_result = benchmark(interpret)
+    assert isinstance(eval_result.result, result.Ok), eval_result.result
+    return eval_result
+
+  return run
+
+
+def pytest_terminal_summary(terminalreporter) -> None:
+  """Reports the peak memory of each benchmark."""
+  if not _peak_memory_bytes_by_test:
+    return
+  terminalreporter.section("peak memory")
+  width = max(map(len, _peak_memory_bytes_by_test))
+  for name, peak_memory_bytes in sorted(_peak_memory_bytes_by_test.items()):
+    terminalreporter.write_line(
+        f"{name:<{width}}  {peak_memory_bytes / 2**20:10.2f} MiB"
+    )
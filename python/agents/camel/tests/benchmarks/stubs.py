@@ -0,0 +1,85 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Stub tools and security policy engine for the interpreter benchmarks."""
+
+from collections.abc import Mapping
+from typing import Any
+
+from camel.camel_library import security_policy
+from camel.camel_library.capabilities import utils as capabilities_utils
+from camel.camel_library.interpreter import camel_value
+
+NUM_EMAILS = 200
+NUM_SERVICES = 100
+
+
+# ---- Stub tools ----
+def get_emails() -> list[dict[str, str]]:
+  """Returns the emails in the inbox."""
+  return [
+      {
+          "sender": f"user{i}@{'example.com' if i % 2 else 'other.org'}",
+          "subject": f"Subject {i}",
+          "body": f"Hello, this is email number {i}. " * 4,
+      }
+      for i in range(NUM_EMAILS)
+  ]
+
+
+def get_config() -> dict[str, Any]:
+  """Returns the configuration of the services."""
+  return {
+      "services": {
+          f"service-{i}": {
+              "owner": f"team{i % 7}@example.com",
+              "limits": {"cpu": i % 8 + 1, "memory": 256 * (i % 4 + 1)},
+          }
+          for i in range(NUM_SERVICES)
+      }
+  }
+
+
+def send_email(to: str, body: str) -> str:
+  """Sends an email."""
+  return f"Email sent to {to}: {len(body)} characters."
+
+
+# ---- End stub tools ----
+
+
+class BenchmarkSecurityPolicyEngine(security_policy.SecurityPolicyEngine):
+  """A security policy engine with the checks of a typical deployment."""
+
+  def __init__(self) -> None:
+    self.policies = [
+        ("get_*", self.allow_policy),
+        ("send_email", self.send_email_policy),
+        ("query_ai_assistant*", self.allow_policy),
+    ]
+    self.no_side_effect_tools = set()
+
+  def allow_policy(
+      self, tool_name: str, kwargs: Mapping[str, camel_value.Value]
+  ) -> security_policy.SecurityPolicyResult:
+    return security_policy.Allowed()
+
+  def send_email_policy(
+      self, tool_name: str, kwargs: Mapping[str, camel_value.Value]
+  ) -> security_policy.SecurityPolicyResult:
+    if capabilities_utils.can_readers_read_value(
+        {kwargs["to"].raw}, kwargs["body"]
+    ):
+      return security_policy.Allowed()
+    return security_policy.Denied("The body cannot be read by the recipient.")
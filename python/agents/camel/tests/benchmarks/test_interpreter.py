@@ -0,0 +1,97 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks of the interpreter on representative P-LLM programs.
+
+Each benchmark runs in both dependencies propagation modes. See the README for
+how to compare runs.
+"""
+
+import stubs
+
+COMPREHENSIONS = '''```python
+emails = get_emails()
+senders = [email["sender"] for email in emails if email["sender"].endswith("@example.com")]
+body_lengths = {email["subject"]: len(email["body"]) for email in emails}
+```'''
+
+NESTED_DICT_ACCESS = '''```python
+config = get_config()
+total_cpu = 0
+total_memory = 0
+for name in config["services"]:
+    limits = config["services"][name]["limits"]
+    total_cpu = total_cpu + limits["cpu"]
+    total_memory = total_memory + limits["memory"]
+```'''
+
+STRING_FORMATTING = '''```python
+emails = get_emails()
+lines = [f"{i}: {email['sender']} wrote about {email['subject'].upper()}" for i, email in enumerate(emails)]
+report = "\\n".join(lines)
+summary = "{} emails, the first one from {}".format(len(emails), emails[0]["sender"])
+```'''
+
+CLASS_INSTANTIATION = '''```python
+class Meeting(BaseModel):
+    title: str
+    attendees: list[str]
+    duration: int
+
+meetings = [Meeting(title=f"Meeting {i}", attendees=["a@example.com", "b@example.com"], duration=i % 60) for i in range(100)]
+total_duration = sum([meeting.duration for meeting in meetings])
+```'''
+
+TOOL_CALLS = '''```python
+emails = get_emails()
+for email in emails:
+    if email["sender"].endswith("@example.com"):
+        send_email(to="alice@example.com", body=email["body"])
+```'''
+
+
+def test_comprehensions(run_program):
+  eval_result = run_program(COMPREHENSIONS)
+  assert len(eval_result.namespace.variables["senders"].raw) == (
+      stubs.NUM_EMAILS // 2
+  )
+
+
+def test_nested_dict_access(run_program):
+  eval_result = run_program(NESTED_DICT_ACCESS)
+  assert eval_result.namespace.variables["total_cpu"].raw == sum(
+      i % 8 + 1 for i in range(stubs.NUM_SERVICES)
+  )
+
+
+def test_string_formatting(run_program):
+  eval_result = run_program(STRING_FORMATTING)
+  assert eval_result.namespace.variables["report"].raw.count("\n") == (
+      stubs.NUM_EMAILS - 1
+  )
+
+
+def test_class_instantiation(run_program):
+  eval_result = run_program(CLASS_INSTANTIATION)
+  assert eval_result.namespace.variables["total_duration"].raw == sum(
+      i % 60 for i in range(100)
+  )
+
+
+def test_tool_calls_with_security_policies(run_program):
+  eval_result = run_program(TOOL_CALLS)
+  assert (
+      sum(call.function == "send_email" for call in eval_result.tool_calls_chain)
+      == stubs.NUM_EMAILS // 2
+  )
@@ -0,0 +1,58 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the records of the tool calls."""
+
+from camel.camel_library import result
+from camel.camel_library import security_policy
+from camel.camel_library.interpreter import call_chain
+from camel.camel_library.interpreter import interpreter
+from camel.camel_library.interpreter import library
+
+
+def _function_calls(code: str):
+  eval_result = interpreter.parse_and_interpret_code(
+      f"```python\n{code}\n```",
+      library.make_builtins_namespace(),
+      [],
+      [],
+      interpreter.EvalArgs(
+          security_policy.NoSecurityPolicyEngine(),
+          interpreter.DependenciesPropagationMode.NORMAL,
+      ),
+  )
+  assert isinstance(eval_result.result, result.Ok), eval_result.result
+  return {call.function: call for call in eval_result.tool_calls_chain}
+
+
+def test_short_lazy_sequences_are_listed():
+  calls = _function_calls("len(range(3))")
+  assert calls["range"].output == [0, 1, 2]
+  assert calls["len"].args == {"0": [0, 1, 2]}
+
+
+def test_long_ranges_are_recorded_as_ranges():
+  calls = _function_calls("len(range(3000000))")
+  assert calls["range"].output == "range(0, 3000000)"
+  assert calls["len"].args == {"0": "range(0, 3000000)"}
+  assert calls["len"].output == 3000000
+
+
+def test_long_lazy_sequences_are_previewed():
+  n = call_chain.MAX_RECORDED_ELEMENTS + 1
+  calls = _function_calls(f"enumerate(range({n}))")
+  preview = calls["enumerate"].output
+  assert preview.startswith("[(0, 0), (1, 1), ")
+  assert preview.endswith(f", ...] ({n} elements)")
+  assert f"({n - 1}, {n - 1})" not in preview
@@ -0,0 +1,111 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the CaMeL values."""
+
+from camel.camel_library import result
+from camel.camel_library import security_policy
+from camel.camel_library.capabilities import capabilities
+from camel.camel_library.interpreter import camel_value
+from camel.camel_library.interpreter import interpreter
+from camel.camel_library.interpreter import library
+import pytest
+
+
+def _eval(code: str, mode: interpreter.DependenciesPropagationMode):
+  eval_result = interpreter.parse_and_interpret_code(
+      f"```python\n{code}\n```",
+      library.make_builtins_namespace({}),
+      [],
+      [],
+      interpreter.EvalArgs(security_policy.NoSecurityPolicyEngine(), mode),
+  )
+  assert isinstance(eval_result.result, result.Ok), eval_result.result
+  return eval_result.result.value
+
+
+@pytest.mark.parametrize(
+    "code, expected",
+    [
+        ('"service-10" == "service-1"', False),
+        ('"service-1" == "service-10"', False),
+        ('"service-1" == "service-1"', True),
+        ("[1, 2] == [1]", False),
+        ("[1] == [1, 2]", False),
+        ("(1, 2) == (1, 2)", True),
+        ('{"a": 1} == {"a": 1, "b": 2}', False),
+        ('{"a": 1, "b": 2} == {"a": 1}', False),
+        ('{"a": 1} == {"a": 1}', True),
+        ("list(range(3)) == [0, 1]", False),
+        ("list(range(2)) == [0, 1]", True),
+    ],
+)
+@pytest.mark.parametrize("mode", list(interpreter.DependenciesPropagationMode))
+def test_equality_compares_lengths(
+    code: str, expected: bool, mode: interpreter.DependenciesPropagationMode
+):
+  assert _eval(code, mode).raw is expected
+
+
+def test_dict_lookup_does_not_match_prefix_keys():
+  value = _eval(
+      'services = {"service-1": "one", "service-10": "ten"}\n'
+      'services["service-10"]',
+      interpreter.DependenciesPropagationMode.NORMAL,
+  )
+  assert value.raw == "ten"
+
+
+def _int(value: int, dependencies=()) -> camel_value.CaMeLInt:
+  return camel_value.CaMeLInt(
+      value, capabilities.Capabilities.camel(), dependencies
+  )
+
+
+def test_accumulator_adds_each_dependency_once():
+  first, equal_to_first = _int(1), _int(1)
+  accumulator = camel_value.DependencyAccumulator()
+  accumulator.add([first, first, equal_to_first])
+  accumulator.add([equal_to_first])
+  assert [id(d) for d in accumulator.dependencies] == [
+      id(first),
+      id(equal_to_first),
+  ]
+  assert accumulator.visit(first)
+  assert not accumulator.visit(first)
+
+
+def test_dependencies_of_nested_containers_are_not_repeated():
+  source = _int(0)
+  element = _int(1, (source,))
+  inner = camel_value.CaMeLList(
+      [element, element], capabilities.Capabilities.camel(), (source,)
+  )
+  outer = camel_value.CaMeLList(
+      [inner, inner, element], capabilities.Capabilities.camel(), (inner,)
+  )
+  dependencies, visited_objects = outer.get_dependencies()
+  assert [id(d) for d in dependencies] == [id(inner), id(source)]
+  assert {id(outer), id(inner), id(element)} <= visited_objects
+
+
+def test_dependencies_of_self_referencing_containers_are_collected():
+  source = _int(0)
+  container = camel_value.CaMeLList(
+      [_int(1, (source,))], capabilities.Capabilities.camel(), ()
+  )
+  container.python_value.append(container)
+  container.outer_dependencies = (container,)
+  dependencies, _ = container.get_dependencies()
+  assert [id(d) for d in dependencies] == [id(container), id(source)]
@@ -0,0 +1,76 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the capabilities."""
+
+import copy
+import pickle
+
+from camel.camel_library.capabilities import capabilities
+from camel.camel_library.capabilities import readers
+from camel.camel_library.capabilities import sources
+import pytest
+
+Capabilities = capabilities.Capabilities
+
+
+@pytest.mark.parametrize("shared", [Capabilities.default, Capabilities.camel])
+def test_shared_capabilities_have_read_only_metadata(shared):
+  assert shared() is shared()
+  with pytest.raises(TypeError):
+    shared().other_metadata["key"] = "value"
+  assert not shared().other_metadata
+
+
+@pytest.mark.parametrize("shared", [Capabilities.default, Capabilities.camel])
+def test_shared_capabilities_can_be_copied(shared):
+  for copied in (copy.deepcopy(shared()), pickle.loads(pickle.dumps(shared()))):
+    assert copied == shared()
+    assert hash(copied) == hash(shared())
+
+
+def test_hash_follows_metadata():
+  metadata = {}
+  value_capabilities = Capabilities(
+      frozenset({sources.SourceEnum.USER}), readers.Public(), metadata
+  )
+  hash_before = hash(value_capabilities)
+  metadata["key"] = "value"
+  assert hash(value_capabilities) != hash_before
+  assert hash(value_capabilities) == hash(
+      Capabilities(
+          frozenset({sources.SourceEnum.USER}),
+          readers.Public(),
+          {"key": "value"},
+      )
+  )
+
+
+@pytest.mark.parametrize("shared", [Capabilities.default, Capabilities.camel])
+def test_shared_capabilities_cache_their_hash(shared):
+  assert shared().__dict__["_hash"] == hash(
+      Capabilities(shared().sources_set, readers.Public(), {})
+  )
+  assert "_hash" not in pickle.loads(pickle.dumps(shared())).__dict__
+
+
+def test_tool_sources_cache_their_hash():
+  tool = sources.Tool("send_email", frozenset({"alice@example.com"}))
+  assert hash(tool) == hash(
+      sources.Tool("send_email", frozenset({"alice@example.com"}))
+  )
+  assert tool.__dict__["_hash"] == hash(tool)
+  copied = pickle.loads(pickle.dumps(tool))
+  assert "_hash" not in copied.__dict__
+  assert copied == tool
@@ -0,0 +1,208 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the readers of the values and the security policies using them.
+
+The results are compared with a direct recursive computation of the readers of
+the dependency closure of each value.
+"""
+
+from camel.camel_library import result
+from camel.camel_library import security_policy
+from camel.camel_library.capabilities import capabilities
+from camel.camel_library.capabilities import readers
+from camel.camel_library.capabilities import utils as capabilities_utils
+from camel.camel_library.interpreter import camel_value
+from camel.camel_library.interpreter import interpreter
+from camel.camel_library.interpreter import library
+import pytest
+
+
+def _reference_readers(value, visited_objects=frozenset()):
+  value_capabilities = value.capabilities
+  if value_capabilities is None:
+    return frozenset(), frozenset()
+  value_readers = value_capabilities.readers_set
+  if id(value) in visited_objects:
+    return value_readers, visited_objects
+  for dependency in value.get_dependencies()[0]:
+    if dependency == readers.Public():
+      continue
+    dependency_readers, visited_objects = _reference_readers(
+        dependency, visited_objects | {id(value)}
+    )
+    value_readers &= dependency_readers
+  return value_readers, visited_objects | {id(value)}
+
+
+def _reference_is_public(value) -> bool:
+  value_readers = _reference_readers(value)[0]
+  if isinstance(value_readers, frozenset):
+    return readers.Public() in value_readers
+  return value_readers == readers.Public()
+
+
+def _reference_can_read(potential_readers, value) -> bool:
+  value_readers = _reference_readers(value)[0]
+  if isinstance(value_readers, readers.Public):
+    return True
+  return potential_readers.issubset(value_readers)
+
+
+def _reference_policy(tool_name, kwargs, no_side_effect_tools):
+  if tool_name in no_side_effect_tools or all(
+      _reference_is_public(value) for value in kwargs.values()
+  ):
+    return security_policy.Allowed()
+  return security_policy.Denied("Data is not public.")
+
+
+def _secret(name, secret_readers):
+  return camel_value.CaMeLFunction(
+      name,
+      lambda: name,
+      capabilities.Capabilities(frozenset(), frozenset(secret_readers)),
+      (),
+  )
+
+
+_BASE_NAMESPACE = library.make_builtins_namespace({
+    "for_alice": _secret("for_alice", {"alice"}),
+    "for_alice_and_bob": _secret("for_alice_and_bob", {"alice", "bob"}),
+})
+
+_PROGRAMS = {
+    "public": 'a = "text"\nb = [1, 2]\nc = {"k": b}\nd = len(a) + 1',
+    "private": (
+        "a = for_alice()\n"
+        "b = for_alice_and_bob()\n"
+        "c = a + b\n"
+        'd = b + "public"\n'
+        "e = len(a)\n"
+        "f = 1"
+    ),
+    "nested": (
+        "a = for_alice_and_bob()\n"
+        'inner = {"k": a, "p": 1}\n'
+        'outer = [inner, ["x", (a, "y")]]\n'
+        'public = [{"k": 1}, ["x"]]\n'
+        'inner["p"] = for_alice()\n'
+        'words = [w for w in outer[1] if w != "x"]'
+    ),
+    "control_flow": (
+        'a = for_alice()\nb = "public"\nif a == "for_alice":\n'
+        '  c = [b]\n  d = {"k": c}\n'
+        "e = [x for x in range(3) if a]"
+    ),
+}
+
+_EVAL_MODES = tuple(interpreter.DependenciesPropagationMode)
+
+
+def _variables(code, eval_mode):
+  eval_result = interpreter.parse_and_interpret_code(
+      f"```python\n{code}\n```",
+      _BASE_NAMESPACE,
+      [],
+      [],
+      interpreter.EvalArgs(security_policy.NoSecurityPolicyEngine(), eval_mode),
+  )
+  assert isinstance(eval_result.result, result.Ok), eval_result.result
+  variables = {
+      name: value
+      for name, value in eval_result.namespace.variables.items()
+      if _BASE_NAMESPACE.variables.get(name) is not value
+  }
+  assert variables
+  return variables
+
+
+@pytest.mark.parametrize("eval_mode", _EVAL_MODES)
+@pytest.mark.parametrize("program", sorted(_PROGRAMS))
+@pytest.mark.parametrize("cached", [False, True])
+def test_predicates_match_the_reference(program, eval_mode, cached):
+  variables = _variables(_PROGRAMS[program], eval_mode)
+  potential_readers = ({"alice"}, {"bob"}, {"alice", "bob"}, {"carol"}, set())
+  expected = {
+      name: (
+          _reference_is_public(value),
+          [_reference_can_read(r, value) for r in potential_readers],
+      )
+      for name, value in variables.items()
+  }
+  if cached:
+    # All the predicates are evaluated with the same cache, in both orders.
+    with capabilities_utils.cached_readers():
+      actual = {}
+      for name, value in variables.items():
+        can_read = [
+            capabilities_utils.can_readers_read_value(r, value)
+            for r in potential_readers
+        ]
+        actual[name] = (capabilities_utils.is_public(value), can_read)
+      for name, value in reversed(variables.items()):
+        assert capabilities_utils.is_public(value) == actual[name][0], name
+  else:
+    actual = {
+        name: (
+            capabilities_utils.is_public(value),
+            [
+                capabilities_utils.can_readers_read_value(r, value)
+                for r in potential_readers
+            ],
+        )
+        for name, value in variables.items()
+    }
+  assert actual == expected
+  assert any(is_public for is_public, _ in expected.values())
+  if program != "public":
+    assert not all(is_public for is_public, _ in expected.values())
+
+
+@pytest.mark.parametrize("eval_mode", _EVAL_MODES)
+@pytest.mark.parametrize("program", sorted(_PROGRAMS))
+def test_base_security_policy_matches_the_reference(program, eval_mode):
+  variables = _variables(_PROGRAMS[program], eval_mode)
+  for name, value in variables.items():
+    for no_side_effect_tools in (set(), {"send"}):
+      kwargs = {"x": value, "y": variables[next(iter(variables))]}
+      assert security_policy.base_security_policy(
+          "send", kwargs, no_side_effect_tools
+      ) == _reference_policy("send", kwargs, no_side_effect_tools), name
+
+
+def test_denial_names_all_the_private_dependencies():
+  variables = _variables(
+      _PROGRAMS["private"], interpreter.DependenciesPropagationMode.NORMAL
+  )
+  dependencies = [variables[name] for name in ("a", "d", "e")]
+  summary = security_policy.summarize_dependencies(dependencies)
+  assert summary.non_public_values == (
+      "for_alice",
+      "for_alice_and_bobpublic",
+      9,
+  )
+
+  class _Engine(security_policy.SecurityPolicyEngine):
+
+    def __init__(self):
+      self.policies = []
+      self.no_side_effect_tools = set()
+
+  assert _Engine().check_policy("send", {}, dependencies) == (
+      security_policy.Denied(
+          "send is state-changing and depends on private values"
+          " ['for_alice', 'for_alice_and_bobpublic', 9]."
+      )
+  )
@@ -0,0 +1,205 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the concurrent evaluation of comprehensions."""
+
+import collections
+import concurrent.futures
+import threading
+import time
+
+from camel.camel_library import result
+from camel.camel_library import security_policy
+from camel.camel_library.capabilities import capabilities
+from camel.camel_library.capabilities import utils as capabilities_utils
+from camel.camel_library.interpreter import camel_value
+from camel.camel_library.interpreter import interpreter
+from camel.camel_library.interpreter import library
+import pytest
+
+
+class _PublicArgumentsPolicyEngine(security_policy.SecurityPolicyEngine):
+  """Denies calling `send` with non-public arguments."""
+
+  def __init__(self):
+    self.policies = [
+        ("send", self._send_policy),
+        ("*", lambda tool_name, kwargs: security_policy.Allowed()),
+    ]
+    self.no_side_effect_tools = security_policy.NO_SIDE_EFFECT_TOOLS
+
+  @staticmethod
+  def _send_policy(tool_name, kwargs):
+    if all(capabilities_utils.is_public(v) for v in kwargs.values()):
+      return security_policy.Allowed()
+    return security_policy.Denied(f"{tool_name} with non-public data")
+
+
+class _Tools:
+  """Tools recording their calls."""
+
+  def __init__(self):
+    self.sent = []
+    self.queried = []
+    self._lock = threading.Lock()
+    self._in_flight = 0
+    self.max_in_flight = 0
+    # Events an answer waits for, and events set once a query is answered.
+    self.waits_for: dict[str, threading.Event] = {}
+    self.answered = collections.defaultdict(threading.Event)
+
+  def get_secret(self) -> str:
+    """Returns a secret."""
+    return "secret"
+
+  def send(self, x: str) -> str:
+    """Sends `x`."""
+    time.sleep(0.01)
+    with self._lock:
+      self.sent.append(x)
+    return x
+
+  def query_ai_assistant(self, query: str) -> str:
+    """Answers `query`."""
+    with self._lock:
+      self._in_flight += 1
+      self.max_in_flight = max(self.max_in_flight, self._in_flight)
+    if query in self.waits_for:
+      self.waits_for[query].wait()
+    else:
+      time.sleep(0.05)
+    with self._lock:
+      self._in_flight -= 1
+      self.queried.append(query)
+    self.answered[query].set()
+    if query == "fail":
+      raise ValueError("Cannot answer")
+    return query.upper()
+
+  def namespace(self) -> camel_value.Namespace:
+    return library.make_builtins_namespace({
+        "get_secret": camel_value.CaMeLFunction(
+            "get_secret",
+            self.get_secret,
+            capabilities.Capabilities(frozenset(), frozenset({"alice"})),
+            (),
+        ),
+        "send": camel_value.CaMeLFunction(
+            "send", self.send, capabilities.Capabilities.camel(), ()
+        ),
+        "query_ai_assistant": camel_value.CaMeLFunction(
+            "query_ai_assistant",
+            self.query_ai_assistant,
+            capabilities.Capabilities.camel(),
+            (),
+        ),
+    })
+
+
+def _set_event() -> threading.Event:
+  event = threading.Event()
+  event.set()
+  return event
+
+
+def _eval(tools: _Tools, code: str, max_concurrency: int):
+  return interpreter.parse_and_interpret_code(
+      f"```python\n{code}\n```",
+      tools.namespace(),
+      [],
+      [],
+      interpreter.EvalArgs(
+          _PublicArgumentsPolicyEngine(),
+          interpreter.DependenciesPropagationMode.NORMAL,
+          max_concurrency=max_concurrency,
+      ),
+  )
+
+
+def test_side_effect_free_calls_run_concurrently_in_order():
+  tools = _Tools()
+  eval_result = _eval(
+      tools,
+      'answers = [query_ai_assistant(query=x) for x in ["a", "b", "c", "d"]]\n'
+      "answers",
+      max_concurrency=4,
+  )
+  assert isinstance(eval_result.result, result.Ok), eval_result.result
+  assert eval_result.result.value.raw == ["A", "B", "C", "D"]
+  assert tools.max_in_flight > 1
+  assert [call.args["query"] for call in eval_result.tool_calls_chain] == [
+      "a",
+      "b",
+      "c",
+      "d",
+  ]
+
+
+def test_policy_violation_stops_following_side_effects():
+  tools = _Tools()
+  with pytest.raises(security_policy.SecurityPolicyDeniedError):
+    _eval(
+        tools,
+        "s = get_secret()\n"
+        '[send(x) for x in ["a", s, "c", "d", "e"]]',
+        max_concurrency=4,
+    )
+  assert tools.sent == ["a"]
+
+
+def test_every_call_that_ran_is_recorded_in_order_on_failure():
+  tools = _Tools()
+  # "a" is answered after "b", and "fail" fails once both are answered.
+  tools.waits_for = {"a": tools.answered["b"], "fail": _set_event()}
+  eval_result = _eval(
+      tools,
+      '[query_ai_assistant(query=x) for x in ["a", "b", "fail"]]',
+      max_concurrency=2,
+  )
+  assert isinstance(eval_result.result, result.Error)
+  assert tools.queried.index("b") < tools.queried.index("a")
+  # As when evaluating sequentially, the calls are recorded in order and the
+  # failed call is not in the chain.
+  assert [call.args["query"] for call in eval_result.tool_calls_chain] == [
+      "a",
+      "b",
+  ]
+
+
+def test_iterations_not_started_are_cancelled_on_failure(monkeypatch):
+  tools = _Tools()
+  # "b" and "c" keep the workers busy until the evaluation stops waiting for
+  # them, so "d" can only start if it is not cancelled after "fail" fails.
+  released = threading.Event()
+  tools.waits_for = {"fail": _set_event(), "b": released, "c": released}
+
+  class ReleasingExecutor(concurrent.futures.ThreadPoolExecutor):
+
+    def shutdown(self, *args, **kwargs):
+      released.set()
+      super().shutdown(*args, **kwargs)
+
+  monkeypatch.setattr(
+      concurrent.futures, "ThreadPoolExecutor", ReleasingExecutor
+  )
+  eval_result = _eval(
+      tools,
+      '[query_ai_assistant(query=x) for x in ["fail", "b", "c", "d"]]',
+      max_concurrency=2,
+  )
+  assert isinstance(eval_result.result, result.Error)
+  assert "d" not in tools.queried
+  assert [call.args["query"] for call in eval_result.tool_calls_chain] == [
+      query for query in ["b", "c"] if query in tools.queried
+  ]
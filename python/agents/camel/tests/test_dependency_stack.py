@@ -0,0 +1,57 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the stack of the dependencies of the control flow."""
+
+from camel.camel_library.interpreter import dependency_stack
+import pytest
+
+
+def _ids(stack):
+  return [id(value) for value in stack]
+
+
+def test_push_and_extend_keep_the_order():
+  first, second, third = [1], [1], [1]
+  stack = dependency_stack.DependencyStack().push(first)
+  extended = stack.extend([second, third])
+  assert _ids(extended) == [id(first), id(second), id(third)]
+  assert len(extended) == 3
+  # Previous versions are not changed.
+  assert _ids(stack) == [id(first)]
+  assert len(dependency_stack.DependencyStack()) == 0
+
+
+def test_of_does_not_copy_stacks():
+  stack = dependency_stack.DependencyStack.of([[1], [2]])
+  assert dependency_stack.DependencyStack.of(stack) is stack
+  assert list(stack) == [[1], [2]]
+
+
+def test_remove_compares_by_identity():
+  first, second, third = [1], [1], [1]
+  stack = dependency_stack.DependencyStack.of([first, second, third])
+  assert _ids(stack.remove(second)) == [id(first), id(third)]
+  assert _ids(stack.remove(first)) == [id(second), id(third)]
+  assert _ids(stack) == [id(first), id(second), id(third)]
+  with pytest.raises(ValueError):
+    stack.remove([1])
+
+
+def test_remove_takes_the_most_recently_pushed_value():
+  value, other = [1], [2]
+  stack = dependency_stack.DependencyStack.of([value, other, value])
+  removed = stack.remove(value)
+  assert _ids(removed) == [id(value), id(other)]
+  assert _ids(removed.remove(value)) == [id(other)]
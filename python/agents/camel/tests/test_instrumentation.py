@@ -0,0 +1,131 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the execution budgets and the profiler of the interpreter."""
+
+import ast
+import tracemalloc
+
+from camel.camel_library import result
+from camel.camel_library import security_policy
+from camel.camel_library.capabilities import capabilities
+from camel.camel_library.interpreter import camel_value
+from camel.camel_library.interpreter import instrumentation
+from camel.camel_library.interpreter import interpreter
+from camel.camel_library.interpreter import library
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _not_tracing():
+  assert not tracemalloc.is_tracing()
+  yield
+  assert not tracemalloc.is_tracing()
+
+
+def _eval(code: str, **eval_args_kwargs):
+  namespace = library.make_builtins_namespace({
+      "double": camel_value.CaMeLFunction(
+          "double", lambda x: 2 * x, capabilities.Capabilities.camel(), ()
+      ),
+  })
+  return interpreter.parse_and_interpret_code_with_stats(
+      f"```python\n{code}\n```",
+      namespace,
+      [],
+      [],
+      interpreter.EvalArgs(
+          security_policy.NoSecurityPolicyEngine(),
+          interpreter.DependenciesPropagationMode.NORMAL,
+          **eval_args_kwargs,
+      ),
+  )
+
+
+def _assert_budget_exceeded(eval_result, message):
+  assert isinstance(eval_result.result, result.Error)
+  exception = eval_result.result.error.exception
+  assert isinstance(exception, instrumentation.ExecutionBudgetExceededError)
+  assert message in str(exception)
+
+
+def test_no_stats_without_budget_or_collection():
+  eval_result, stats = _eval("double(1)")
+  assert eval_result.result.value.raw == 2
+  assert stats is None
+
+
+def test_stats_count_nodes_and_tool_calls():
+  eval_result, stats = _eval(
+      "[double(x) for x in [1, 2, 3]]", collect_stats=True
+  )
+  assert eval_result.result.value.raw == [2, 4, 6]
+  assert stats.steps == sum(stats.node_counts.values())
+  assert stats.node_counts["ListComp"] == 1
+  assert stats.tool_call_counts == {"double": 3}
+  assert set(stats.tool_call_seconds) == {"double"}
+  assert stats.peak_allocated_bytes is None
+
+
+def test_step_budget_stops_the_evaluation():
+  budget = instrumentation.ExecutionBudget(max_steps=10)
+  eval_result, stats = _eval(
+      "[double(x) for x in [1, 2, 3, 4, 5, 6, 7, 8]]",
+      execution_budget=budget,
+  )
+  _assert_budget_exceeded(eval_result, "budget of 10 evaluation steps")
+  assert stats.steps == 11
+
+
+def test_time_budget_stops_the_evaluation():
+  budget = instrumentation.ExecutionBudget(max_seconds=0)
+  eval_result, _ = _eval("double(1)", execution_budget=budget)
+  _assert_budget_exceeded(eval_result, "budget of 0 seconds")
+
+
+def test_memory_budget_stops_the_evaluation():
+  budget = instrumentation.ExecutionBudget(max_allocated_bytes=100_000)
+  eval_result, stats = _eval(
+      "[str(x) for x in range(100000)]", execution_budget=budget
+  )
+  _assert_budget_exceeded(eval_result, "budget of 100000 allocated bytes")
+  assert stats.peak_allocated_bytes > 100_000
+
+
+def test_overlapping_profilers_keep_tracing_until_the_last_one_stops():
+  budget = instrumentation.ExecutionBudget(max_allocated_bytes=1 << 30)
+  first = instrumentation.Profiler(budget)
+  second = instrumentation.Profiler(budget)
+  first.start()
+  second.start()
+  first.stop()
+  assert tracemalloc.is_tracing()
+  allocated = [bytearray(1 << 20)]
+  second.enter_node(ast.Pass())
+  assert second.stop().peak_allocated_bytes >= 1 << 20
+  assert not tracemalloc.is_tracing()
+  del allocated
+
+
+def test_tracing_started_elsewhere_is_not_stopped():
+  tracemalloc.start()
+  try:
+    profiler = instrumentation.Profiler(
+        instrumentation.ExecutionBudget(max_allocated_bytes=1 << 30)
+    )
+    profiler.start()
+    profiler.stop()
+    assert tracemalloc.is_tracing()
+  finally:
+    tracemalloc.stop()
@@ -0,0 +1,82 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the extraction of the output printed by executed code."""
+
+from camel.camel_agent import camel_agent
+from camel.camel_agent import utils
+from camel.camel_library import function_types
+from camel.camel_library import security_policy
+from camel.camel_library.interpreter import interpreter
+
+
+def _call(function: str, **args) -> function_types.FunctionCall:
+  return function_types.FunctionCall(
+      function=function,
+      object_type=None,
+      args=args,
+      output=None,
+      is_builtin=function == "print",
+  )
+
+
+def test_print_output_starts_at_the_given_call():
+  tool_calls = [
+      _call("print", value="first"),
+      _call("send", value="ignored"),
+      _call("print", value="second"),
+  ]
+  assert utils.extract_print_output(tool_calls) == "firstsecond"
+  assert utils.extract_print_output(tool_calls, start=1) == "second"
+  assert utils.extract_print_output(tool_calls, start=3) == ""
+  assert utils.extract_print_output([]) == ""
+
+
+def _make_service() -> camel_agent.CaMelInterpreterService:
+  return camel_agent.CaMelInterpreterService(
+      "gemini-2.5-flash",
+      [],
+      interpreter.EvalArgs(
+          security_policy.NoSecurityPolicyEngine(),
+          interpreter.DependenciesPropagationMode.NORMAL,
+      ),
+  )
+
+
+def _execute(service, code, tool_calls_chain, dependencies=()):
+  output, tool_calls, error, _, dependencies = service.execute_code(
+      f"```python\n{code}\n```", tool_calls_chain, dependencies
+  )
+  assert error is None, error
+  return output, tool_calls, dependencies
+
+
+def test_each_execution_only_returns_its_own_output():
+  service = _make_service()
+
+  output, tool_calls, dependencies = _execute(service, 'print("first")', [])
+  assert output == "first"
+
+  output, tool_calls, _ = _execute(
+      service, 'print("second")', tool_calls, dependencies
+  )
+  assert output == "second"
+  assert [call.function for call in tool_calls] == ["print", "print"]
+
+
+def test_execution_after_an_empty_chain_returns_all_its_output():
+  service = _make_service()
+  output, tool_calls, _ = _execute(service, 'print("a")\nprint("b")', [])
+  assert output == "ab"
+  assert len(tool_calls) == 2
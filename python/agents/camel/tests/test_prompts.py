@@ -0,0 +1,143 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the system prompt of the Privileged LLM."""
+
+import collections
+import inspect
+
+from camel.camel_agent import prompts
+from camel.camel_library.interpreter import camel_value
+from camel.camel_library.interpreter import library
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def generated_prompts(monkeypatch):
+  """Empties the prompt cache and records the prompts generated."""
+  monkeypatch.setattr(prompts, "_cached_prompts", collections.OrderedDict())
+  generated = []
+  generate = prompts.generate_camel_system_prompt
+
+  def recording_generate(functions, classes_to_exclude=frozenset()):
+    generated.append(([f.name for f in functions], classes_to_exclude))
+    return generate(functions, classes_to_exclude)
+
+  monkeypatch.setattr(
+      prompts, "generate_camel_system_prompt", recording_generate
+  )
+  return generated
+
+
+def _make_send():
+  def send(recipient: str, body: str) -> None:
+    """Sends a message.
+
+    Args:
+      recipient: The recipient of the message.
+      body: The body of the message.
+    """
+    del recipient, body  # Unused.
+
+  return send
+
+
+def test_same_tools_hit_the_cache(generated_prompts):
+  send = _make_send()
+  prompt = prompts.get_camel_system_prompt([send], frozenset({"date"}))
+  # Equal tools and excluded classes, but not the same objects.
+  assert (
+      prompts.get_camel_system_prompt([_make_send()], frozenset({"date"}))
+      is prompt
+  )
+  assert generated_prompts == [(["send"], frozenset({"date"}))]
+  assert "def send(" in prompt
+
+
+def test_changed_signature_renders_a_new_prompt(generated_prompts):
+  send = _make_send()
+  prompt = prompts.get_camel_system_prompt([send])
+  signature = inspect.signature(send)
+  send.__signature__ = signature.replace(
+      parameters=[
+          parameter.replace(annotation=int)
+          if parameter.name == "body"
+          else parameter
+          for parameter in signature.parameters.values()
+      ]
+  )
+  new_prompt = prompts.get_camel_system_prompt([send])
+  assert new_prompt != prompt
+  assert "body: int" in new_prompt
+  assert len(generated_prompts) == 2
+
+
+def test_changed_docstring_renders_a_new_prompt(generated_prompts):
+  send = _make_send()
+  prompt = prompts.get_camel_system_prompt([send])
+  send.__doc__ = send.__doc__.replace("Sends a message.", "Posts a letter.")
+  new_prompt = prompts.get_camel_system_prompt([send])
+  assert new_prompt != prompt
+  assert "Posts a letter." in new_prompt
+  assert len(generated_prompts) == 2
+
+
+def test_changed_excluded_classes_render_a_new_prompt(generated_prompts):
+  send = _make_send()
+  prompt = prompts.get_camel_system_prompt([send])
+  new_prompt = prompts.get_camel_system_prompt(
+      [send], frozenset({"datetime"})
+  )
+  assert new_prompt != prompt
+  assert len(generated_prompts) == 2
+
+
+def test_oldest_prompt_is_evicted(generated_prompts):
+  def get_prompt(i):
+    return prompts.get_camel_system_prompt([], frozenset({f"Class{i}"}))
+
+  for i in range(prompts._MAX_CACHED_PROMPTS):
+    get_prompt(i)
+  # Using the first prompt makes the second one the oldest.
+  get_prompt(0)
+  assert len(generated_prompts) == prompts._MAX_CACHED_PROMPTS
+  get_prompt(prompts._MAX_CACHED_PROMPTS)
+  assert len(prompts._cached_prompts) == prompts._MAX_CACHED_PROMPTS
+
+  get_prompt(0)
+  assert len(generated_prompts) == prompts._MAX_CACHED_PROMPTS + 1
+  get_prompt(1)
+  assert len(generated_prompts) == prompts._MAX_CACHED_PROMPTS + 2
+  assert generated_prompts[-1] == ([], frozenset({"Class1"}))
+
+
+def test_built_in_sections_are_rendered_as_before():
+  # The precomputed sections match the functions the prompt used to call.
+  assert prompts._BUILT_IN_FUNCTIONS_LIST == (
+      prompts._get_available_functions_list(library.BUILT_IN_FUNCTIONS)
+  )
+  assert prompts._BUILT_IN_METHODS_LIST == (
+      prompts._get_available_methods_list(
+          camel_value.SUPPORTED_BUILT_IN_METHODS
+      )
+  )
+  for classes_to_exclude in [frozenset(), frozenset({"datetime", "date"})]:
+    assert prompts._get_built_in_classes_list(classes_to_exclude) == (
+        prompts._get_available_classes_list(
+            library.BUILT_IN_CLASSES, classes_to_exclude
+        )
+    )
+  prompt = prompts.get_camel_system_prompt([_make_send()])
+  assert prompts._BUILT_IN_FUNCTIONS_LIST in prompt
+  assert prompts._BUILT_IN_METHODS_LIST in prompt
@@ -0,0 +1,247 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the caches of Q-LLM responses."""
+
+import asyncio
+import concurrent.futures
+import gc
+import sqlite3
+import weakref
+
+from camel.camel_agent import camel_agent
+from camel.camel_agent import qllm_cache
+from camel.camel_library import result
+from camel.camel_library import security_policy
+from camel.camel_library.capabilities import capabilities
+from camel.camel_library.capabilities import utils as capabilities_utils
+from camel.camel_library.interpreter import camel_value
+from camel.camel_library.interpreter import interpreter
+from camel.camel_library.interpreter import library
+from google.adk.events import event
+from google.genai import types
+import pydantic.v1
+import pytest
+
+
+def test_sqlite_cache_closes_the_connections_of_all_threads(tmp_path):
+  cache = qllm_cache.SqliteQLlmCache(str(tmp_path / "cache.db"))
+  cache.set("key", "response")
+  with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+    assert list(executor.map(cache.get, ["key", "key"])) == [
+        "response",
+        "response",
+    ]
+  connections = list(cache._connections)  # pylint: disable=protected-access
+  assert connections
+
+  cache.close()
+
+  for connection in connections:
+    with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+      connection.execute("SELECT 1")
+  # The cache reopens a connection when used after being closed.
+  assert cache.get("key") == "response"
+  cache.close()
+
+
+class _FakeClock:
+  """A clock that only moves forward when told to."""
+
+  def __init__(self):
+    self.now = 1_000.0
+
+  def __call__(self) -> float:
+    return self.now
+
+  def advance(self, seconds: float) -> None:
+    self.now += seconds
+
+
+@pytest.fixture(name="clock")
+def _clock(monkeypatch):
+  clock = _FakeClock()
+  monkeypatch.setattr(qllm_cache.time, "monotonic", clock)
+  monkeypatch.setattr(qllm_cache.time, "time", clock)
+  return clock
+
+
+@pytest.fixture(name="make_cache", params=["in_memory", "sqlite"])
+def _make_cache(request, tmp_path):
+  caches = []
+
+  def make_cache(**kwargs) -> qllm_cache.QLlmCache:
+    if request.param == "in_memory":
+      cache = qllm_cache.InMemoryQLlmCache(**kwargs)
+    else:
+      cache = qllm_cache.SqliteQLlmCache(
+          str(tmp_path / f"cache_{len(caches)}.db"), **kwargs
+      )
+    caches.append(cache)
+    return cache
+
+  yield make_cache
+  for cache in caches:
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(make_cache, clock):
+  cache = make_cache(max_size=2)
+  cache.set("a", "A")
+  clock.advance(1)
+  cache.set("b", "B")
+  clock.advance(1)
+  assert cache.get("a") == "A"
+  clock.advance(1)
+  cache.set("c", "C")
+  assert cache.get("b") is None
+  assert cache.get("a") == "A"
+  assert cache.get("c") == "C"
+
+
+def test_entries_expire_after_their_ttl(make_cache, clock):
+  cache = make_cache(ttl_seconds=10)
+  cache.set("key", "response")
+  clock.advance(10)
+  assert cache.get("key") == "response"
+  clock.advance(1)
+  assert cache.get("key") is None
+  # Expired entries are not served again once the clock is moved back.
+  clock.advance(-5)
+  assert cache.get("key") is None
+
+
+def test_stats_count_hits_and_misses(make_cache):
+  cache = make_cache()
+  assert cache.stats.hit_rate == 0.0
+  cache.set("key", "response")
+  for key in ["key", "key", "key", "other"]:
+    cache.get(key)
+  assert (cache.stats.hits, cache.stats.misses) == (3, 1)
+  assert cache.stats.hit_rate == 0.75
+
+
+def test_in_memory_cache_keeps_its_entries_when_closed():
+  cache = qllm_cache.InMemoryQLlmCache()
+  cache.set("key", "response")
+  cache.close()
+  assert cache.get("key") == "response"
+
+
+def test_sqlite_cache_closes_its_connections_once_collected(tmp_path):
+  cache = qllm_cache.SqliteQLlmCache(str(tmp_path / "cache.db"))
+  cache.set("key", "response")
+  connections = list(cache._connections)  # pylint: disable=protected-access
+  del cache
+  gc.collect()
+  for connection in connections:
+    with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+      connection.execute("SELECT 1")
+
+
+def test_cached_outputs_keep_their_capabilities(monkeypatch):
+  model_queries = []
+
+  async def run_async(self, query, output_schema):
+    del output_schema  # Unused.
+    model_queries.append(query)
+    yield event.Event(
+        author=self.name,
+        content=types.ModelContent(f"answer to {query}"),
+    )
+
+  monkeypatch.setattr(
+      camel_agent.QuarantinedLlmService, "_run_async", run_async
+  )
+  service = camel_agent.QuarantinedLlmService(
+      "gemini-2.5-flash", cache=qllm_cache.InMemoryQLlmCache()
+  )
+  namespace = library.make_builtins_namespace({
+      "get_secret": camel_value.CaMeLFunction(
+          "get_secret",
+          lambda: "secret",
+          capabilities.Capabilities(frozenset(), frozenset({"alice"})),
+          (),
+      ),
+      "query_ai_assistant": camel_value.CaMeLFunction(
+          "query_ai_assistant",
+          service.get_query_ai_assistant_function(),
+          capabilities.Capabilities.camel(),
+          (),
+      ),
+  })
+
+  def query(code: str) -> camel_value.Value:
+    eval_result = interpreter.parse_and_interpret_code(
+        f"```python\n{code}\n```",
+        namespace,
+        [],
+        [],
+        interpreter.EvalArgs(
+            security_policy.NoSecurityPolicyEngine(),
+            interpreter.DependenciesPropagationMode.NORMAL,
+        ),
+    )
+    assert isinstance(eval_result.result, result.Ok), eval_result.result
+    return eval_result.result.value
+
+  for code, public in [
+      ('query_ai_assistant("public", "str")', True),
+      ('query_ai_assistant(get_secret(), "str")', False),
+  ]:
+    live_output, cached_output = query(code), query(code)
+    assert cached_output.raw == live_output.raw
+    assert cached_output.capabilities == live_output.capabilities
+    assert capabilities_utils.is_public(live_output) == public
+    assert capabilities_utils.is_public(cached_output) == public
+  assert model_queries == ["public", "secret"]
+  assert service.cache.stats.hits == 2
+
+
+def test_responses_that_fail_to_parse_are_not_cached(monkeypatch):
+  responses = iter(["not a number", "42"])
+  model_queries = []
+
+  async def run_async(self, query, output_schema):
+    del output_schema  # Unused.
+    model_queries.append(query)
+    yield event.Event(
+        author=self.name,
+        content=types.ModelContent(next(responses)),
+    )
+
+  monkeypatch.setattr(
+      camel_agent.QuarantinedLlmService, "_run_async", run_async
+  )
+  service = camel_agent.QuarantinedLlmService(
+      "gemini-2.5-flash", cache=qllm_cache.InMemoryQLlmCache()
+  )
+
+  with pytest.raises(pydantic.v1.errors.IntegerError):
+    asyncio.run(service._query_and_parse("how many?", "int"))
+  assert asyncio.run(service._query_and_parse("how many?", "int")) == 42
+  assert asyncio.run(service._query_and_parse("how many?", "int")) == 42
+  assert model_queries == ["how many?", "how many?"]
+  assert service.cache.stats.hits == 1
+
+
+def test_services_sharing_a_cache_can_be_collected():
+  cache = qllm_cache.InMemoryQLlmCache()
+  cache.set("key", "response")
+  service = camel_agent.QuarantinedLlmService("gemini-2.5-flash", cache=cache)
+  service_ref = weakref.ref(service)
+  del service
+  gc.collect()
+  assert service_ref() is None
+  assert cache.get("key") == "response"
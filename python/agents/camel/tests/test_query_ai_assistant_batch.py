@@ -0,0 +1,117 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `query_ai_assistant_batch` and the mapped functions."""
+
+import asyncio
+
+from camel.camel_agent import camel_agent
+from camel.camel_library import result
+from camel.camel_library import security_policy
+from camel.camel_library.capabilities import capabilities
+from camel.camel_library.capabilities import utils as capabilities_utils
+from camel.camel_library.interpreter import camel_value
+from camel.camel_library.interpreter import interpreter
+from camel.camel_library.interpreter import library
+import pytest
+
+
+@pytest.fixture(name="service_and_stats")
+def _service(monkeypatch):
+  in_flight = 0
+  stats = {"max_in_flight": 0}
+
+  async def query(self, query, output_schema):
+    del self, output_schema  # Unused.
+    nonlocal in_flight
+    in_flight += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], in_flight)
+    await asyncio.sleep(0)
+    in_flight -= 1
+    return str(len(query))
+
+  monkeypatch.setattr(camel_agent.QuarantinedLlmService, "query", query)
+  service = camel_agent.QuarantinedLlmService(
+      "gemini-2.5-flash", batch_concurrency=2
+  )
+  return service, stats
+
+
+def test_batch_returns_parsed_outputs_in_order(service_and_stats):
+  service, stats = service_and_stats
+  batch = service.get_query_ai_assistant_batch_function()
+  outputs = asyncio.run(batch(["a", "bbb", "cc", "dddd", "e"], "int"))
+  assert outputs == [1, 3, 2, 4, 1]
+  assert stats["max_in_flight"] == 2
+
+
+def test_batch_rejects_unsupported_output_schemas(service_and_stats):
+  service, _ = service_and_stats
+  batch = service.get_query_ai_assistant_batch_function()
+  with pytest.raises(ValueError, match="Unsupported output schema"):
+    asyncio.run(batch(["a"], "list"))
+
+
+def _eval_mapped(code: str, py_callable):
+  namespace = library.make_builtins_namespace({
+      "get_secret": camel_value.CaMeLFunction(
+          "get_secret",
+          lambda: "secret",
+          capabilities.Capabilities(frozenset(), frozenset({"alice"})),
+          (),
+      ),
+      "lengths": camel_value.CaMeLMappedFunction(
+          "lengths",
+          py_callable,
+          capabilities.Capabilities.camel(),
+          (),
+          mapped_argument="queries",
+      ),
+  })
+  return interpreter.parse_and_interpret_code(
+      f"```python\n{code}\n```",
+      namespace,
+      [],
+      [],
+      interpreter.EvalArgs(
+          security_policy.NoSecurityPolicyEngine(),
+          interpreter.DependenciesPropagationMode.NORMAL,
+      ),
+  )
+
+
+def test_each_output_only_depends_on_its_element():
+  def lengths(queries: list[str]) -> list[int]:
+    return [len(query) for query in queries]
+
+  eval_result = _eval_mapped(
+      'outputs = lengths(["public", get_secret()])\noutputs', lengths
+  )
+  assert isinstance(eval_result.result, result.Ok), eval_result.result
+  public_output, secret_output = eval_result.result.value.iterate_python()
+  assert public_output.raw == 6
+  assert secret_output.raw == 6
+  assert capabilities_utils.is_public(public_output)
+  assert not capabilities_utils.is_public(secret_output)
+
+
+def test_mismatched_number_of_outputs_is_an_error():
+  def lengths(queries: list[str]) -> list[int]:
+    return [len(query) for query in queries[1:]]
+
+  eval_result = _eval_mapped('lengths(["a", "b", "c"])', lengths)
+  assert isinstance(eval_result.result, result.Error)
+  exception = eval_result.result.error.exception
+  assert isinstance(exception, ValueError)
+  assert "returned 2 outputs for 3 elements of `queries`" in str(exception)
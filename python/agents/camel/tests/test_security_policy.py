@@ -0,0 +1,150 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the security policies."""
+
+from camel.camel_library import result
+from camel.camel_library import security_policy
+from camel.camel_library.capabilities import capabilities
+from camel.camel_library.interpreter import camel_value
+from camel.camel_library.interpreter import interpreter
+from camel.camel_library.interpreter import library
+import pytest
+
+
+def _allow(tool_name, kwargs):
+  del tool_name, kwargs  # Unused.
+  return security_policy.Allowed()
+
+
+def _deny(tool_name, kwargs):
+  del kwargs  # Unused.
+  return security_policy.Denied(f"{tool_name} is denied")
+
+
+class _AllowAllPolicyEngine(security_policy.SecurityPolicyEngine):
+  """Allows all the tools, unless they depend on private values."""
+
+  def __init__(self):
+    self.policies = [("*", _allow)]
+    self.no_side_effect_tools = set()
+
+
+class _Tools:
+  """Tools recording the values sent."""
+
+  def __init__(self):
+    self.sent = []
+
+  def send(self, x: str) -> None:
+    """Sends `x`."""
+    self.sent.append(x)
+
+  def namespace(self) -> camel_value.Namespace:
+    return library.make_builtins_namespace({
+        "get_secret": camel_value.CaMeLFunction(
+            "get_secret",
+            lambda: "secret",
+            capabilities.Capabilities(frozenset(), frozenset({"alice"})),
+            (),
+        ),
+        "send": camel_value.CaMeLFunction(
+            "send", self.send, capabilities.Capabilities.camel(), ()
+        ),
+    })
+
+
+def _eval(
+    tools: _Tools,
+    code: str,
+    eval_mode: interpreter.DependenciesPropagationMode = (
+        interpreter.DependenciesPropagationMode.NORMAL
+    ),
+) -> interpreter.EvalResult:
+  return interpreter.parse_and_interpret_code(
+      f"```python\n{code}\n```",
+      tools.namespace(),
+      [],
+      [],
+      interpreter.EvalArgs(_AllowAllPolicyEngine(), eval_mode),
+  )
+
+
+def test_dependencies_mutated_to_private_deny_later_calls():
+  tools = _Tools()
+  with pytest.raises(security_policy.SecurityPolicyDeniedError):
+    _eval(
+        tools,
+        'd = {"k": "v"}\n'
+        "s = get_secret()\n"
+        "if d:\n"
+        '  send("a")\n'
+        '  d["k"] = s\n'
+        '  send("b")',
+    )
+  assert tools.sent == ["a"]
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        'if s == "secret":\n  send("a")',
+        'for c in [s]:\n  send("a")',
+        # The dependencies of nested blocks are removed when they end.
+        'for c in [s]:\n  if "public":\n    pass\n  send("a")',
+        'if s:\n  for c in ["public"]:\n    pass\n  send("a")',
+        'if s:\n  if s:\n    pass\n  send("a")',
+    ],
+)
+def test_strict_control_flow_dependencies_reach_tool_calls(code):
+  tools = _Tools()
+  with pytest.raises(security_policy.SecurityPolicyDeniedError):
+    _eval(
+        tools,
+        "s = get_secret()\n" + code,
+        interpreter.DependenciesPropagationMode.STRICT,
+    )
+  assert not tools.sent
+
+
+def test_strict_public_control_flow_allows_tool_calls():
+  tools = _Tools()
+  _eval(
+      tools,
+      's = get_secret()\nif "public":\n  for c in ["a"]:\n    send(c)',
+      interpreter.DependenciesPropagationMode.STRICT,
+  )
+  assert tools.sent == ["a"]
+
+
+def test_reassigned_policies_are_picked_up():
+  engine = _AllowAllPolicyEngine()
+  assert isinstance(
+      engine.check_policy("send", {}, []), security_policy.Allowed
+  )
+  engine.policies = [("send", _deny), *engine.policies]
+  assert engine.check_policy("send", {}, []) == security_policy.Denied(
+      "send is denied"
+  )
+
+
+def test_policies_cannot_be_changed_in_place():
+  engine = _AllowAllPolicyEngine()
+  with pytest.raises(TypeError):
+    engine.policies[0] = ("send", _deny)
+  with pytest.raises(AttributeError):
+    engine.policies.append(("send", _deny))
+  assert isinstance(
+      engine.check_policy("send", {}, []), security_policy.Allowed
+  )
@@ -0,0 +1,126 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the pool of Q-LLM sessions."""
+
+import asyncio
+
+from camel.camel_agent import camel_agent
+from camel.camel_agent import session_pool
+from google.adk.models import base_llm
+from google.adk.models import llm_response
+from google.adk.sessions import in_memory_session_service
+from google.genai import types
+
+_APP_NAME = "app"
+_USER_ID = "user"
+
+
+async def _list_session_ids(service) -> set[str]:
+  response = await service.list_sessions(app_name=_APP_NAME, user_id=_USER_ID)
+  return {session.id for session in response.sessions}
+
+
+def test_released_sessions_are_reused_until_used_up():
+  async def run():
+    service = in_memory_session_service.InMemorySessionService()
+    pool = session_pool.SessionPool(
+        service, _APP_NAME, _USER_ID, max_idle_sessions=2, max_session_uses=2
+    )
+    await pool.fill(2)
+    filled_ids = await _list_session_ids(service)
+    assert len(filled_ids) == 2
+
+    session_id = await pool.acquire()
+    assert session_id in filled_ids
+    await pool.release(session_id)
+    assert await _list_session_ids(service) == filled_ids
+    assert await pool.acquire() == session_id
+
+    # The second use of the session is its last one.
+    await pool.release(session_id)
+    session_ids = await _list_session_ids(service)
+    assert session_id not in session_ids
+    assert len(session_ids) == 2
+    assert await pool.acquire() != session_id
+
+  asyncio.run(run())
+
+
+def test_drain_deletes_idle_sessions():
+  async def run():
+    service = in_memory_session_service.InMemorySessionService()
+    pool = session_pool.SessionPool(
+        service, _APP_NAME, _USER_ID, max_idle_sessions=2
+    )
+    await pool.fill(2)
+    in_use_id = await pool.acquire()
+    await pool.drain()
+    assert await _list_session_ids(service) == {in_use_id}
+
+  asyncio.run(run())
+
+
+def test_release_does_not_exceed_max_idle_sessions():
+  async def run():
+    service = in_memory_session_service.InMemorySessionService()
+    pool = session_pool.SessionPool(
+        service, _APP_NAME, _USER_ID, max_idle_sessions=1
+    )
+    session_ids = [await pool.acquire() for _ in range(3)]
+    for session_id in session_ids:
+      await pool.release(session_id)
+    assert len(await _list_session_ids(service)) == 1
+
+  asyncio.run(run())
+
+
+def test_services_share_the_background_loop_and_reuse_sessions():
+  services = [
+      camel_agent.QuarantinedLlmService("gemini-2.5-flash") for _ in range(2)
+  ]
+  assert services[0].background_loop is services[1].background_loop
+  # Reused sessions are only isolated if their contents are not sent.
+  assert services[0].agent.include_contents == "none"
+  for service in services:
+    service.close()
+
+
+class _RecordingLlm(base_llm.BaseLlm):
+  """Answers every request and records the contents it was sent."""
+
+  requests_contents: list[list[types.Content]] = []
+
+  async def generate_content_async(self, llm_request, stream=False):
+    del stream  # Unused.
+    self.requests_contents.append(list(llm_request.contents))
+    yield llm_response.LlmResponse(content=types.ModelContent("answer"))
+
+
+def test_queries_on_reused_sessions_do_not_see_previous_queries():
+  model = _RecordingLlm(model="recording")
+  service = camel_agent.QuarantinedLlmService(model, batch_concurrency=1)
+
+  async def query(text):
+    return await service.query(text, "str")
+
+  for text in ["first", "second"]:
+    asyncio.run_coroutine_threadsafe(
+        query(text), service.background_loop.loop
+    ).result()
+  assert len(model.requests_contents) == 2
+  second_request_text = str(model.requests_contents[1])
+  assert "second" in second_request_text
+  assert "first" not in second_request_text
+  service.close()
@@ -0,0 +1,209 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the snapshots of the namespaces."""
+
+from camel.camel_library import result
+from camel.camel_library import security_policy
+from camel.camel_library.capabilities import capabilities
+from camel.camel_library.capabilities import sources
+from camel.camel_library.capabilities import utils as capabilities_utils
+from camel.camel_library.interpreter import camel_value
+from camel.camel_library.interpreter import interpreter
+from camel.camel_library.interpreter import library
+from camel.camel_library.interpreter import snapshot
+import pytest
+
+
+_SECRET_CAPABILITIES = capabilities.Capabilities(
+    frozenset({sources.Tool("get_secret")}), frozenset({"alice"})
+)
+
+
+def _public_arguments(tool_name, kwargs):
+  return security_policy.base_security_policy(tool_name, kwargs, set())
+
+
+class _PublicOnlyPolicyEngine(security_policy.SecurityPolicyEngine):
+  """Allows the tools called with and depending on public values only."""
+
+  def __init__(self):
+    self.policies = [("*", _public_arguments)]
+    self.no_side_effect_tools = set()
+
+
+class _Tools:
+  """Tools recording the values sent."""
+
+  def __init__(self):
+    self.sent = []
+
+  def send(self, x: str) -> None:
+    """Sends `x`."""
+    self.sent.append(x)
+
+  def namespace(self) -> camel_value.Namespace:
+    return library.make_builtins_namespace({
+        "get_secret": camel_value.CaMeLFunction(
+            "get_secret", lambda: "secret", _SECRET_CAPABILITIES, ()
+        ),
+        "send": camel_value.CaMeLFunction(
+            "send", self.send, capabilities.Capabilities.camel(), ()
+        ),
+    })
+
+
+def _eval(
+    code: str,
+    namespace: camel_value.Namespace,
+    dependencies=(),
+) -> interpreter.EvalResult:
+  return interpreter.parse_and_interpret_code(
+      f"```python\n{code}\n```",
+      namespace,
+      [],
+      dependencies,
+      interpreter.EvalArgs(
+          _PublicOnlyPolicyEngine(),
+          interpreter.DependenciesPropagationMode.NORMAL,
+      ),
+  )
+
+
+def _round_trip(code: str):
+  """Evaluates `code`, and restores its namespace in a new base namespace."""
+  base_namespace = _Tools().namespace()
+  eval_result = _eval(code, base_namespace)
+  assert isinstance(eval_result.result, result.Ok), eval_result.result
+  data = snapshot.dumps(
+      eval_result.namespace,
+      base_namespace,
+      tuple(eval_result.dependencies),
+  )
+  restored_tools = _Tools()
+  namespace, dependencies = snapshot.loads(data, restored_tools.namespace())
+  return eval_result.namespace, namespace, dependencies, restored_tools
+
+
+def test_values_are_restored():
+  original, restored, _, _ = _round_trip(
+      "i = 1\n"
+      "f = 1.5\n"
+      "b = True\n"
+      "n = None\n"
+      's = "text"\n'
+      't = (1, "a")\n'
+      "l = [1, [2, 3]]\n"
+      "r = range(2, 10, 3)\n"
+      "st = {1, 2}\n"
+      'd = {"k": [1], "j": None}\n'
+      "dt = datetime(2025, 1, 2, 3, 4)\n"
+  )
+  for name in ("i", "f", "b", "n", "s", "t", "l", "r", "st", "d", "dt"):
+    assert restored.variables[name].raw == original.variables[name].raw, name
+  assert isinstance(restored.variables["r"], camel_value.CaMeLLazyList)
+
+
+def test_shared_values_stay_shared():
+  _, restored, _, _ = _round_trip('a = {"k": 1}\nb = [a, a]\n')
+  eval_result = _eval('a["k"] = 2\nb', restored)
+  assert isinstance(eval_result.result, result.Ok), eval_result.result
+  assert eval_result.result.value.raw == [{"k": 2}, {"k": 2}]
+
+
+def test_capabilities_and_dependencies_are_restored():
+  original, restored, _, _ = _round_trip(
+      "s = get_secret()\n"
+      'mixed = "public " + s\n'
+      "derived = len(s)\n"
+  )
+  s = restored.variables["s"]
+  assert s.capabilities == original.variables["s"].capabilities
+  assert sources.Tool("get_secret") in s.capabilities.sources_set
+  assert not capabilities_utils.is_public(s)
+  assert capabilities_utils.get_all_readers(s)[0] == (
+      capabilities_utils.get_all_readers(original.variables["s"])[0]
+  )
+  public_char, *_, secret_char = restored.variables["mixed"].python_value
+  assert capabilities_utils.is_public(public_char)
+  assert not capabilities_utils.is_public(secret_char)
+  assert capabilities_utils.is_public(restored.variables["derived"]) == (
+      capabilities_utils.is_public(original.variables["derived"])
+  )
+  assert not capabilities_utils.is_public(restored.variables["derived"])
+
+
+def test_interned_capabilities_are_shared():
+  _, restored, _, _ = _round_trip("x = 1\n")
+  assert (
+      restored.variables["x"].capabilities
+      is capabilities.Capabilities.default()
+  )
+
+
+def test_class_instances_are_restored():
+  original, restored, _, _ = _round_trip(
+      "class Point(BaseModel):\n"
+      "  x: int\n"
+      "  label: str\n"
+      "\n"
+      'p = Point(x=1, label=get_secret())\n'
+  )
+  point = restored.variables["p"]
+  assert type(point.raw).__name__ == "Point"
+  assert point.raw.model_dump() == original.variables["p"].raw.model_dump()
+  assert capabilities_utils.is_public(point) == (
+      capabilities_utils.is_public(original.variables["p"])
+  )
+  eval_result = _eval('q = Point(x=p.x + 1, label="q")\nq.x', restored)
+  assert isinstance(eval_result.result, result.Ok), eval_result.result
+  assert eval_result.result.value.raw == 2
+
+
+def test_restored_private_values_are_still_denied():
+  _, restored, _, tools = _round_trip("s = get_secret()\n")
+  with pytest.raises(security_policy.SecurityPolicyDeniedError):
+    _eval("send(s)", restored)
+  with pytest.raises(security_policy.SecurityPolicyDeniedError):
+    _eval('if s == "secret":\n  send("leak")', restored)
+  assert not tools.sent
+
+
+def test_restored_control_flow_dependencies_are_still_denied():
+  base_namespace = _Tools().namespace()
+  eval_result = _eval("s = get_secret()\n", base_namespace)
+  assert isinstance(eval_result.result, result.Ok), eval_result.result
+  data = snapshot.dumps(
+      eval_result.namespace,
+      base_namespace,
+      (eval_result.namespace.variables["s"],),
+  )
+  tools = _Tools()
+  namespace, dependencies = snapshot.loads(data, tools.namespace())
+  with pytest.raises(security_policy.SecurityPolicyDeniedError):
+    _eval('send("x")', namespace, dependencies)
+  assert not tools.sent
+
+
+def test_unknown_tools_are_an_error():
+  base_namespace = _Tools().namespace()
+  eval_result = _eval("f = get_secret\n", base_namespace)
+  data = snapshot.dumps(eval_result.namespace, base_namespace)
+  with pytest.raises(snapshot.SnapshotError):
+    snapshot.loads(data, library.make_builtins_namespace())
+
+
+def test_invalid_snapshots_are_an_error():
+  with pytest.raises(snapshot.SnapshotError):
+    snapshot.loads(b"not a snapshot", _Tools().namespace())
@@ -24,11 +24,13 @@ from google.genai import types
 
 from google.adk.agents import Agent
 from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.tools import load_artifacts
 
 from .sub_agents import bqml_agent
 from .sub_agents.bigquery.tools import (
     get_database_settings as get_bq_database_settings,
+    get_relevant_schema as get_bq_relevant_schema,
 )
 from .prompts import return_instructions_root
 from .tools import call_db_agent, call_ds_agent
@@ -45,26 +47,41 @@ def setup_before_agent_call(callback_context: CallbackContext):
         db_settings["use_database"] = "BigQuery"
         callback_context.state["all_db_settings"] = db_settings
 
-    # setting up schema in instruction
+    # setting up schema in session.state, for the instruction
     if callback_context.state["all_db_settings"]["use_database"] == "BigQuery":
         callback_context.state["database_settings"] = get_bq_database_settings()
-        schema = callback_context.state["database_settings"]["bq_ddl_schema"]
+        # Only describe the tables relevant to the user's message.
+        user_content = callback_context.user_content
+        parts = user_content.parts if user_content and user_content.parts else []
+        question = " ".join(part.text for part in parts if part.text)
+        callback_context.state["relevant_schema"] = get_bq_relevant_schema(question)
 
-        callback_context._invocation_context.agent.instruction = (
-            return_instructions_root()
-            + f"""
+
+def root_instruction(readonly_context: ReadonlyContext) -> str:
+    """Returns the instruction of the root agent, with the session's schema.
+
+    The agent is shared by all the sessions, so the schema relevant to the
+    current question is read from the session state rather than stored in the
+    agent.
+    """
+    schema = readonly_context.state.get("relevant_schema")
+    if schema is None:
+        return return_instructions_root()
+    return (
+        return_instructions_root()
+        + f"""
 
     --------- The BigQuery schema of the relevant data with a few sample rows. ---------
     {schema}
 
     """
-        )
+    )
 
 
 root_agent = Agent(
     model=os.getenv("ROOT_AGENT_MODEL"),
     name="db_ds_multiagent",
-    instruction=return_instructions_root(),
+    instruction=root_instruction,
     global_instruction=(
         f"""
         You are a Data Science and Data Analytics Multi Agent System.
@@ -0,0 +1,160 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Handoff of query results to the analytics (ds) agent as a Parquet file.
+
+Instead of formatting every row into the prompt, the results are written to a
+compressed Parquet file that is saved as an artifact and made available to the
+code executor, which loads it directly. The prompt only describes the file: its
+schema, a few sample rows and summary statistics, so its size no longer grows
+with the number of rows.
+"""
+
+import base64
+import io
+import logging
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from google.adk.code_executors.code_execution_utils import File
+from google.adk.code_executors.code_executor_context import CodeExecutorContext
+from google.adk.tools import ToolContext
+from google.genai import types
+
+RESULT_FILE_NAME = "query_result.parquet"
+PARQUET_MIME_TYPE = "application/vnd.apache.parquet"
+NUM_SAMPLE_ROWS = 5
+
+
+def to_parquet(rows):
+    """Serializes query result rows to a zstd-compressed Parquet file.
+
+    Args:
+        rows (list[dict]): The rows, as stored in `query_result`.
+
+    Returns:
+        bytes: The content of the Parquet file.
+    """
+    table = pa.Table.from_pylist(rows)
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression="zstd")
+    return buffer.getvalue()
+
+
+def describe_truncation(num_rows, total_rows):
+    """Tells the analytics agent when it only has the first rows of a result.
+
+    Args:
+        num_rows (int): The number of rows handed off.
+        total_rows (int): The number of rows of the full query result, or None
+          if unknown.
+
+    Returns:
+        str: A sentence for the prompt, empty if the rows are the full result.
+    """
+    if total_rows is None or total_rows <= num_rows:
+        return ""
+    return (
+        f"\n  The data is truncated: the query returned {total_rows} rows, only"
+        f" the first {num_rows} are available. Results computed from them do"
+        " not cover the full data.\n"
+    )
+
+
+def describe_rows(rows, total_rows=None, file_name=RESULT_FILE_NAME):
+    """Describes the handed off rows for the prompt of the analytics agent.
+
+    Args:
+        rows (list[dict]): The rows written to `file_name`.
+        total_rows (int): The number of rows of the full query result, or None
+          if unknown.
+        file_name (str): The name of the file the code executor can read.
+
+    Returns:
+        str: The schema, a few sample rows and summary statistics of the rows.
+    """
+    df = pd.DataFrame(rows)
+    schema = pa.Table.from_pylist(rows).schema
+    columns = "\n".join(f"  - {field.name}: {field.type}" for field in schema)
+    try:
+        statistics = df.describe(include="all").to_string()
+    except (TypeError, ValueError):
+        # Nested values (ARRAY or STRUCT columns) cannot be summarized.
+        statistics = "  Not available."
+    return f"""
+  The data is in the Parquet file `{file_name}` ({len(df)} rows). Load it with:
+  `df = pd.read_parquet("{file_name}")`
+{describe_truncation(len(df), total_rows)}
+  Columns:
+{columns}
+
+  First {min(NUM_SAMPLE_ROWS, len(df))} rows:
+{df.head(NUM_SAMPLE_ROWS).to_string(index=False)}
+
+  Summary statistics:
+{statistics}
+"""
+
+
+async def handoff_query_result(tool_context: ToolContext, rows, total_rows=None):
+    """Makes query results available to the code executor as a Parquet file.
+
+    The file is also saved as an artifact when an artifact service is
+    configured. An earlier result with the same file name is replaced.
+
+    Args:
+        tool_context (ToolContext): The context of the calling tool.
+        rows (list[dict]): The rows to hand off.
+        total_rows (int): The number of rows of the full query result, or None
+          if unknown.
+
+    Returns:
+        str: The description of the file for the prompt, or None if the rows
+          cannot be converted, in which case they must be passed inline.
+    """
+    if not rows:
+        return None
+    try:
+        content = to_parquet(rows)
+        description = describe_rows(rows, total_rows)
+    except (pa.ArrowException, ValueError, TypeError) as e:
+        logging.warning(f"Could not convert the query result to Parquet: {e}")
+        return None
+
+    try:
+        await tool_context.save_artifact(
+            RESULT_FILE_NAME,
+            types.Part.from_bytes(data=content, mime_type=PARQUET_MIME_TYPE),
+        )
+    except ValueError as e:
+        # No artifact service is configured.
+        logging.info(f"Not saving the query result as an artifact: {e}")
+
+    code_executor_context = CodeExecutorContext(tool_context.state)
+    input_files = [
+        f
+        for f in code_executor_context.get_input_files()
+        if f.name != RESULT_FILE_NAME
+    ]
+    input_files.append(
+        File(
+            name=RESULT_FILE_NAME,
+            content=base64.b64encode(content).decode(),
+            mime_type=PARQUET_MIME_TYPE,
+        )
+    )
+    code_executor_context.clear_input_files()
+    code_executor_context.add_input_files(input_files)
+    return description
@@ -77,6 +77,8 @@ def return_instructions_ds() -> str:
 
   **Data in prompt:** Some queries contain the input data directly in the prompt. You have to parse that data into a pandas DataFrame. ALWAYS parse all the data. NEVER edit the data that are given to you.
 
+  **Data in a file:** Some queries only describe the input data, with its columns, a few sample rows and summary statistics, and give the Parquet file that contains all of the rows handed off. Load that file with `pd.read_parquet` instead of parsing the sample rows, which are only a preview. If the description says the data is truncated, the file only holds the first rows of the query result: say so in your answer, and do not present totals or statistics computed from the file as covering all the data.
+
   **Answerability:** Some queries may not be answerable with the available data. In those cases, inform the user why you cannot process their query and suggest what type of data would be needed to fulfill their request.
 
   **WHEN YOU DO PREDICTION / MODEL FITTING, ALWAYS PLOT FITTED LINE AS WELL **
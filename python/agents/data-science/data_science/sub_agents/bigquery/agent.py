@@ -48,5 +48,10 @@ database_agent = Agent(
         tools.run_bigquery_validation,
     ],
     before_agent_callback=setup_before_agent_call,
+    after_tool_callback=(
+        chase_db_tools.evict_failed_translation
+        if NL2SQL_METHOD == "CHASE"
+        else None
+    ),
     generate_content_config=types.GenerateContentConfig(temperature=0.01),
 )
@@ -0,0 +1,362 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Database backends of the NL2SQL tools.
+
+The tools read the schema of the dataset, dry-run and execute the generated
+BigQuery SQL through a backend. `BigQueryBackend` uses a live BigQuery client.
+`DuckDBBackend` loads the sample CSV files into a local DuckDB database and
+transpiles the queries from the BigQuery dialect with SQLGlot, so that the
+NL2SQL tools can be load-tested and benchmarked offline.
+
+The backend is selected with `NL2SQL_BACKEND` ("BIGQUERY" or "DUCKDB").
+"""
+
+import dataclasses
+import datetime
+import functools
+import glob
+import itertools
+import logging
+import os
+import threading
+
+import sqlglot
+from google.cloud import bigquery
+
+from . import dry_run
+from .schema import NUM_SAMPLE_ROWS, format_table_ddl, get_bigquery_table_schemas
+
+DEFAULT_DUCKDB_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "utils", "data"
+)
+
+
+def get_backend_name():
+    """Returns the name of the configured backend, "BIGQUERY" or "DUCKDB"."""
+    return os.getenv("NL2SQL_BACKEND", "BIGQUERY").upper()
+
+
+@dataclasses.dataclass
+class QueryResult:
+    """The first rows of the result of a query.
+
+    Attributes:
+        columns (list[str]): The names of the columns, empty if the statement
+          returned no result set.
+        rows (list[dict]): The first rows, by column name.
+        total_rows (int): The number of rows of the full result.
+    """
+
+    columns: list[str]
+    rows: list[dict]
+    total_rows: int
+
+
+class BigQueryBackend:
+    """Runs the queries on BigQuery.
+
+    Attributes:
+        client (bigquery.Client): The BigQuery client.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def get_table_schemas(self, data_project_id, dataset_id):
+        """Returns the DDL with sample rows of each table, by table name."""
+        return get_bigquery_table_schemas(
+            dataset_id=dataset_id,
+            data_project_id=data_project_id,
+            client=self.client,
+        )
+
+    def dry_run(self, sql_string):
+        """Validates a query without running it. See `dry_run.dry_run`."""
+        return dry_run.dry_run(self.client, sql_string)
+
+    def execute(self, sql_string, max_rows, max_bytes_processed=None):
+        """Runs a query and fetches its first rows.
+
+        Args:
+            sql_string (str): The query.
+            max_rows (int): The maximum number of rows to fetch.
+            max_bytes_processed (int): If set, BigQuery fails the query instead
+              of processing more bytes.
+
+        Returns:
+            QueryResult: The first rows of the result.
+        """
+        job_config = bigquery.QueryJobConfig()
+        if max_bytes_processed is not None:
+            job_config.maximum_bytes_billed = max_bytes_processed
+        query_job = self.client.query(sql_string, job_config=job_config)
+        # Only fetch the first rows, the rest of the result stays in the
+        # query's destination table.
+        results = query_job.result(max_results=max_rows, page_size=max_rows)
+        return QueryResult(
+            columns=[field.name for field in results.schema or []],
+            rows=[dict(row.items()) for row in itertools.islice(results, max_rows)],
+            total_rows=results.total_rows,
+        )
+
+    def result_fingerprint(self, sql_string, max_bytes_processed=None):
+        """Returns the number of rows and a fingerprint of a query's result.
+
+        The fingerprint is computed by BigQuery over all the rows, and does
+        not depend on their order or on the names of the columns. Rows
+        appearing twice cancel each other out.
+
+        Args:
+            sql_string (str): The query.
+            max_bytes_processed (int): If set, BigQuery fails the query instead
+              of processing more bytes.
+
+        Returns:
+            tuple[int, int | None]: The number of rows, and the fingerprint,
+              None if there are no rows.
+        """
+        # The query can end with a comment or a semicolon.
+        results = self.execute(
+            "SELECT COUNT(*) AS row_count,"
+            " BIT_XOR(FARM_FINGERPRINT(FORMAT('%T', t))) AS fingerprint"
+            f" FROM (\n{sql_string.rstrip().rstrip(';')}\n) AS t",
+            max_rows=1,
+            max_bytes_processed=max_bytes_processed,
+        )
+        row = results.rows[0]
+        return row["row_count"], row["fingerprint"]
+
+    def get_table_last_modified(self, table_name):
+        """Returns when a table was last modified, as an ISO 8601 string."""
+        return self.client.get_table(table_name).modified.isoformat()
+
+
+@functools.lru_cache(maxsize=1024)
+def transpile_to_duckdb(sql_string, data_project_id, dataset_id):
+    """Transpiles a BigQuery query to DuckDB.
+
+    Tables of `data_project_id` are mapped to the DuckDB schema named after
+    their dataset, and unqualified tables to the schema of `dataset_id`. Only
+    queries are accepted: other statements (e.g., COPY, ATTACH, INSTALL) could
+    access the local file system.
+
+    Returns:
+        tuple[str, tuple[str, ...]]: The DuckDB query, and the fully qualified
+          BigQuery names of the tables it reads.
+
+    Raises:
+        sqlglot.errors.SqlglotError: If the query cannot be parsed.
+        ValueError: If the statement is not a query.
+    """
+    expression = sqlglot.parse_one(
+        sql_string, read="bigquery", error_level=sqlglot.ErrorLevel.IMMEDIATE
+    )
+    if not isinstance(expression, sqlglot.exp.Query):
+        raise ValueError(
+            f"Only queries are allowed, not {expression.key.upper()} statements."
+        )
+    cte_names = {cte.alias_or_name for cte in expression.find_all(sqlglot.exp.CTE)}
+    referenced_tables = set()
+    for table in expression.find_all(sqlglot.exp.Table):
+        if not table.db and table.name in cte_names:
+            continue
+        if not table.db:
+            table.set("db", sqlglot.exp.to_identifier(dataset_id))
+        if not table.catalog or table.catalog == data_project_id:
+            referenced_tables.add(f"{data_project_id}.{table.db}.{table.name}")
+            table.set("catalog", None)
+        else:
+            referenced_tables.add(f"{table.catalog}.{table.db}.{table.name}")
+    return expression.sql(dialect="duckdb"), tuple(sorted(referenced_tables))
+
+
+class DuckDBBackend:
+    """Runs the queries on a local DuckDB database loaded from CSV files.
+
+    Each CSV file of `data_dir` becomes a table named after the file, in the
+    DuckDB schema named after `dataset_id`, like `utils/create_bq_table.py`
+    loads them into BigQuery. Dry runs only validate the queries: DuckDB does
+    not estimate the bytes they process, so the byte budget never rejects one.
+
+    Once the files are loaded, the database can't access the file system or
+    the network anymore, and its configuration is locked, so that the queries
+    can only read the loaded tables.
+
+    Attributes:
+        data_project_id (str): The BigQuery project the queries refer to.
+        dataset_id (str): The BigQuery dataset the queries refer to.
+    """
+
+    def __init__(self, data_project_id, dataset_id, data_dir=None):
+        try:
+            import duckdb  # pylint: disable=import-outside-toplevel
+        except ImportError as e:
+            raise ImportError(
+                "The DuckDB backend requires the `duckdb` package. Install it "
+                "with `poetry install --extras local`."
+            ) from e
+
+        self.data_project_id = data_project_id
+        self.dataset_id = dataset_id
+        self._connection = duckdb.connect()
+        self._lock = threading.Lock()
+        self._last_modified = {}
+        self._load_csv_files(data_dir or DEFAULT_DUCKDB_DATA_DIR)
+        self._connection.execute("SET enable_external_access = false")
+        self._connection.execute("SET lock_configuration = true")
+
+    @classmethod
+    def from_env(cls, data_project_id, dataset_id):
+        """Creates the backend, loading the CSV files of `DUCKDB_DATA_DIR`."""
+        return cls(data_project_id, dataset_id, os.getenv("DUCKDB_DATA_DIR"))
+
+    def _load_csv_files(self, data_dir):
+        csv_files = sorted(glob.glob(os.path.join(data_dir, "*.csv")))
+        if not csv_files:
+            raise ValueError(f"No CSV files to load in {data_dir}.")
+        schema = sqlglot.exp.to_identifier(self.dataset_id).sql("duckdb")
+        self._connection.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+        for csv_file in csv_files:
+            table_name = os.path.splitext(os.path.basename(csv_file))[0]
+            table = sqlglot.exp.to_identifier(table_name).sql("duckdb")
+            path = csv_file.replace("'", "''")
+            self._connection.execute(
+                f"CREATE OR REPLACE TABLE {schema}.{table} AS "
+                f"SELECT * FROM read_csv_auto('{path}')"
+            )
+            self._last_modified[
+                f"{self.data_project_id}.{self.dataset_id}.{table_name}"
+            ] = datetime.datetime.fromtimestamp(
+                os.path.getmtime(csv_file), tz=datetime.timezone.utc
+            ).isoformat()
+            logging.info(f"Loaded {csv_file} into DuckDB table {table_name}.")
+
+    def _cursor(self):
+        # Each thread needs its own cursor. Creating one is cheap.
+        with self._lock:
+            return self._connection.cursor()
+
+    def transpile(self, sql_string):
+        """Returns the DuckDB query and the tables it reads."""
+        return transpile_to_duckdb(sql_string, self.data_project_id, self.dataset_id)
+
+    def get_table_schemas(self, data_project_id, dataset_id):
+        """Returns the DDL with sample rows of each table, by table name.
+
+        DuckDB types are described with their BigQuery equivalents.
+        """
+        cursor = self._cursor()
+        try:
+            columns = {}
+            for table_name, column_name, data_type, comment in cursor.execute(
+                """
+                SELECT table_name, column_name, data_type, comment
+                FROM duckdb_columns()
+                WHERE schema_name = ?
+                ORDER BY table_name, column_index
+                """,
+                [dataset_id],
+            ).fetchall():
+                columns.setdefault(table_name, []).append(
+                    (
+                        column_name,
+                        sqlglot.exp.DataType.build(data_type, dialect="duckdb").sql(
+                            "bigquery"
+                        ),
+                        comment,
+                    )
+                )
+            table_schemas = {}
+            for table_name, table_columns in columns.items():
+                schema = sqlglot.exp.to_identifier(dataset_id).sql("duckdb")
+                table = sqlglot.exp.to_identifier(table_name).sql("duckdb")
+                sample_rows = cursor.execute(
+                    f"SELECT * FROM {schema}.{table} LIMIT {NUM_SAMPLE_ROWS}"
+                ).fetchall()
+                table_schemas[table_name] = format_table_ddl(
+                    f"{data_project_id}.{dataset_id}.{table_name}",
+                    table_columns,
+                    sample_rows,
+                )
+            return table_schemas
+        finally:
+            cursor.close()
+
+    def dry_run(self, sql_string):
+        """Validates a query by planning it, without running it.
+
+        Returns:
+            dry_run.DryRunEstimate: The tables the query reads. The number of
+              bytes processed is always 0.
+
+        Raises:
+            sqlglot.errors.SqlglotError, ValueError, duckdb.Error: If the
+              query is invalid.
+        """
+        duckdb_sql, referenced_tables = self.transpile(sql_string)
+        cursor = self._cursor()
+        try:
+            cursor.execute(f"EXPLAIN {duckdb_sql}")
+        finally:
+            cursor.close()
+        return dry_run.DryRunEstimate(
+            total_bytes_processed=0, referenced_tables=list(referenced_tables)
+        )
+
+    def execute(self, sql_string, max_rows, max_bytes_processed=None):
+        """Runs a query and fetches its first rows. See `BigQueryBackend`."""
+        del max_bytes_processed  # Local queries are free.
+        duckdb_sql, _ = self.transpile(sql_string)
+        cursor = self._cursor()
+        try:
+            cursor.execute(duckdb_sql)
+            columns = [column[0] for column in cursor.description or []]
+            if not columns:
+                return QueryResult(columns=[], rows=[], total_rows=0)
+            rows = [dict(zip(columns, row)) for row in cursor.fetchmany(max_rows)]
+            total_rows = len(rows)
+            if total_rows == max_rows:
+                # The result may be truncated. The rows are counted by DuckDB
+                # instead of being fetched, like in `result_fingerprint`.
+                (total_rows,) = cursor.execute(
+                    f"SELECT COUNT(*) FROM (\n{duckdb_sql}\n) AS t"
+                ).fetchone()
+            return QueryResult(columns=columns, rows=rows, total_rows=total_rows)
+        finally:
+            cursor.close()
+
+    def result_fingerprint(self, sql_string, max_bytes_processed=None):
+        """Returns the number of rows and a fingerprint of a query's result.
+
+        See `BigQueryBackend`. The fingerprints of the two backends differ.
+        """
+        del max_bytes_processed  # Local queries are free.
+        duckdb_sql, _ = self.transpile(sql_string)
+        cursor = self._cursor()
+        try:
+            return cursor.execute(
+                "SELECT COUNT(*), BIT_XOR(hash(t)) "
+                f"FROM (\n{duckdb_sql}\n) AS t"
+            ).fetchone()
+        finally:
+            cursor.close()
+
+    def get_table_last_modified(self, table_name):
+        """Returns when the CSV file of a table was modified.
+
+        Raises:
+            KeyError: If the table was not loaded from a CSV file.
+        """
+        return self._last_modified[table_name]
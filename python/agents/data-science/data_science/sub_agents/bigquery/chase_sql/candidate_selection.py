@@ -0,0 +1,164 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Selection of the final SQL query among several generated candidates.
+
+Candidates are normalized with SQLGlot so that identical queries are only
+validated once, and each distinct query keeps one vote per generation that
+produced it. Invalid candidates are discarded and the remaining ones vote by
+self-consistency: candidates whose results have the same fingerprint support
+each other, and the largest group wins.
+"""
+
+import concurrent.futures
+import dataclasses
+from typing import Callable, Hashable, Iterable
+
+import sqlglot
+
+# Validates a query, returning an error message or None if it is valid.
+ValidateFuncType = Callable[[str], str | None]
+# Returns a fingerprint of the results of a query.
+FingerprintFuncType = Callable[[str], Hashable]
+
+
+@dataclasses.dataclass
+class Candidate:
+    """A distinct SQL query among the generated candidates.
+
+    Attributes:
+      sql: The SQL query, as first generated.
+      key: The normalized SQL query. Candidates with the same key are the same
+        query.
+      votes: The number of generations that produced this query.
+      error: Why the candidate was discarded, if it was.
+      fingerprint: The fingerprint of the results of the query, if computed.
+    """
+
+    sql: str
+    key: str
+    votes: int = 1
+    error: str | None = None
+    fingerprint: Hashable | None = None
+
+
+def normalize_sql(
+    sql_query: str | None, dialect: str, lowercase_identifiers: bool = True
+) -> str | None:
+    """Returns the canonical form of a query, or None if it is not one query.
+
+    Args:
+      sql_query: The SQL query to normalize.
+      dialect: The SQL dialect of the query.
+      lowercase_identifiers: Whether identifiers differing only in case are
+        considered the same. BigQuery table names are case sensitive, so this
+        is only an approximation.
+    """
+    if not sql_query:
+        return None
+    try:
+        expressions = sqlglot.parse(
+            sql_query, read=dialect, error_level=sqlglot.ErrorLevel.IMMEDIATE
+        )
+    except sqlglot.errors.SqlglotError:
+        return None
+    expressions = [e for e in expressions if e is not None]
+    if len(expressions) != 1 or not isinstance(expressions[0], sqlglot.exp.Query):
+        return None
+    return expressions[0].sql(
+        dialect=dialect, normalize=lowercase_identifiers, comments=False
+    )
+
+
+def dedupe_candidates(
+    sql_queries: Iterable[str | Candidate | None], dialect: str
+) -> list[Candidate]:
+    """Groups identical queries and drops the ones that cannot be parsed.
+
+    Args:
+      sql_queries: The generated queries, or candidates that were already
+        deduplicated (e.g. in another dialect), whose votes are kept.
+      dialect: The SQL dialect of the queries.
+
+    Returns:
+      The distinct candidates, in order of first appearance.
+    """
+    candidates: dict[str, Candidate] = {}
+    for sql_query in sql_queries:
+        if isinstance(sql_query, Candidate):
+            sql_query, votes = sql_query.sql, sql_query.votes
+        else:
+            votes = 1
+        key = normalize_sql(sql_query, dialect)
+        if key is None:
+            continue
+        if key in candidates:
+            candidates[key].votes += votes
+        else:
+            candidates[key] = Candidate(sql=sql_query, key=key, votes=votes)
+    return list(candidates.values())
+
+
+def select_candidate(
+    candidates: list[Candidate],
+    validate: ValidateFuncType | None = None,
+    fingerprint: FingerprintFuncType | None = None,
+    max_workers: int = 8,
+) -> Candidate | None:
+    """Selects the candidate the most generations agree on.
+
+    Validation and fingerprinting run in parallel over the candidates. Without
+    a fingerprint function, candidates only vote for themselves.
+
+    Args:
+      candidates: The distinct candidates, see `dedupe_candidates`.
+      validate: A function returning why a query is invalid, or None.
+      fingerprint: A function returning a fingerprint of the results of a
+        query, e.g. a hash of its rows.
+      max_workers: The maximum number of candidates checked concurrently.
+
+    Returns:
+      The selected candidate, or None if no candidate is valid. Ties are
+      broken in favor of the candidate that appeared first.
+    """
+    if len(candidates) <= 1 and validate is None:
+        return candidates[0] if candidates else None
+
+    def check(candidate: Candidate) -> None:
+        try:
+            if validate is not None:
+                candidate.error = validate(candidate.sql)
+            if candidate.error is None and fingerprint is not None:
+                candidate.fingerprint = fingerprint(candidate.sql)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            candidate.error = str(e)
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(candidates)))
+    ) as executor:
+        list(executor.map(check, candidates))
+
+    valid_candidates = [c for c in candidates if c.error is None]
+    if not valid_candidates:
+        return None
+
+    def group(candidate: Candidate) -> Hashable:
+        return candidate.key if fingerprint is None else candidate.fingerprint
+
+    votes: dict[Hashable, int] = {}
+    for candidate in valid_candidates:
+        votes[group(candidate)] = votes.get(group(candidate), 0) + candidate.votes
+    # Within the winning group, prefer the query generated the most often.
+    # max() returns the first maximal candidate, i.e. the earliest one.
+    return max(valid_candidates, key=lambda c: (votes[group(c)], c.votes))
@@ -30,6 +30,9 @@ chase_sql_constants_dict: immutabledict.immutabledict[str, Any] = (
             "process_tool_output_errors": True,
             # Number of candidates to generate.
             "number_of_candidates": 1,
+            # With several candidates, whether to vote over the results of
+            # executing them (self-consistency) rather than over their text.
+            "vote_by_execution": True,
             # Model to use for generation.
             "model": os.getenv("CHASE_NL2SQL_MODEL"),
             # Temperature for generation.
@@ -14,10 +14,17 @@
 
 """This code contains the implementation of the tools used for the CHASE-SQL agent."""
 
+import asyncio
+import concurrent.futures
 import enum
 import os
+from typing import Any
 
-from google.adk.tools import ToolContext
+from google.adk.tools import BaseTool, ToolContext
+
+from .. import dry_run
+from .. import tools
+from . import candidate_selection
 
 # pylint: disable=g-importing-member
 from .dc_prompt_template import DC_PROMPT_TEMPLATE
@@ -79,12 +86,54 @@ def parse_response(response: str) -> str:
     return query.strip()
 
 
-def initial_bq_nl2sql(
+def _dry_run_error(sql_query: str) -> str | None:
+    """Returns why BigQuery rejects a query in a dry run, or None."""
+    estimate = tools.get_backend().dry_run(sql_query)
+    return dry_run.check_budget(estimate, dry_run.get_max_bytes_processed())
+
+
+def _result_fingerprint(sql_query: str) -> tuple[int, int | None]:
+    """Runs a query and returns a fingerprint of its results.
+
+    The fingerprint is computed over all the rows by the database, which only
+    returns it with the number of rows, so that queries returning the same rows
+    in another order or under other column names are considered equivalent,
+    however large their results.
+    """
+    return tools.get_backend().result_fingerprint(
+        sql_query, max_bytes_processed=dry_run.get_max_bytes_processed()
+    )
+
+
+def evict_failed_translation(
+    tool: BaseTool,
+    args: dict[str, Any],
+    tool_context: ToolContext,
+    tool_response: dict[str, Any],
+) -> None:
+    """Forgets the cached translation of a query that failed to run.
+
+    To be used as the `after_tool_callback` of the agent, so that the same
+    question is translated again instead of reusing a query BigQuery rejects.
+    """
+    del tool_context  # Unused.
+    if (
+        tool.name == tools.run_bigquery_validation.__name__
+        and isinstance(tool_response, dict)
+        and (tool_response.get("error_message") or "").startswith("Invalid SQL")
+    ):
+        sql_translator.SqlTranslator.evict_translation(args.get("sql_string", ""))
+
+
+async def initial_bq_nl2sql(
     question: str,
     tool_context: ToolContext,
 ) -> str:
     """Generates an initial SQL query from a natural language question.
 
+    The candidates are generated concurrently without blocking the event loop.
+    Their translation and the selection among them run in a worker thread.
+
     Args:
       question: Natural language question.
       tool_context: Function context.
@@ -93,18 +142,9 @@ def initial_bq_nl2sql(
       str: An SQL statement to answer this question.
     """
     print("****** Running agent with ChaseSQL algorithm.")
-    ddl_schema = tool_context.state["database_settings"]["bq_ddl_schema"]
-    project = tool_context.state["database_settings"]["bq_data_project_id"]
-    db = tool_context.state["database_settings"]["bq_dataset_id"]
-    transpile_to_bigquery = tool_context.state["database_settings"][
-        "transpile_to_bigquery"
-    ]
-    process_input_errors = tool_context.state["database_settings"][
-        "process_input_errors"
-    ]
-    process_tool_output_errors = tool_context.state["database_settings"][
-        "process_tool_output_errors"
-    ]
+    # The prompts only include the relevant tables, the translator still
+    # checks the candidates against the full schema.
+    ddl_schema = tools.get_relevant_schema(question)
     number_of_candidates = tool_context.state["database_settings"][
         "number_of_candidates"
     ]
@@ -129,9 +169,54 @@ def initial_bq_nl2sql(
 
     model = GeminiModel(model_name=model, temperature=temperature)
     requests = [prompt for _ in range(number_of_candidates)]
-    responses = model.call_parallel(requests, parser_func=parse_response)
-    # Take just the first response.
-    responses = responses[0]
+    responses = await model.call_parallel_async(
+        requests, parser_func=parse_response
+    )
+    return await asyncio.to_thread(
+        _select_sql, responses, tool_context.state["database_settings"], model
+    )
+
+
+def _select_sql(
+    responses: list[str | None],
+    database_settings: dict[str, Any],
+    model: GeminiModel,
+) -> str:
+    """Translates the generated candidates and selects one of them.
+
+    Args:
+      responses: The generated SQL candidates.
+      database_settings: The database settings of the session.
+      model: The model used for the generation, also used for error correction.
+
+    Returns:
+      str: The selected SQL statement.
+    """
+    ddl_schema = database_settings["bq_ddl_schema"]
+    project = database_settings["bq_data_project_id"]
+    db = database_settings["bq_dataset_id"]
+    transpile_to_bigquery = database_settings["transpile_to_bigquery"]
+    process_input_errors = database_settings["process_input_errors"]
+    process_tool_output_errors = database_settings["process_tool_output_errors"]
+    number_of_candidates = database_settings["number_of_candidates"]
+    temperature = database_settings["temperature"]
+
+    # Identical candidates are only translated and validated once, but keep
+    # one vote per generation.
+    input_dialect = (
+        sql_translator.SqlTranslator.INPUT_DIALECT
+        if transpile_to_bigquery
+        else sql_translator.SqlTranslator.OUTPUT_DIALECT
+    )
+    candidates = candidate_selection.dedupe_candidates(
+        responses, dialect=input_dialect
+    )
+    if not candidates:
+        # None of the candidates parse. Keep the first one so that the
+        # translator and the validation tool can report the errors.
+        candidates = [
+            candidate_selection.Candidate(sql=responses[0], key=responses[0])
+        ]
 
     # If postprocessing of the SQL to transpile it to BigQuery is required,
     # then do it here.
@@ -141,11 +226,55 @@ def initial_bq_nl2sql(
             temperature=temperature,
             process_input_errors=process_input_errors,
             process_tool_output_errors=process_tool_output_errors,
+            number_of_candidates=number_of_candidates,
         )
-        # pylint: disable=g-bad-todo
-        # pylint: enable=g-bad-todo
-        responses: str = translator.translate(
-            responses, ddl_schema=ddl_schema, db=db, catalog=project
-        )
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(candidates)
+        ) as executor:
+            futures = [
+                executor.submit(
+                    translator.translate,
+                    candidate.sql,
+                    ddl_schema=ddl_schema,
+                    db=db,
+                    catalog=project,
+                )
+                for candidate in candidates
+            ]
+        translated = []
+        for candidate, future in zip(candidates, futures):
+            try:
+                candidate.sql = future.result()
+                translated.append(candidate)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                if len(candidates) == 1:
+                    raise
+                print(f"Dropping a candidate that failed to translate: {e}")
+        if not translated:
+            raise ValueError("None of the SQL candidates could be translated.")
+        candidates = candidate_selection.dedupe_candidates(
+            translated, dialect=sql_translator.SqlTranslator.OUTPUT_DIALECT
+        ) or translated[:1]
+
+    if len(candidates) == 1:
+        # There is nothing to choose from; run_bigquery_validation will
+        # validate the query.
+        return candidates[0].sql
 
-    return responses
+    selected = candidate_selection.select_candidate(
+        candidates,
+        validate=_dry_run_error,
+        fingerprint=(
+            _result_fingerprint
+            if database_settings.get("vote_by_execution", True)
+            else None
+        ),
+    )
+    if selected is None:
+        print("No valid SQL candidate, returning the most frequent one.")
+        selected = max(candidates, key=lambda c: c.votes)
+    print(
+        f"Selected a SQL candidate generated {selected.votes} of "
+        f"{number_of_candidates} times, among {len(candidates)} distinct ones."
+    )
+    return selected.sql
@@ -12,13 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""This code contains the LLM utils for the CHASE-SQL Agent."""
+"""This code contains the LLM utils for the CHASE-SQL Agent.
 
+Requests to Gemini from all sessions of the process share one bounded thread
+pool and one token-bucket rate limiter per model and region, so concurrent
+sessions stay within quota without starving each other. Retries back off with
+`asyncio.sleep` in the asyncio path, so waiting never blocks a thread.
+"""
+
+import asyncio
 import functools
 import os
 import random
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, List, Optional
 
 import dotenv
@@ -73,12 +81,85 @@ GEMINI_URL = (
     "projects/{GCP_PROJECT}/locations/{region}/publishers/google/models/{model_name}"
 )
 
+# Maximum number of Gemini requests in flight in the process.
+MAX_CONCURRENT_REQUESTS = int(os.getenv("CHASE_MAX_CONCURRENT_REQUESTS", "16"))
+# Maximum request rate per model and region.
+REQUESTS_PER_MINUTE = float(os.getenv("CHASE_REQUESTS_PER_MINUTE", "300"))
+
 aiplatform.init(
     project=GCP_PROJECT,
     location=GCP_LOCATION,
 )
 vertexai.init(project=GCP_PROJECT, location=GCP_LOCATION)
 
+# Runs the blocking Gemini requests. Its queue is FIFO, so sessions are served
+# in the order they asked.
+_REQUEST_EXECUTOR = ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENT_REQUESTS, thread_name_prefix="gemini-request"
+)
+# Runs the event loops of `call_parallel` when it is called from a thread that
+# is already running one.
+_LOOP_EXECUTOR = ThreadPoolExecutor(thread_name_prefix="gemini-loop")
+
+
+class TokenBucket:
+    """Token-bucket rate limiter shared across threads and event loops.
+
+    Each request reserves a token under a lock and then waits, outside of the
+    lock, until its token is available. Tokens are therefore handed out in
+    request order.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initializes the bucket.
+
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float, optional): Maximum number of tokens, i.e. the
+              largest burst. Defaults to one second worth of tokens.
+            clock (callable): Returns the current time in seconds.
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token and returns how many seconds to wait before using it."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self) -> None:
+        """Waits until a token is available."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_rate_limiters: dict[str, TokenBucket] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model_path: str) -> TokenBucket:
+    """Returns the rate limiter shared by all requests to a model and region."""
+    with _rate_limiters_lock:
+        if model_path not in _rate_limiters:
+            _rate_limiters[model_path] = TokenBucket(REQUESTS_PER_MINUTE / 60)
+        return _rate_limiters[model_path]
+
 
 def retry(max_attempts=8, base_delay=1, backoff_factor=2):
     """Decorator to add retry logic to a function.
@@ -146,6 +227,21 @@ class GeminiModel:
             )
         else:
             self.model = GenerativeModel(model_name=model_name)
+        if "/locations/" in model_name:
+            self.rate_limiter = get_rate_limiter(model_name)
+        else:
+            self.rate_limiter = get_rate_limiter(f"{GCP_LOCATION}/{model_name}")
+
+    def _generate(self, prompt: str) -> str:
+        """Sends one request to the model and returns the text of the response."""
+        return self.model.generate_content(
+            prompt,
+            generation_config=GenerationConfig(
+                temperature=self.temperature,
+                **self.arguments,
+            ),
+            safety_settings=SAFETY_FILTER_CONFIG,
+        ).text
 
     @retry(max_attempts=12, base_delay=2, backoff_factor=2)
     def call(self, prompt: str, parser_func=None) -> str:
@@ -160,74 +256,128 @@ class GeminiModel:
         Returns:
             str: The processed response from the model.
         """
-        response = self.model.generate_content(
-            prompt,
-            generation_config=GenerationConfig(
-                temperature=self.temperature,
-                **self.arguments,
-            ),
-            safety_settings=SAFETY_FILTER_CONFIG,
-        ).text
+        response = self._generate(prompt)
         if parser_func:
             return parser_func(response)
         return response
 
-    def call_parallel(
+    async def call_async(
+        self,
+        prompt: str,
+        parser_func: Optional[Callable[[str], str]] = None,
+        max_attempts: int = 8,
+        base_delay: float = 1,
+        backoff_factor: float = 2,
+    ) -> str:
+        """Calls the Gemini model with the given prompt, without blocking the event loop.
+
+        The request waits for the rate limiter of the model and for a slot in
+        the process-wide request pool. Failed requests are retried with a
+        jittered exponential backoff.
+
+        Args:
+            prompt (str): The prompt to call the model with.
+            parser_func (callable, optional): A function that processes the LLM
+              output.
+            max_attempts (int): The maximum number of attempts.
+            base_delay (float): The base delay in seconds for the backoff.
+            backoff_factor (float): The factor by which to multiply the delay
+              for each subsequent attempt.
+
+        Returns:
+            str: The processed response from the model.
+        """
+        loop = asyncio.get_running_loop()
+        attempts = 0
+        while True:
+            try:
+                await self.rate_limiter.acquire()
+                response = await loop.run_in_executor(
+                    _REQUEST_EXECUTOR, self._generate, prompt
+                )
+                break
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                print(f"Attempt {attempts + 1} failed with error: {e}")
+                attempts += 1
+                if attempts >= max_attempts:
+                    raise e
+                delay = base_delay * (backoff_factor**attempts)
+                delay = random.uniform(0.5 * delay, delay)
+                await asyncio.sleep(delay)
+        if parser_func:
+            return parser_func(response)
+        return response
+
+    async def call_parallel_async(
         self,
         prompts: List[str],
         parser_func: Optional[Callable[[str], str]] = None,
         timeout: int = 60,
         max_retries: int = 5,
     ) -> List[Optional[str]]:
-        """Calls the Gemini model for multiple prompts in parallel using threads with retry logic.
+        """Calls the Gemini model for multiple prompts concurrently.
 
         Args:
             prompts (List[str]): A list of prompts to call the model with.
             parser_func (callable, optional): A function to process each response.
-            timeout (int): The maximum time (in seconds) to wait for each thread.
-            max_retries (int): The maximum number of retries for timed-out threads.
+            timeout (int): The maximum time (in seconds) to wait for each prompt.
+            max_retries (int): The maximum number of retries for each prompt.
 
         Returns:
             List[Optional[str]]:
-            A list of responses, or None for threads that failed.
+            A list of responses, or error messages for prompts that failed.
         """
-        results = [None] * len(prompts)
-
-        def worker(index: int, prompt: str):
-            """Thread worker function to call the model and store the result with retries."""
-            retries = 0
-            while retries <= max_retries:
-                try:
-                    return self.call(prompt, parser_func)
-                except Exception as e:  # pylint: disable=broad-exception-caught
-                    print(f"Error for prompt {index}: {str(e)}")
-                    retries += 1
-                    if retries <= max_retries:
-                        print(f"Retrying ({retries}/{max_retries}) for prompt {index}")
-                        time.sleep(1)  # Small delay before retrying
-                    else:
-                        return f"Error after retries: {str(e)}"
-
-        # Create and start one thread for each prompt
-        with ThreadPoolExecutor(max_workers=len(prompts)) as executor:
-            future_to_index = {
-                executor.submit(worker, i, prompt): i
-                for i, prompt in enumerate(prompts)
-            }
-
-            for future in as_completed(future_to_index, timeout=timeout):
-                index = future_to_index[future]
-                try:
-                    results[index] = future.result()
-                except Exception as e:  # pylint: disable=broad-exception-caught
-                    print(f"Unhandled error for prompt {index}: {e}")
-                    results[index] = "Unhandled Error"
 
-        # Handle remaining unfinished tasks after the timeout
-        for future in future_to_index:
-            index = future_to_index[future]
-            if not future.done():
+        async def worker(index: int, prompt: str) -> Optional[str]:
+            try:
+                return await asyncio.wait_for(
+                    self.call_async(
+                        prompt, parser_func, max_attempts=max_retries + 1
+                    ),
+                    timeout=timeout,
+                )
+            except asyncio.TimeoutError:
                 print(f"Timeout occurred for prompt {index}")
-                results[index] = "Timeout"
+                return "Timeout"
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                print(f"Error for prompt {index}: {str(e)}")
+                return f"Error after retries: {str(e)}"
+
+        return list(
+            await asyncio.gather(
+                *(worker(i, prompt) for i, prompt in enumerate(prompts))
+            )
+        )
 
-        return results
+    def call_parallel(
+        self,
+        prompts: List[str],
+        parser_func: Optional[Callable[[str], str]] = None,
+        timeout: int = 60,
+        max_retries: int = 5,
+    ) -> List[Optional[str]]:
+        """Calls the Gemini model for multiple prompts in parallel with retry logic.
+
+        This is the blocking version of `call_parallel_async`. The requests
+        share the process-wide request pool and rate limiters.
+
+        Args:
+            prompts (List[str]): A list of prompts to call the model with.
+            parser_func (callable, optional): A function to process each response.
+            timeout (int): The maximum time (in seconds) to wait for each prompt.
+            max_retries (int): The maximum number of retries for each prompt.
+
+        Returns:
+            List[Optional[str]]:
+            A list of responses, or error messages for prompts that failed.
+        """
+        coroutine = self.call_parallel_async(
+            prompts, parser_func=parser_func, timeout=timeout, max_retries=max_retries
+        )
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        # An event loop is already running in this thread and cannot be nested,
+        # so run the requests on a loop of their own.
+        return _LOOP_EXECUTOR.submit(asyncio.run, coroutine).result()
@@ -14,13 +14,18 @@
 
 """Translator from SQLite to BigQuery."""
 
+import collections
+import functools
 import re
-from typing import Any, Final
+import threading
+from typing import Any, ClassVar, Final
 
 import regex
 import sqlglot
 import sqlglot.optimizer
+from sqlglot.schema import MappingSchema
 
+from .. import candidate_selection
 from ..llm_utils import GeminiModel  # pylint: disable=g-importing-member
 from .correction_prompt_template import (
     CORRECTION_PROMPT_TEMPLATE_V1_0,
@@ -94,6 +99,11 @@ class SqlTranslator:
     SQLite to an output SQL dialect like BigQuery. It uses the SQLGlot library as
     a tool to perform the translation.
 
+    The parsed schema of a DDL schema string and the translations of previous
+    queries are cached for the whole process, so repeated translations against
+    the same dataset are lookups. Only translations passing the error check
+    are cached, and `evict_translation` forgets one that later fails to run.
+
     The translation is done by the following steps:
     1. (Optional) If there are errors in the input SQL query, the input SQL query
        is first modified by the LLM to address the errors.
@@ -114,10 +124,20 @@ class SqlTranslator:
         processed by the LLM.
       process_tool_output_errors: True if any errors in the tool output SQL query
         should be processed by the LLM.
+      number_of_candidates: The number of corrections the LLM generates when
+        processing errors. The one passing the error check that most
+        corrections agree on is used.
     """
 
     INPUT_DIALECT: Final[str] = "sqlite"
     OUTPUT_DIALECT: Final[str] = "bigquery"
+    TRANSLATION_CACHE_SIZE: Final[int] = 256
+
+    # The translations and their normalized form, by key.
+    _translation_cache: ClassVar[
+        collections.OrderedDict[tuple[Any, ...], tuple[str, str | None]]
+    ] = collections.OrderedDict()
+    _translation_cache_lock: ClassVar[threading.Lock] = threading.Lock()
 
     def __init__(
         self,
@@ -125,8 +145,10 @@ class SqlTranslator:
         temperature: float = 0.5,
         process_input_errors: bool = False,
         process_tool_output_errors: bool = False,
+        number_of_candidates: int = 1,
     ):
         """Initializes the translator."""
+        self._number_of_candidates: int = number_of_candidates
         self._process_input_errors: bool = process_input_errors
         self._process_tool_output_errors: bool = process_tool_output_errors
         self._input_errors: str | None = None
@@ -296,6 +318,44 @@ class SqlTranslator:
                 raise TypeError(f"Unsupported schema type: {type(schema)}")
         return schema_dict
 
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def _parse_ddl_schema(
+        ddl_schema: str, dialect: str
+    ) -> tuple[SQLGlotSchemaType | None, MappingSchema | None]:
+        """Parses a DDL schema string once per dataset schema and dialect."""
+        schema_dict = SqlTranslator.rewrite_schema_for_sqlglot(ddl_schema)
+        if not schema_dict:
+            return schema_dict, None
+        return schema_dict, MappingSchema(schema_dict, dialect=dialect)
+
+    @classmethod
+    def get_sqlglot_schema(
+        cls,
+        ddl_schema: str | SQLGlotSchemaType | BirdSampleType | None,
+        dialect: str,
+    ) -> tuple[SQLGlotSchemaType | None, MappingSchema | None]:
+        """Returns the schema in the SQLGlot format and as a `MappingSchema`.
+
+        Schemas given as DDL strings are only parsed the first time they are
+        seen. Other schema formats are converted on every call.
+
+        Args:
+          ddl_schema: The DDL schema, in any format accepted by
+            `rewrite_schema_for_sqlglot`.
+          dialect: The SQL dialect used to normalize the identifiers.
+
+        Returns:
+          tuple of the schema dictionary and the equivalent `MappingSchema`, or
+          (None, None) if no schema is provided.
+        """
+        if isinstance(ddl_schema, str):
+            return cls._parse_ddl_schema(ddl_schema, dialect.lower())
+        schema_dict = cls.rewrite_schema_for_sqlglot(ddl_schema)
+        if not schema_dict:
+            return schema_dict, None
+        return schema_dict, MappingSchema(schema_dict, dialect=dialect.lower())
+
     @classmethod
     def _check_for_errors(
         cls,
@@ -303,7 +363,7 @@ class SqlTranslator:
         sql_dialect: str,
         db: str | None = None,
         catalog: str | None = None,
-        schema_dict: SQLGlotSchemaType | None = None,
+        schema_dict: SQLGlotSchemaType | MappingSchema | None = None,
     ) -> tuple[str | None, str]:
         """Checks for errors in the SQL query.
 
@@ -314,7 +374,8 @@ class SqlTranslator:
           catalog: The catalog to use for the translation. `catalog` is the SQLGlot
             term for the project ID. This field is optional.
           schema_dict: The DDL schema to use for the translation. The DDL format is
-            in the SQLGlot format. This field is optional.
+            in the SQLGlot format, or a `MappingSchema` built from it. This field
+            is optional.
 
         Returns:
           tuple of the errors in the SQL query, or None if there are no errors, and
@@ -376,13 +437,15 @@ class SqlTranslator:
             sql_query = self._apply_heuristics(sql_query)
         # Reformat the schema if provided. This will remove any comments and
         # `INSERT INTO` statements.
-        schema_dict = self.rewrite_schema_for_sqlglot(ddl_schema)
+        schema_dict, mapping_schema = self.get_sqlglot_schema(
+            ddl_schema, dialect=self.OUTPUT_DIALECT
+        )
         errors_and_sql: tuple[str | None, str] = self._check_for_errors(
             sql_query=sql_query,
             sql_dialect=self.OUTPUT_DIALECT,
             db=db,
             catalog=catalog,
-            schema_dict=schema_dict,
+            schema_dict=mapping_schema,
         )
         errors, sql_query = errors_and_sql
         responses = sql_query  # Default to the input SQL query after error check.
@@ -404,15 +467,27 @@ class SqlTranslator:
                 requests, parser_func=self._parse_response
             )
             if responses:
-                # We only use the first response. Therefore the `number_of_candidates`
-                # parameter is not used.
-                # pylint: disable=g-bad-todo
-                # pylint: enable=g-bad-todo
-                # First, find the first non-None response.
-                responses = [r for r in responses if r is not None]
-                if responses:
-                    # Then, return the first non-None response.
-                    responses = responses[0]
+                # Keep the corrected candidate that passes the error check and
+                # that the most candidates agree on.
+                candidates = candidate_selection.dedupe_candidates(
+                    responses, dialect=self.OUTPUT_DIALECT
+                )
+                selected = candidate_selection.select_candidate(
+                    candidates,
+                    validate=lambda sql: self._check_for_errors(
+                        sql_query=sql,
+                        sql_dialect=self.OUTPUT_DIALECT,
+                        db=db,
+                        catalog=catalog,
+                        schema_dict=mapping_schema,
+                    )[0],
+                )
+                if selected is not None:
+                    responses = selected.sql
+                else:
+                    # Otherwise, return the first non-None response.
+                    responses = [r for r in responses if r is not None]
+                    responses = responses[0] if responses else sql_query
         return responses
 
     def translate(
@@ -435,6 +510,108 @@ class SqlTranslator:
         Returns:
           The translated SQL query.
         """
+        cache_key = self._translation_cache_key(sql_query, db, catalog, ddl_schema)
+        if cache_key is not None:
+            with self._translation_cache_lock:
+                cached = self._translation_cache.get(cache_key)
+                if cached is not None:
+                    self._translation_cache.move_to_end(cache_key)
+                    return cached[0]
+
+        translation = self._translate(sql_query, db, catalog, ddl_schema)
+
+        if cache_key is not None:
+            _, mapping_schema = self.get_sqlglot_schema(
+                ddl_schema, dialect=self.OUTPUT_DIALECT
+            )
+            errors, _ = self._check_for_errors(
+                sql_query=translation,
+                sql_dialect=self.OUTPUT_DIALECT,
+                db=db,
+                catalog=catalog,
+                schema_dict=mapping_schema,
+            )
+            if not errors:
+                normalized_translation = candidate_selection.normalize_sql(
+                    translation, self.OUTPUT_DIALECT
+                )
+                with self._translation_cache_lock:
+                    self._translation_cache[cache_key] = (
+                        translation,
+                        normalized_translation,
+                    )
+                    while len(self._translation_cache) > self.TRANSLATION_CACHE_SIZE:
+                        self._translation_cache.popitem(last=False)
+        return translation
+
+    @classmethod
+    def evict_translation(cls, sql_query: str) -> int:
+        """Removes the cached translations to a query, e.g., as it failed to run.
+
+        Args:
+          sql_query: The translated SQL query, in the output SQL dialect. Queries
+            differing only in formatting or comments are considered the same.
+
+        Returns:
+          The number of translations removed.
+        """
+        normalized_query = candidate_selection.normalize_sql(
+            sql_query, cls.OUTPUT_DIALECT
+        )
+        with cls._translation_cache_lock:
+            keys = [
+                key
+                for key, (translation, normalized_translation) in (
+                    cls._translation_cache.items()
+                )
+                if translation == sql_query
+                or (
+                    normalized_query is not None
+                    and normalized_translation == normalized_query
+                )
+            ]
+            for key in keys:
+                del cls._translation_cache[key]
+        return len(keys)
+
+    def _translation_cache_key(
+        self,
+        sql_query: str,
+        db: str | None,
+        catalog: str | None,
+        ddl_schema: str | SQLGlotSchemaType | BirdSampleType | None,
+    ) -> tuple[Any, ...] | None:
+        """Returns the key of a translation, or None if it cannot be cached.
+
+        Queries are keyed by their normalized form, so that queries differing
+        only in formatting or comments share a translation. Only schemas
+        given as DDL strings, or no schema, can be part of the key.
+        """
+        if ddl_schema is not None and not isinstance(ddl_schema, str):
+            return None
+        normalized_query = candidate_selection.normalize_sql(
+            sql_query, self.INPUT_DIALECT, lowercase_identifiers=False
+        )
+        return (
+            normalized_query or sql_query,
+            getattr(self._model, "model_name", None),
+            getattr(self._model, "temperature", self._temperature),
+            db,
+            catalog,
+            ddl_schema,
+            self._process_input_errors,
+            self._process_tool_output_errors,
+            self._number_of_candidates,
+        )
+
+    def _translate(
+        self,
+        sql_query: str,
+        db: str | None,
+        catalog: str | None,
+        ddl_schema: str | SQLGlotSchemaType | BirdSampleType | None,
+    ) -> str:
+        """Translates the SQL query without looking up the cache."""
         print("****** sql_query at translator entry:", sql_query)
         if self._process_input_errors:
             sql_query = self._fix_errors(
@@ -444,6 +621,7 @@ class SqlTranslator:
                 sql_dialect=self.OUTPUT_DIALECT,
                 ddl_schema=ddl_schema,
                 apply_heuristics=True,
+                number_of_candidates=self._number_of_candidates,
             )
         print("****** sql_query after fix_errors:", sql_query)
         sql_query = sqlglot.transpile(
@@ -463,6 +641,7 @@ class SqlTranslator:
                 sql_dialect=self.OUTPUT_DIALECT,
                 ddl_schema=ddl_schema,
                 apply_heuristics=True,
+                number_of_candidates=self._number_of_candidates,
             )
 
         sql_query = sql_query.strip().replace('"', "`")
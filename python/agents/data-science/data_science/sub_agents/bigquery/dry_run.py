@@ -0,0 +1,109 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Dry-run estimates and byte budgets for agent-generated SQL.
+
+A dry run validates a query and reports how many bytes it would process
+without executing it or incurring any cost. Queries over the budget are
+rejected before they run, and the estimate is returned to the agent so it can
+rewrite the query.
+"""
+
+import dataclasses
+import os
+
+from google.cloud import bigquery
+
+DEFAULT_MAX_BYTES_PROCESSED = 10 * 1024**3  # 10 GiB
+
+
+@dataclasses.dataclass(frozen=True)
+class DryRunEstimate:
+    """What BigQuery reports about a query without running it.
+
+    Attributes:
+        total_bytes_processed (int): Bytes the query would process.
+        referenced_tables (list[str]): Fully qualified names of the tables the
+          query reads.
+    """
+
+    total_bytes_processed: int
+    referenced_tables: list[str]
+
+    def to_dict(self):
+        return dataclasses.asdict(self)
+
+
+def get_max_bytes_processed():
+    """Returns the byte budget of a query, or None if it is unlimited.
+
+    The budget is read from `BQ_MAX_BYTES_PROCESSED`. Setting it to 0 disables
+    the budget.
+    """
+    max_bytes = int(
+        os.getenv("BQ_MAX_BYTES_PROCESSED", DEFAULT_MAX_BYTES_PROCESSED)
+    )
+    return max_bytes or None
+
+
+def format_bytes(num_bytes):
+    """Formats a number of bytes for humans, e.g. '1.5 GiB'."""
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if num_bytes < 1024 or unit == "TiB":
+            break
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} {unit}" if unit != "B" else f"{num_bytes} B"
+
+
+def dry_run(client, sql_string):
+    """Validates a query with a BigQuery dry run.
+
+    Args:
+        client (bigquery.Client): A BigQuery client.
+        sql_string (str): The query to estimate.
+
+    Returns:
+        DryRunEstimate: The estimate reported by BigQuery.
+
+    Raises:
+        google.api_core.exceptions.GoogleAPICallError: If the query is invalid.
+    """
+    job = client.query(
+        sql_string,
+        job_config=bigquery.QueryJobConfig(dry_run=True, use_query_cache=False),
+    )
+    return DryRunEstimate(
+        total_bytes_processed=job.total_bytes_processed or 0,
+        referenced_tables=[
+            f"{table.project}.{table.dataset_id}.{table.table_id}"
+            for table in job.referenced_tables or []
+        ],
+    )
+
+
+def check_budget(estimate, max_bytes_processed):
+    """Returns why a query exceeds the budget, or None if it is within it."""
+    if (
+        max_bytes_processed is None
+        or estimate.total_bytes_processed <= max_bytes_processed
+    ):
+        return None
+    tables = ", ".join(estimate.referenced_tables) or "none"
+    return (
+        "Query rejected: it would process "
+        f"{format_bytes(estimate.total_bytes_processed)}, over the budget of "
+        f"{format_bytes(max_bytes_processed)}. Referenced tables: {tables}. "
+        "Rewrite the query to read less data, e.g. by selecting only the "
+        "needed columns or filtering on partitioning or clustering columns."
+    )
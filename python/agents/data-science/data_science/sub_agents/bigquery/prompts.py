@@ -37,12 +37,12 @@ def return_instructions_bigquery() -> str:
 
       Use the provided tools to help generate the most accurate SQL:
       1. First, use {db_tool_name} tool to generate initial SQL from the question.
-      2. You should also validate the SQL you have created for syntax and function errors (Use run_bigquery_validation tool). If there are any errors, you should go back and address the error in the SQL. Recreate the SQL based by addressing the error.
+      2. You should also validate the SQL you have created for syntax and function errors (Use run_bigquery_validation tool). If there are any errors, you should go back and address the error in the SQL. Recreate the SQL based by addressing the error. If the query is rejected because it would process too much data, use the reported estimate and referenced tables to rewrite it so that it reads less data.
       4. Generate the final result in JSON format with four keys: "explain", "sql", "sql_results", "nl_results".
           "explain": "write out step-by-step reasoning to explain how you are generating the query based on the schema, example, and question.",
           "sql": "Output your generated SQL!",
           "sql_results": "raw sql execution query_result from run_bigquery_validation if it's available, otherwise None",
-          "nl_results": "Natural language about results, otherwise it's None if generated SQL is invalid"
+          "nl_results": "Natural language about results, otherwise it's None if generated SQL is invalid. If total_rows from run_bigquery_validation is larger than the number of rows in query_result, mention that the results were truncated."
       ```
       You should pass one tool call to another tool call as needed!
 
@@ -0,0 +1,264 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cache of the results of agent-generated queries.
+
+Entries are keyed by the query normalized with SQLGlot, so that follow-up
+questions regenerating the same query with other formatting share a result.
+Each entry records the `last_modified` time of the tables the query reads, and
+is only served while none of them changed and its TTL has not expired.
+Checking the tables is a metadata lookup, which is much cheaper than running
+the query again.
+
+Entries are kept in memory, and optionally also written to a directory so that
+they survive restarts.
+"""
+
+import collections
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import sqlglot
+
+from .chase_sql import candidate_selection
+
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_TTL_SECONDS = 600
+
+# Functions whose results change between runs. Queries calling them are never
+# cached, as BigQuery does for its own cache.
+_NON_DETERMINISTIC_EXPRESSIONS = (
+    sqlglot.exp.CurrentDate,
+    sqlglot.exp.CurrentDatetime,
+    sqlglot.exp.CurrentTime,
+    sqlglot.exp.CurrentTimestamp,
+    sqlglot.exp.Rand,
+)
+_NON_DETERMINISTIC_FUNCTIONS = ("GENERATE_UUID", "SESSION_USER")
+
+
+def get_cache_key(sql_string):
+    """Returns the cache key of a query, or None if it must not be cached."""
+    try:
+        expression = sqlglot.parse_one(
+            sql_string, read="bigquery", error_level=sqlglot.ErrorLevel.IMMEDIATE
+        )
+    except sqlglot.errors.SqlglotError:
+        return None
+    if expression.find(*_NON_DETERMINISTIC_EXPRESSIONS) or any(
+        function.name.upper() in _NON_DETERMINISTIC_FUNCTIONS
+        for function in expression.find_all(sqlglot.exp.Anonymous)
+    ):
+        return None
+    # BigQuery table names are case sensitive, so identifiers keep their case.
+    return candidate_selection.normalize_sql(
+        sql_string, "bigquery", lowercase_identifiers=False
+    )
+
+
+def get_table_snapshot(backend, referenced_tables):
+    """Returns the last modification time of each table, by table name."""
+    return {
+        table: backend.get_table_last_modified(table)
+        for table in sorted(referenced_tables)
+    }
+
+
+class QueryResultCache:
+    """LRU cache of query results with a TTL.
+
+    Attributes:
+        max_entries (int): The maximum number of entries kept in memory, and on
+          disk if enabled.
+        ttl_seconds (float): How long an entry may be served. A TTL of 0
+          disables the cache.
+        cache_dir (str): Directory where entries are also written, or None to
+          keep them in memory only.
+    """
+
+    def __init__(
+        self,
+        max_entries=DEFAULT_MAX_ENTRIES,
+        ttl_seconds=DEFAULT_TTL_SECONDS,
+        cache_dir=None,
+        clock=time.time,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir = cache_dir
+        self._clock = clock
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Creates the cache configured by the environment.
+
+        `BQ_RESULT_CACHE_TTL_SECONDS` (0 disables the cache),
+        `BQ_RESULT_CACHE_SIZE` and `BQ_RESULT_CACHE_DIR` override the defaults.
+        """
+        return cls(
+            max_entries=int(os.getenv("BQ_RESULT_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+            ttl_seconds=float(
+                os.getenv("BQ_RESULT_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)
+            ),
+            cache_dir=os.getenv("BQ_RESULT_CACHE_DIR") or None,
+        )
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0
+
+    def lookup(self, backend, sql_string):
+        """Returns a copy of the cached result of a query, or None.
+
+        Args:
+            backend (backends.BigQueryBackend): The database backend, used to
+              check that the tables read by the query did not change.
+            sql_string (str): The query.
+
+        Returns:
+            dict: The result stored by `store`, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        key = get_cache_key(sql_string)
+        if key is None:
+            return None
+        entry = self._get(key)
+        if entry is None:
+            return None
+        if self._clock() - entry["created_at"] > self.ttl_seconds:
+            self._delete(key)
+            return None
+        try:
+            snapshot = get_table_snapshot(backend, entry["snapshot"])
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logging.warning(f"Could not check the tables of a cached query: {e}")
+            return None
+        if snapshot != entry["snapshot"]:
+            self._delete(key)
+            return None
+        return copy.deepcopy(entry["result"])
+
+    def store(self, backend, sql_string, referenced_tables, result):
+        """Caches the result of a query.
+
+        Args:
+            backend (backends.BigQueryBackend): The database backend, used to
+              read the last modification time of the tables.
+            sql_string (str): The query.
+            referenced_tables (list[str]): The tables read by the query, e.g.
+              from a dry run.
+            result (dict): The result to cache.
+        """
+        if not self.enabled:
+            return
+        key = get_cache_key(sql_string)
+        if key is None or not referenced_tables:
+            # Without tables there is nothing to tell when the result changes.
+            return
+        try:
+            snapshot = get_table_snapshot(backend, referenced_tables)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logging.warning(f"Could not snapshot the tables of a query: {e}")
+            return
+        entry = {
+            "key": key,
+            "created_at": self._clock(),
+            "snapshot": snapshot,
+            "result": copy.deepcopy(result),
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        if self.cache_dir:
+            self._write(key, entry)
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self.cache_dir:
+            entry = self._read(key)
+            if entry is not None:
+                with self._lock:
+                    self._entries[key] = entry
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        return entry
+
+    def _delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.cache_dir:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _path(self, key):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _read(self, key):
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Guard against hash collisions.
+        return entry if entry.get("key") == key else None
+
+    def _write(self, key, entry):
+        try:
+            content = json.dumps(entry)
+        except (TypeError, ValueError):
+            # Values like Decimal or bytes would not read back as the same
+            # types, so such results are only cached in memory.
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, self._path(key))
+            self._evict_files()
+        except OSError as e:
+            logging.warning(f"Could not write to the result cache: {e}")
+
+    def _evict_files(self):
+        """Removes the least recently written entries beyond `max_entries`."""
+        paths = [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if name.endswith(".json")
+        ]
+        if len(paths) <= self.max_entries:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[: len(paths) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,398 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Builds the DDL description of a BigQuery dataset used by the NL2SQL tools.
+
+The whole dataset is listed with one INFORMATION_SCHEMA query and the columns
+of every table are read with another, so the number of round trips does not
+grow with the number of tables. The remaining per-table work (sample rows and
+Iceberg table metadata) runs concurrently.
+
+The DDL of each table is persisted in a local JSON cache keyed by the dataset
+and the table's `last_modified_time`, so a restart only refreshes the tables
+that changed since the previous run.
+"""
+
+import concurrent.futures
+import datetime
+import json
+import logging
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from google.cloud import bigquery
+
+SCHEMA_CACHE_VERSION = 1
+NUM_SAMPLE_ROWS = 5
+MAX_WORKERS = 16
+
+# Table types for which DDL is generated. Other types like MATERIALIZED_VIEW
+# or SNAPSHOT are skipped.
+_SUPPORTED_TABLE_TYPES = ("TABLE", "VIEW", "EXTERNAL")
+
+
+def _serialize_value_for_sql(value):
+    """Serializes a Python value from a query result into a BigQuery SQL literal."""
+    if isinstance(value, (list, np.ndarray)):
+        # Format arrays.
+        return f"[{', '.join(_serialize_value_for_sql(v) for v in value)}]"
+    if isinstance(value, dict):
+        # For STRUCT, BQ expects ('val1', 'val2', ...).
+        # The values() order from the result should match the column order.
+        return f"({', '.join(_serialize_value_for_sql(v) for v in value.values())})"
+    if pd.isna(value):
+        return "NULL"
+    if isinstance(value, str):
+        # Escape single quotes and backslashes for SQL strings.
+        return f"'{value.replace('\\', '\\\\').replace("'", "''")}'"
+    if isinstance(value, bytes):
+        return f"b'{value.decode('utf-8', 'replace').replace('\\', '\\\\').replace("'", "''")}'"
+    if isinstance(
+        value, (datetime.datetime, datetime.date, datetime.time, pd.Timestamp)
+    ):
+        # Timestamps and datetimes need to be quoted.
+        return f"'{value}'"
+    return str(value)
+
+
+def get_schema_cache_dir():
+    """Returns the directory of the local schema cache.
+
+    The location can be changed with `BQ_SCHEMA_CACHE_DIR`. Setting it to an
+    empty string disables the cache.
+    """
+    return os.getenv(
+        "BQ_SCHEMA_CACHE_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "data_science", "bq_schema"),
+    )
+
+
+class SchemaCache:
+    """Per-table DDL of one dataset, persisted as a JSON file.
+
+    Each entry records the table type and `last_modified_time` it was built
+    from. An entry is only reused while both still match the dataset.
+    """
+
+    def __init__(self, cache_dir, data_project_id, dataset_id):
+        self.path = os.path.join(cache_dir, f"{data_project_id}.{dataset_id}.json")
+
+    def load(self):
+        """Returns the cached entries by table name, or {} if there are none."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                content = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable schema cache {self.path}: {e}")
+            return {}
+        if content.get("version") != SCHEMA_CACHE_VERSION:
+            return {}
+        return content.get("tables", {})
+
+    def save(self, tables):
+        """Atomically replaces the cached entries with `tables`."""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                dir=os.path.dirname(self.path),
+                suffix=".tmp",
+                delete=False,
+            ) as f:
+                json.dump({"version": SCHEMA_CACHE_VERSION, "tables": tables}, f)
+            os.replace(f.name, self.path)
+        except OSError as e:
+            logging.warning(f"Could not write schema cache {self.path}: {e}")
+
+    @staticmethod
+    def is_fresh(entry, table_type, last_modified_time):
+        """Whether a cached entry still describes the table."""
+        return (
+            entry is not None
+            and last_modified_time is not None
+            and entry.get("table_type") == table_type
+            and entry.get("last_modified_time") == last_modified_time
+        )
+
+
+def _list_tables(client, data_project_id, dataset_id):
+    """Lists the tables of the dataset with their type and modification time.
+
+    INFORMATION_SCHEMA is used rather than the tables.list API, which can fail
+    for datasets containing BigLake tables like Apache Iceberg.
+    """
+    query = f"""
+        SELECT
+          t.table_name,
+          t.table_type,
+          v.view_definition,
+          m.last_modified_time
+        FROM `{data_project_id}.{dataset_id}.INFORMATION_SCHEMA.TABLES` AS t
+        LEFT JOIN `{data_project_id}.{dataset_id}.INFORMATION_SCHEMA.VIEWS` AS v
+          USING (table_name)
+        LEFT JOIN `{data_project_id}.{dataset_id}.__TABLES__` AS m
+          ON m.table_id = t.table_name
+        ORDER BY t.table_name
+    """
+    return list(client.query(query).result())
+
+
+def _get_columns(client, data_project_id, dataset_id, table_names):
+    """Returns the column definitions of the given tables, by table name.
+
+    Columns are returned as (name, data_type, description) tuples, in ordinal
+    order. Types use the GoogleSQL spelling, e.g. `ARRAY<STRUCT<a INT64>>`.
+    """
+    query = f"""
+        SELECT
+          c.table_name,
+          c.column_name,
+          c.data_type,
+          p.description
+        FROM `{data_project_id}.{dataset_id}.INFORMATION_SCHEMA.COLUMNS` AS c
+        LEFT JOIN
+          `{data_project_id}.{dataset_id}.INFORMATION_SCHEMA.COLUMN_FIELD_PATHS` AS p
+          ON p.table_name = c.table_name
+          AND p.column_name = c.column_name
+          AND p.field_path = c.column_name
+        WHERE c.table_name IN UNNEST(@table_names)
+        ORDER BY c.table_name, c.ordinal_position
+    """
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[
+            bigquery.ArrayQueryParameter("table_names", "STRING", table_names)
+        ]
+    )
+    columns = {name: [] for name in table_names}
+    for row in client.query(query, job_config=job_config).result():
+        columns[row.table_name].append(
+            (row.column_name, row.data_type, row.description)
+        )
+    return columns
+
+
+def _view_ddl(table_ref, view_definition):
+    return f"CREATE OR REPLACE VIEW `{table_ref}` AS\n{view_definition};\n\n"
+
+
+def format_table_ddl(table_name, columns, sample_rows=()):
+    """Returns the DDL of a table followed by INSERT statements of sample rows.
+
+    Args:
+        table_name (str): The fully qualified name of the table.
+        columns (list[tuple]): (name, data_type, description) tuples.
+        sample_rows (list[tuple]): Values of a few rows, in column order.
+    """
+    column_defs = []
+    for name, data_type, description in columns:
+        col_def = f"  `{name}` {data_type}"
+        if description:
+            # Use OPTIONS for column descriptions
+            col_def += (
+                " OPTIONS(description='"
+                f"{description.replace("'", "''")}')"
+            )
+        column_defs.append(col_def)
+
+    ddl_statement = (
+        f"CREATE OR REPLACE TABLE `{table_name}` "
+        f"(\n{',\n'.join(column_defs)}\n);\n\n"
+    )
+
+    if sample_rows:
+        ddl_statement += f"-- Example values for table `{table_name}`:\n"
+        for values in sample_rows:
+            values_str = ", ".join(_serialize_value_for_sql(v) for v in values)
+            ddl_statement += (
+                f"INSERT INTO `{table_name}` VALUES ({values_str});\n\n"
+            )
+    return ddl_statement
+
+
+def _table_ddl(client, table_ref, columns):
+    """Returns the DDL of a table followed by sample rows.
+
+    Returns:
+        tuple[str, bool]: The DDL and whether it may be cached. Sample rows
+            that could not be read are retried on the next refresh.
+    """
+    # Add example values if available by running a query. This is more
+    # robust than list_rows, especially for BigLake tables like Iceberg.
+    try:
+        sample_query = f"SELECT * FROM `{table_ref}` LIMIT {NUM_SAMPLE_ROWS}"
+        rows = list(client.query(sample_query).result())
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logging.warning(
+            f"Could not retrieve sample rows for table {table_ref.path}: {e}"
+        )
+        ddl_statement = format_table_ddl(table_ref, columns)
+        ddl_statement += f"-- NOTE: Could not retrieve sample rows for table {table_ref.path}.\n\n"
+        return ddl_statement, False
+
+    return (
+        format_table_ddl(table_ref, columns, [row.values() for row in rows]),
+        True,
+    )
+
+
+def _external_table_ddl(client, table_ref, columns):
+    """Returns the DDL of an Iceberg table, or "" for other external tables."""
+    table_obj = client.get_table(table_ref)
+    config = table_obj.external_data_configuration
+    if not config or config.source_format != "ICEBERG":
+        # Skip DDL generation for other external tables.
+        return "", True
+
+    uris_list_str = ",\n    ".join([f"'{uri}'" for uri in config.source_uris])
+    columns_str = ",\n".join(
+        f"  `{name}` {data_type}" for name, data_type, _ in columns
+    )
+    return (
+        f"""CREATE EXTERNAL TABLE `{table_ref}` (
+{columns_str}
+)
+WITH CONNECTION `{config.connection_id}`
+OPTIONS (
+  uris = [{uris_list_str}],
+  format = 'ICEBERG'
+);\n\n""",
+        True,
+    )
+
+
+def get_bigquery_schema(dataset_id,
+                        data_project_id,
+                        client=None,
+                        compute_project_id=None,
+                        cache_dir=None,
+                        max_workers=MAX_WORKERS):
+    """Retrieves schema and generates DDL with example values for a BigQuery dataset.
+
+    See `get_bigquery_table_schemas` for the arguments.
+
+    Returns:
+        str: A string containing the generated DDL statements.
+    """
+    return "".join(
+        get_bigquery_table_schemas(
+            dataset_id,
+            data_project_id,
+            client=client,
+            compute_project_id=compute_project_id,
+            cache_dir=cache_dir,
+            max_workers=max_workers,
+        ).values()
+    )
+
+
+def get_bigquery_table_schemas(dataset_id,
+                               data_project_id,
+                               client=None,
+                               compute_project_id=None,
+                               cache_dir=None,
+                               max_workers=MAX_WORKERS):
+    """Generates the DDL with example values of each table of a BigQuery dataset.
+
+    Tables whose `last_modified_time` matches the local schema cache are not
+    read again. The others are refreshed concurrently and written back to the
+    cache.
+
+    Args:
+        dataset_id (str): The ID of the BigQuery dataset (e.g., 'my_dataset').
+        data_project_id (str): Project used for BQ data.
+        client (bigquery.Client): A BigQuery client.
+        compute_project_id (str): Project used for BQ compute.
+        cache_dir (str): Directory of the schema cache. Defaults to
+          `get_schema_cache_dir()`. An empty string disables the cache.
+        max_workers (int): Maximum number of tables refreshed concurrently.
+
+    Returns:
+        dict[str, str]: The DDL statements by table name, in table name order.
+    """
+
+    if client is None:
+        client = bigquery.Client(project=compute_project_id)
+    if cache_dir is None:
+        cache_dir = get_schema_cache_dir()
+
+    dataset_ref = bigquery.DatasetReference(data_project_id, dataset_id)
+    cache = SchemaCache(cache_dir, data_project_id, dataset_id) if cache_dir else None
+    cached_entries = cache.load() if cache else {}
+
+    tables = [
+        row
+        for row in _list_tables(client, data_project_id, dataset_id)
+        if row.table_type in _SUPPORTED_TABLE_TYPES
+    ]
+
+    ddl_by_table = {}
+    entries = {}
+    stale_tables = []
+    for row in tables:
+        if row.table_type == "VIEW":
+            # The definition is already part of the listing.
+            ddl_by_table[row.table_name] = _view_ddl(
+                dataset_ref.table(row.table_name), row.view_definition
+            )
+            continue
+        entry = cached_entries.get(row.table_name)
+        if SchemaCache.is_fresh(entry, row.table_type, row.last_modified_time):
+            ddl_by_table[row.table_name] = entry["ddl"]
+            entries[row.table_name] = entry
+        else:
+            stale_tables.append(row)
+
+    if stale_tables:
+        logging.info(
+            f"Refreshing the schema of {len(stale_tables)} of {len(tables)} "
+            f"tables in {data_project_id}.{dataset_id}."
+        )
+        columns = _get_columns(
+            client,
+            data_project_id,
+            dataset_id,
+            [row.table_name for row in stale_tables],
+        )
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers
+        ) as executor:
+            futures = {
+                executor.submit(
+                    _table_ddl if row.table_type == "TABLE" else _external_table_ddl,
+                    client,
+                    dataset_ref.table(row.table_name),
+                    columns[row.table_name],
+                ): row
+                for row in stale_tables
+            }
+            for future in concurrent.futures.as_completed(futures):
+                row = futures[future]
+                ddl, cacheable = future.result()
+                ddl_by_table[row.table_name] = ddl
+                if cacheable and row.last_modified_time is not None:
+                    entries[row.table_name] = {
+                        "table_type": row.table_type,
+                        "last_modified_time": row.last_modified_time,
+                        "ddl": ddl,
+                    }
+
+    if cache and (stale_tables or entries.keys() != cached_entries.keys()):
+        cache.save(entries)
+
+    return {row.table_name: ddl_by_table[row.table_name] for row in tables}
@@ -0,0 +1,166 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Retrieval of the tables relevant to a question.
+
+The DDL of large datasets makes prompts long, slow and expensive. Each table's
+DDL (its name, columns, descriptions and sample rows) is indexed locally with
+BM25, and prompts only include the tables that best match the question. The
+full schema is used when the dataset is small enough or when no table matches.
+"""
+
+import collections
+import logging
+import math
+import os
+import re
+
+DEFAULT_TOP_K = 10
+
+# Words of the questions that say nothing about the tables.
+_STOP_WORDS = frozenset(
+    """
+    a about all an and any are as at be by can did do does each for from give
+    has have how i in is it list me my of on or per show tell than that the
+    their them there these this to was were what when where which who why
+    with would you
+    """.split()
+)
+
+
+def get_top_k():
+    """Returns the number of tables included per question, 0 for all of them.
+
+    Set with `BQ_SCHEMA_TOP_K`.
+    """
+    return int(os.getenv("BQ_SCHEMA_TOP_K", DEFAULT_TOP_K))
+
+
+def _stem(token):
+    """Strips plural endings, so that "orders" matches the `order_id` column."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Splits text into lowercase terms, including snake_case and camelCase."""
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+    return [
+        _stem(token)
+        for token in re.findall(r"[a-z]+|[0-9]+", text.lower())
+        if token not in _STOP_WORDS
+    ]
+
+
+class SchemaIndex:
+    """BM25 index over the DDL of the tables of a dataset.
+
+    Attributes:
+        table_schemas (dict[str, str]): The DDL of each table, by table name.
+        full_schema (str): The DDL of all the tables.
+    """
+
+    def __init__(self, table_schemas, k1=1.5, b=0.75):
+        self.table_schemas = dict(table_schemas)
+        self.full_schema = "".join(self.table_schemas.values())
+        self._k1 = k1
+        self._b = b
+        self._term_frequencies = {}
+        document_frequencies = collections.Counter()
+        for table_name, ddl in self.table_schemas.items():
+            # Table names are repeated to weigh more than column names.
+            terms = collections.Counter(tokenize(table_name) * 2 + tokenize(ddl))
+            self._term_frequencies[table_name] = terms
+            document_frequencies.update(terms.keys())
+        num_tables = len(self.table_schemas)
+        self._lengths = {
+            table_name: sum(terms.values())
+            for table_name, terms in self._term_frequencies.items()
+        }
+        self._average_length = (
+            sum(self._lengths.values()) / num_tables if num_tables else 0
+        )
+        self._idf = {
+            term: math.log(1 + (num_tables - count + 0.5) / (count + 0.5))
+            for term, count in document_frequencies.items()
+        }
+
+    def search(self, question, top_k):
+        """Returns the best matching tables as (table name, score) tuples.
+
+        Tables that share no term with the question are never returned. Ties
+        are broken by table name order.
+        """
+        terms = set(tokenize(question)) & self._idf.keys()
+        scores = []
+        for table_name, frequencies in self._term_frequencies.items():
+            score = 0.0
+            norm = self._k1 * (
+                1 - self._b + self._b * self._lengths[table_name] / self._average_length
+            )
+            for term in terms:
+                frequency = frequencies.get(term, 0)
+                if frequency:
+                    score += (
+                        self._idf[term]
+                        * frequency
+                        * (self._k1 + 1)
+                        / (frequency + norm)
+                    )
+            if score > 0:
+                scores.append((table_name, score))
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores[:top_k]
+
+    def get_schema(self, question, top_k=None):
+        """Returns the DDL of the tables relevant to a question.
+
+        Args:
+            question (str): The natural language question.
+            top_k (int): The maximum number of tables to include. Defaults to
+              `get_top_k()`. 0 includes all of them.
+
+        Returns:
+            str: The DDL of the best matching tables, followed by the names of
+              the other tables. The full schema if the dataset has at most
+              `top_k` tables, or if no table matches the question.
+        """
+        if top_k is None:
+            top_k = get_top_k()
+        if not top_k or len(self.table_schemas) <= top_k or not question:
+            return self.full_schema
+        matches = {table_name for table_name, _ in self.search(question, top_k)}
+        if not matches:
+            logging.info("No table matches the question, using the full schema.")
+            return self.full_schema
+        logging.info(
+            f"Using {len(matches)} of {len(self.table_schemas)} tables: "
+            f"{', '.join(sorted(matches))}"
+        )
+        other_tables = [
+            table_name for table_name in self.table_schemas if table_name not in matches
+        ]
+        return (
+            "".join(
+                ddl
+                for table_name, ddl in self.table_schemas.items()
+                if table_name in matches
+            )
+            + "-- Other tables of the dataset, whose schema is not shown: "
+            + ", ".join(other_tables)
+            + "\n"
+        )
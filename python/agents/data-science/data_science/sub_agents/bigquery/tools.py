@@ -19,13 +19,15 @@ import logging
 import os
 import re
 
-import numpy as np
-import pandas as pd
 from data_science.utils.utils import get_env_var
 from google.adk.tools import ToolContext
 from google.cloud import bigquery
 from google.genai import Client
 
+from . import backends
+from . import dry_run
+from . import result_cache
+from . import schema_retrieval
 from .chase_sql import chase_constants
 
 # Assume that `BQ_COMPUTE_PROJECT_ID` and `BQ_DATA_PROJECT_ID` are set in the
@@ -39,30 +41,11 @@ llm_client = Client(vertexai=True, project=vertex_project, location=location)
 MAX_NUM_ROWS = 80
 
 
-def _serialize_value_for_sql(value):
-    """Serializes a Python value from a pandas DataFrame into a BigQuery SQL literal."""
-    if pd.isna(value):
-        return "NULL"
-    if isinstance(value, str):
-        # Escape single quotes and backslashes for SQL strings.
-        return f"'{value.replace('\\', '\\\\').replace("'", "''")}'"
-    if isinstance(value, bytes):
-        return f"b'{value.decode('utf-8', 'replace').replace('\\', '\\\\').replace("'", "''")}'"
-    if isinstance(value, (datetime.datetime, datetime.date, pd.Timestamp)):
-        # Timestamps and datetimes need to be quoted.
-        return f"'{value}'"
-    if isinstance(value, (list, np.ndarray)):
-        # Format arrays.
-        return f"[{', '.join(_serialize_value_for_sql(v) for v in value)}]"
-    if isinstance(value, dict):
-        # For STRUCT, BQ expects ('val1', 'val2', ...).
-        # The values() order from the dataframe should match the column order.
-        return f"({', '.join(_serialize_value_for_sql(v) for v in value.values())})"
-    return str(value)
-
-
 database_settings = None
 bq_client = None
+backend = None
+query_result_cache = None
+schema_index = None
 
 
 def get_bq_client():
@@ -74,6 +57,27 @@ def get_bq_client():
     return bq_client
 
 
+def get_backend():
+    """Get the database backend selected by `NL2SQL_BACKEND`."""
+    global backend
+    if backend is None:
+        if backends.get_backend_name() == "DUCKDB":
+            backend = backends.DuckDBBackend.from_env(
+                get_env_var("BQ_DATA_PROJECT_ID"), get_env_var("BQ_DATASET_ID")
+            )
+        else:
+            backend = backends.BigQueryBackend(get_bq_client())
+    return backend
+
+
+def get_query_result_cache():
+    """Get the cache of query results."""
+    global query_result_cache
+    if query_result_cache is None:
+        query_result_cache = result_cache.QueryResultCache.from_env()
+    return query_result_cache
+
+
 def get_database_settings():
     """Get database settings."""
     global database_settings
@@ -82,147 +86,41 @@ def get_database_settings():
     return database_settings
 
 
+def get_schema_index():
+    """Get the retrieval index over the tables of the dataset."""
+    if schema_index is None:
+        update_database_settings()
+    return schema_index
+
+
+def get_relevant_schema(question):
+    """Get the DDL of the tables relevant to a question.
+
+    Only the `BQ_SCHEMA_TOP_K` best matching tables are included, unless the
+    dataset is small enough or no table matches. See `schema_retrieval`.
+    """
+    return get_schema_index().get_schema(question)
+
+
 def update_database_settings():
     """Update database settings."""
-    global database_settings
-    ddl_schema = get_bigquery_schema(
-        dataset_id=get_env_var("BQ_DATASET_ID"),
-        data_project_id=get_env_var("BQ_DATA_PROJECT_ID"),
-        client=get_bq_client(),
-        compute_project_id=get_env_var("BQ_COMPUTE_PROJECT_ID")
+    global database_settings, schema_index
+    schema_index = schema_retrieval.SchemaIndex(
+        get_backend().get_table_schemas(
+            data_project_id=get_env_var("BQ_DATA_PROJECT_ID"),
+            dataset_id=get_env_var("BQ_DATASET_ID"),
+        )
     )
     database_settings = {
         "bq_project_id": get_env_var("BQ_DATA_PROJECT_ID"),
         "bq_dataset_id": get_env_var("BQ_DATASET_ID"),
-        "bq_ddl_schema": ddl_schema,
+        "bq_ddl_schema": schema_index.full_schema,
         # Include ChaseSQL-specific constants.
         **chase_constants.chase_sql_constants_dict,
     }
     return database_settings
 
 
-def get_bigquery_schema(dataset_id,
-                        data_project_id,
-                        client=None,
-                        compute_project_id=None):
-    """Retrieves schema and generates DDL with example values for a BigQuery dataset.
-
-    Args:
-        dataset_id (str): The ID of the BigQuery dataset (e.g., 'my_dataset').
-        data_project_id (str): Project used for BQ data.
-        client (bigquery.Client): A BigQuery client.
-        compute_project_id (str): Project used for BQ compute.
-
-    Returns:
-        str: A string containing the generated DDL statements.
-    """
-
-    if client is None:
-        client = bigquery.Client(project=compute_project_id)
-
-    # dataset_ref = client.dataset(dataset_id)
-    dataset_ref = bigquery.DatasetReference(data_project_id, dataset_id)
-
-    ddl_statements = ""
-
-    # Query INFORMATION_SCHEMA to robustly list tables. This is the recommended
-    # approach when a dataset may contain BigLake tables like Apache Iceberg,
-    # as the tables.list API can fail in those cases.
-    info_schema_query = f"""
-        SELECT table_name
-        FROM `{data_project_id}.{dataset_id}.INFORMATION_SCHEMA.TABLES`
-    """
-    query_job = client.query(info_schema_query)
-
-    for table_row in query_job.result():
-        table_ref = dataset_ref.table(table_row.table_name)
-        table_obj = client.get_table(table_ref)
-
-        if table_obj.table_type == "VIEW":
-            view_query = table_obj.view_query
-            ddl_statements += (
-                f"CREATE OR REPLACE VIEW `{table_ref}` AS\n{view_query};\n\n"
-            )
-            continue
-        elif table_obj.table_type == "EXTERNAL":
-            if (
-                table_obj.external_data_configuration
-                and table_obj.external_data_configuration.source_format
-                == "ICEBERG"
-            ):
-                config = table_obj.external_data_configuration
-                uris_list_str = ",\n    ".join(
-                    [f"'{uri}'" for uri in config.source_uris]
-                )
-
-                # Build column definitions from schema
-                column_defs = []
-                for field in table_obj.schema:
-                    col_type = field.field_type
-                    if field.mode == "REPEATED":
-                        col_type = f"ARRAY<{col_type}>"
-                    column_defs.append(f"  `{field.name}` {col_type}")
-                columns_str = ",\n".join(column_defs)
-
-                ddl_statements += f"""CREATE EXTERNAL TABLE `{table_ref}` (
-{columns_str}
-)
-WITH CONNECTION `{config.connection_id}`
-OPTIONS (
-  uris = [{uris_list_str}],
-  format = 'ICEBERG'
-);\n\n"""
-            # Skip DDL generation for other external tables.
-            continue
-        elif table_obj.table_type == "TABLE":
-            column_defs = []
-            for field in table_obj.schema:
-                col_type = field.field_type
-                if field.mode == "REPEATED":
-                    col_type = f"ARRAY<{col_type}>"
-                col_def = f"  `{field.name}` {col_type}"
-                if field.description:
-                    # Use OPTIONS for column descriptions
-                    col_def += (
-                        " OPTIONS(description='"
-                        f"{field.description.replace("'", "''")}')"
-                    )
-                column_defs.append(col_def)
-
-            ddl_statement = (
-                f"CREATE OR REPLACE TABLE `{table_ref}` "
-                f"(\n{',\n'.join(column_defs)}\n);\n\n"
-            )
-
-            # Add example values if available by running a query. This is more
-            # robust than list_rows, especially for BigLake tables like Iceberg.
-            try:
-                sample_query = f"SELECT * FROM `{table_ref}` LIMIT 5"
-                rows = client.query(sample_query).to_dataframe()
-
-                if not rows.empty:
-                    ddl_statement += f"-- Example values for table `{table_ref}`:\n"
-                    for _, row in rows.iterrows():
-                        values_str = ", ".join(
-                            _serialize_value_for_sql(v) for v in row.values
-                        )
-                        ddl_statement += (
-                            f"INSERT INTO `{table_ref}` VALUES ({values_str});\n\n"
-                        )
-            except Exception as e:
-                logging.warning(
-                    f"Could not retrieve sample rows for table {table_ref.path}: {e}"
-                )
-                ddl_statement += f"-- NOTE: Could not retrieve sample rows for table {table_ref.path}.\n\n"
-
-            ddl_statements += ddl_statement
-        else:
-            # Skip other types like MATERIALIZED_VIEW, SNAPSHOT etc.
-            continue
-
-    return ddl_statements
-
-
 def initial_bq_nl2sql(
     question: str,
     tool_context: ToolContext,
@@ -269,7 +167,7 @@ The database structure is defined by the following table schemas (possibly with
 
    """
 
-    ddl_schema = tool_context.state["database_settings"]["bq_ddl_schema"]
+    ddl_schema = get_relevant_schema(question)
 
     prompt = prompt_template.format(
         MAX_NUM_ROWS=MAX_NUM_ROWS, SCHEMA=ddl_schema, QUESTION=question
@@ -306,11 +204,16 @@ def run_bigquery_validation(
     2. **DML/DDL Restriction:**  Rejects any SQL queries containing DML or DDL
        statements (e.g., UPDATE, DELETE, INSERT, CREATE, ALTER) to ensure
        read-only operations.
-    3. **Syntax and Execution:** Sends the cleaned SQL to BigQuery for validation.
+    3. **Cost Estimate:** Dry-runs the query to get the number of bytes it
+       would process and the tables it references. Queries over the byte
+       budget (`BQ_MAX_BYTES_PROCESSED`) are rejected without being executed.
+    4. **Syntax and Execution:** Sends the cleaned SQL to BigQuery for validation.
        If the query is syntactically correct and executable, it retrieves the
        results.
-    4. **Result Analysis:**  Checks if the query produced any results. If so, it
-       formats the first few rows of the result set for inspection.
+    5. **Result Analysis:**  Checks if the query produced any results. If so, it
+       formats the first few rows of the result set for inspection. At most
+       `MAX_NUM_ROWS` rows are downloaded from BigQuery, the total number of
+       rows is taken from the job statistics.
 
     Args:
         sql_string (str): The SQL query string to validate.
@@ -319,10 +222,15 @@ def run_bigquery_validation(
     Returns:
         str: A message indicating the validation outcome. This includes:
              - "Valid SQL. Results: ..." if the query is valid and returns data.
+               `total_rows` then holds the number of rows of the full result,
+               which exceeds the number of returned rows when it was truncated.
              - "Valid SQL. Query executed successfully (no results)." if the query
                 is valid but returns no data.
              - "Invalid SQL: ..." if the query is invalid, along with the error
                 message from BigQuery.
+             - "Query rejected: ..." if the query would process more bytes
+                than the budget allows.
+             `dry_run` holds the estimate of valid queries.
     """
 
     def cleanup_sql(sql_string):
@@ -340,17 +248,20 @@ def run_bigquery_validation(
         # 4. Replace escaped newlines (those not preceded by a backslash)
         sql_string = sql_string.replace("\\n", "\n")
 
-        # 5. Add limit clause if not present
-        if "limit" not in sql_string.lower():
-            sql_string = sql_string + " limit " + str(MAX_NUM_ROWS)
-
+        # The number of rows is bounded when fetching the results rather than
+        # with a LIMIT clause, so that the total row count stays available.
         return sql_string
 
     logging.info("Validating SQL: %s", sql_string)
     sql_string = cleanup_sql(sql_string)
     logging.info("Validating SQL (after cleanup): %s", sql_string)
 
-    final_result = {"query_result": None, "error_message": None}
+    final_result = {
+        "query_result": None,
+        "total_rows": None,
+        "dry_run": None,
+        "error_message": None,
+    }
 
     # More restrictive check for BigQuery - disallow DML and DDL
     if re.search(
@@ -361,11 +272,36 @@ def run_bigquery_validation(
         )
         return final_result
 
+    db_backend = get_backend()
+    cache = get_query_result_cache()
+    cached_result = cache.lookup(db_backend, sql_string)
+    if cached_result is not None:
+        logging.info("Serving the cached results of: %s", sql_string)
+        tool_context.state["query_result"] = cached_result["query_result"]
+        tool_context.state["query_total_rows"] = cached_result["total_rows"]
+        return cached_result
+
+    max_bytes_processed = dry_run.get_max_bytes_processed()
+
     try:
-        query_job = get_bq_client().query(sql_string)
-        results = query_job.result()  # Get the query results
+        # Estimate the cost before running the query. This also catches
+        # invalid SQL without executing anything.
+        estimate = db_backend.dry_run(sql_string)
+        final_result["dry_run"] = estimate.to_dict()
+        budget_error = dry_run.check_budget(estimate, max_bytes_processed)
+        if budget_error:
+            final_result["error_message"] = budget_error
+            return final_result
+
+        # The budget is enforced during execution as well, in case the
+        # estimate was off.
+        results = db_backend.execute(
+            sql_string,
+            max_rows=MAX_NUM_ROWS,
+            max_bytes_processed=max_bytes_processed,
+        )
 
-        if results.schema:  # Check if query returned data
+        if results.columns:  # Check if query returned data
             rows = [
                 {
                     key: (
@@ -375,14 +311,17 @@ def run_bigquery_validation(
                     )
                     for (key, value) in row.items()
                 }
-                for row in results
-            ][
-                :MAX_NUM_ROWS
-            ]  # Convert BigQuery RowIterator to list of dicts
+                for row in results.rows
+            ]
             # return f"Valid SQL. Results: {rows}"
             final_result["query_result"] = rows
+            final_result["total_rows"] = results.total_rows
 
             tool_context.state["query_result"] = rows
+            tool_context.state["query_total_rows"] = final_result["total_rows"]
+            cache.store(
+                db_backend, sql_string, estimate.referenced_tables, final_result
+            )
 
         else:
             final_result["error_message"] = (
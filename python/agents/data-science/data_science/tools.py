@@ -22,6 +22,7 @@ from google.adk.tools import ToolContext
 from google.adk.tools.agent_tool import AgentTool
 
 from .sub_agents import ds_agent, db_agent
+from .sub_agents.analytics import data_handoff
 
 
 async def call_db_agent(
@@ -53,13 +54,23 @@ async def call_ds_agent(
         return tool_context.state["db_agent_output"]
 
     input_data = tool_context.state["query_result"]
+    # The query result only holds the first rows when there are more.
+    total_rows = tool_context.state.get("query_total_rows")
 
-    question_with_data = f"""
-  Question to answer: {question}
-
+    # Hand off the data as a file, so that the prompt does not grow with the
+    # number of rows. Fall back to passing the data inline.
+    data_description = await data_handoff.handoff_query_result(
+        tool_context, input_data, total_rows
+    )
+    if data_description is None:
+        data_description = f"""
   Actual data to analyze prevoius quesiton is already in the following:
   {input_data}
+{data_handoff.describe_truncation(len(input_data or []), total_rows)}"""
 
+    question_with_data = f"""
+  Question to answer: {question}
+{data_description}
   """
 
     agent_tool = AgentTool(agent=ds_agent)
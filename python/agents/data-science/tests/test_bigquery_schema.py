@@ -0,0 +1,219 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the BigQuery schema introspection and its cache."""
+
+import os
+import sys
+import tempfile
+import threading
+import types
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from google.cloud import bigquery
+
+from data_science.sub_agents.bigquery import schema
+
+
+def _rows(names, *values):
+    field_to_index = {name: i for i, name in enumerate(names)}
+    return [bigquery.Row(v, field_to_index) for v in values]
+
+
+class FakeClient:
+    """Answers the queries issued by `get_bigquery_schema` from memory."""
+
+    def __init__(self, tables, columns, samples, external_configs=None):
+        # tables: name -> (table_type, view_definition, last_modified_time)
+        self.tables = tables
+        self.columns = columns
+        self.samples = samples
+        self.external_configs = external_configs or {}
+        self.queries = []
+        self.get_table_calls = []
+        self._lock = threading.Lock()
+
+    def query(self, query, job_config=None):
+        with self._lock:
+            self.queries.append(query)
+        if "INFORMATION_SCHEMA.TABLES" in query:
+            result = _rows(
+                ["table_name", "table_type", "view_definition", "last_modified_time"],
+                *[(name, *info) for name, info in sorted(self.tables.items())],
+            )
+        elif "INFORMATION_SCHEMA.COLUMNS" in query:
+            (param,) = job_config.query_parameters
+            result = _rows(
+                ["table_name", "column_name", "data_type", "description"],
+                *[
+                    (name, *column)
+                    for name in param.values
+                    for column in self.columns.get(name, [])
+                ],
+            )
+        else:
+            table_name = query.split("`")[1].split(".")[-1]
+            names, *values = self.samples[table_name]
+            result = _rows(names, *values)
+        return types.SimpleNamespace(result=lambda: result)
+
+    def get_table(self, table_ref):
+        with self._lock:
+            self.get_table_calls.append(table_ref.table_id)
+        return types.SimpleNamespace(
+            external_data_configuration=self.external_configs.get(
+                table_ref.table_id
+            )
+        )
+
+    def sample_queries(self):
+        return [q for q in self.queries if "LIMIT" in q]
+
+
+class TestBigQuerySchema(unittest.TestCase):
+    """Test cases for `get_bigquery_schema`."""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.client = FakeClient(
+            tables={
+                "orders": ("TABLE", None, 100),
+                "customers": ("TABLE", None, 200),
+                "big_orders": ("VIEW", "SELECT * FROM orders", 300),
+                "lake": ("EXTERNAL", None, 400),
+                "snap": ("SNAPSHOT", None, 500),
+            },
+            columns={
+                "orders": [
+                    ("id", "INT64", "Order id"),
+                    ("tags", "ARRAY<STRING>", None),
+                ],
+                "customers": [("name", "STRING", "Customer's name")],
+                "lake": [("x", "FLOAT64", None)],
+            },
+            samples={
+                "orders": (["id", "tags"], (1, ["a", "b"]), (2, [])),
+                "customers": (["name"], ("O'Brien",), (None,)),
+            },
+            external_configs={
+                "lake": types.SimpleNamespace(
+                    source_format="ICEBERG",
+                    source_uris=["gs://bucket/lake"],
+                    connection_id="p.us.conn",
+                )
+            },
+        )
+
+    def _get_schema(self, client=None):
+        return schema.get_bigquery_schema(
+            dataset_id="ds",
+            data_project_id="p",
+            client=client or self.client,
+            cache_dir=self.cache_dir,
+        )
+
+    def test_generates_ddl(self):
+        ddl = self._get_schema()
+        self.assertIn(
+            "CREATE OR REPLACE VIEW `p.ds.big_orders` AS\nSELECT * FROM orders;",
+            ddl,
+        )
+        self.assertIn(
+            "CREATE OR REPLACE TABLE `p.ds.orders` (\n"
+            "  `id` INT64 OPTIONS(description='Order id'),\n"
+            "  `tags` ARRAY<STRING>\n);",
+            ddl,
+        )
+        self.assertIn("INSERT INTO `p.ds.orders` VALUES (1, ['a', 'b']);", ddl)
+        self.assertIn("INSERT INTO `p.ds.orders` VALUES (2, []);", ddl)
+        self.assertIn("OPTIONS(description='Customer''s name')", ddl)
+        self.assertIn("INSERT INTO `p.ds.customers` VALUES ('O''Brien');", ddl)
+        self.assertIn("INSERT INTO `p.ds.customers` VALUES (NULL);", ddl)
+        self.assertIn("CREATE EXTERNAL TABLE `p.ds.lake` (\n  `x` FLOAT64\n)", ddl)
+        self.assertIn("uris = ['gs://bucket/lake']", ddl)
+        self.assertNotIn("snap", ddl)
+        # Tables are listed in a deterministic order.
+        self.assertLess(ddl.index("big_orders"), ddl.index("customers"))
+        self.assertLess(ddl.index("customers"), ddl.index("`p.ds.lake`"))
+        # Columns of all tables are read with a single query.
+        self.assertEqual(
+            sum("INFORMATION_SCHEMA.COLUMNS" in q for q in self.client.queries), 1
+        )
+
+    def test_reuses_cache_for_unchanged_tables(self):
+        first = self._get_schema()
+
+        client = FakeClient(
+            self.client.tables,
+            self.client.columns,
+            self.client.samples,
+            self.client.external_configs,
+        )
+        self.assertEqual(self._get_schema(client), first)
+        self.assertEqual(client.sample_queries(), [])
+        self.assertEqual(client.get_table_calls, [])
+        self.assertFalse(
+            any("INFORMATION_SCHEMA.COLUMNS" in q for q in client.queries)
+        )
+
+    def test_refreshes_only_changed_tables(self):
+        self._get_schema()
+
+        client = FakeClient(
+            dict(self.client.tables, customers=("TABLE", None, 201)),
+            dict(self.client.columns, customers=[("email", "STRING", None)]),
+            dict(self.client.samples, customers=(["email"], ("a@b.c",))),
+            self.client.external_configs,
+        )
+        del client.tables["orders"]
+        ddl = self._get_schema(client)
+
+        self.assertEqual(len(client.sample_queries()), 1)
+        self.assertIn("`p.ds.customers`", client.sample_queries()[0])
+        self.assertIn("`email` STRING", ddl)
+        self.assertNotIn("`p.ds.orders`", ddl)
+        self.assertEqual(
+            sorted(schema.SchemaCache(self.cache_dir, "p", "ds").load()),
+            ["customers", "lake"],
+        )
+
+    def test_failed_samples_are_not_cached(self):
+        samples = dict(self.client.samples)
+        del samples["orders"]
+        client = FakeClient(
+            self.client.tables,
+            self.client.columns,
+            samples,
+            self.client.external_configs,
+        )
+        ddl = self._get_schema(client)
+        self.assertIn(
+            "-- NOTE: Could not retrieve sample rows for table", ddl
+        )
+
+        self._get_schema()
+        self.assertEqual(len(self.client.sample_queries()), 1)
+        self.assertIn("`p.ds.orders`", self.client.sample_queries()[0])
+
+    def test_cache_can_be_disabled(self):
+        self.cache_dir = ""
+        self._get_schema()
+        self._get_schema()
+        self.assertEqual(len(self.client.sample_queries()), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,242 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the tools of the BigQuery agent."""
+
+import datetime
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from google.cloud import bigquery
+
+from data_science.sub_agents.bigquery import backends
+from data_science.sub_agents.bigquery import dry_run
+from data_science.sub_agents.bigquery import result_cache
+from data_science.sub_agents.bigquery import tools
+
+
+class FakeRowIterator:
+    """Yields rows the way `RowIterator` does, honoring `max_results`."""
+
+    def __init__(self, rows, max_results):
+        self.schema = [bigquery.SchemaField(name, "STRING") for name in rows[0]]
+        self.total_rows = len(rows)
+        self.rows_fetched = 0
+        self._rows = rows
+        self._max_results = max_results
+
+    def __iter__(self):
+        field_to_index = {name: i for i, name in enumerate(self._rows[0])}
+        for row in self._rows[: self._max_results]:
+            self.rows_fetched += 1
+            yield bigquery.Row(tuple(row.values()), field_to_index)
+
+
+class FakeClient:
+    """Runs every query against a fixed in-memory result."""
+
+    def __init__(self, rows, total_bytes_processed=1024):
+        self.rows = rows
+        self.total_bytes_processed = total_bytes_processed
+        self.queries = []
+        self.dry_run_queries = []
+        self.job_configs = []
+        self.results = []
+        self.modified = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+
+    def get_table(self, table):
+        del table  # Unused.
+        return types.SimpleNamespace(modified=self.modified)
+
+    def query(self, query, job_config=None):
+        rows = self.rows
+        if query.startswith("SELECT COUNT(*) AS row_count,"):
+            rows = [{"row_count": len(self.rows), "fingerprint": 42}]
+        if job_config is not None and job_config.dry_run:
+            self.dry_run_queries.append(query)
+            return types.SimpleNamespace(
+                total_bytes_processed=self.total_bytes_processed,
+                referenced_tables=[bigquery.TableReference.from_string("p.ds.t")],
+            )
+        self.queries.append(query)
+        self.job_configs.append(job_config)
+
+        def result(max_results=None, page_size=None):
+            del page_size  # Unused.
+            self.results.append(FakeRowIterator(rows, max_results))
+            return self.results[-1]
+
+        return types.SimpleNamespace(result=result)
+
+
+class TestRunBigQueryValidation(unittest.TestCase):
+    """Test cases for `run_bigquery_validation`."""
+
+    def setUp(self):
+        self.tool_context = types.SimpleNamespace(state={})
+        self.rows = [
+            {"id": i, "day": datetime.date(2025, 1, 1)} for i in range(1000)
+        ]
+        self.client = FakeClient(self.rows)
+        self.now = 0.0
+        self._previous_backend = tools.backend
+        self._previous_cache = tools.query_result_cache
+        tools.backend = backends.BigQueryBackend(self.client)
+        tools.query_result_cache = result_cache.QueryResultCache(
+            ttl_seconds=60, clock=lambda: self.now
+        )
+
+    def tearDown(self):
+        tools.backend = self._previous_backend
+        tools.query_result_cache = self._previous_cache
+
+    def test_fetches_at_most_max_num_rows(self):
+        result = tools.run_bigquery_validation(
+            "SELECT * FROM `p.ds.t`", self.tool_context
+        )
+        self.assertEqual(len(result["query_result"]), tools.MAX_NUM_ROWS)
+        self.assertEqual(result["query_result"][0], {"id": 0, "day": "2025-01-01"})
+        self.assertEqual(result["total_rows"], 1000)
+        self.assertIsNone(result["error_message"])
+        self.assertEqual(self.client.results[0].rows_fetched, tools.MAX_NUM_ROWS)
+        self.assertEqual(
+            self.tool_context.state["query_result"], result["query_result"]
+        )
+        self.assertEqual(self.tool_context.state["query_total_rows"], 1000)
+        # The query itself is not rewritten, so total_rows is exact.
+        self.assertEqual(self.client.queries, ["SELECT * FROM `p.ds.t`"])
+
+    def test_reports_dry_run_estimate(self):
+        result = tools.run_bigquery_validation(
+            "SELECT * FROM `p.ds.t`", self.tool_context
+        )
+        self.assertEqual(
+            result["dry_run"],
+            {"total_bytes_processed": 1024, "referenced_tables": ["p.ds.t"]},
+        )
+        self.assertEqual(self.client.dry_run_queries, ["SELECT * FROM `p.ds.t`"])
+        self.assertEqual(
+            self.client.job_configs[0].maximum_bytes_billed,
+            dry_run.DEFAULT_MAX_BYTES_PROCESSED,
+        )
+
+    def test_rejects_queries_over_budget(self):
+        self.client.total_bytes_processed = 3 * 1024**4
+        result = tools.run_bigquery_validation(
+            "SELECT * FROM `p.ds.t`", self.tool_context
+        )
+        self.assertTrue(result["error_message"].startswith("Query rejected"))
+        self.assertIn("3.0 TiB", result["error_message"])
+        self.assertIn("p.ds.t", result["error_message"])
+        self.assertIsNone(result["query_result"])
+        self.assertEqual(self.client.queries, [])
+
+    def test_budget_can_be_disabled(self):
+        self.client.total_bytes_processed = 3 * 1024**4
+        os.environ["BQ_MAX_BYTES_PROCESSED"] = "0"
+        try:
+            result = tools.run_bigquery_validation(
+                "SELECT * FROM `p.ds.t`", self.tool_context
+            )
+        finally:
+            del os.environ["BQ_MAX_BYTES_PROCESSED"]
+        self.assertIsNone(result["error_message"])
+        self.assertIsNone(self.client.job_configs[0].maximum_bytes_billed)
+
+    def test_rejects_dml(self):
+        result = tools.run_bigquery_validation(
+            "DELETE FROM `p.ds.t` WHERE TRUE", self.tool_context
+        )
+        self.assertIn("disallowed DML/DDL", result["error_message"])
+        self.assertEqual(self.client.queries, [])
+        self.assertEqual(self.client.dry_run_queries, [])
+
+
+    def test_serves_cached_results(self):
+        first = tools.run_bigquery_validation(
+            "SELECT * FROM `p.ds.t`", self.tool_context
+        )
+        self.tool_context.state.clear()
+        second = tools.run_bigquery_validation(
+            "select *\n  from `p.ds.t` -- again", self.tool_context
+        )
+        self.assertEqual(second, first)
+        self.assertEqual(
+            self.tool_context.state["query_result"], first["query_result"]
+        )
+        self.assertEqual(self.tool_context.state["query_total_rows"], 1000)
+        self.assertEqual(len(self.client.queries), 1)
+        self.assertEqual(len(self.client.dry_run_queries), 1)
+
+    def test_cache_is_invalidated_by_table_changes(self):
+        tools.run_bigquery_validation("SELECT * FROM `p.ds.t`", self.tool_context)
+        self.client.modified += datetime.timedelta(minutes=1)
+        tools.run_bigquery_validation("SELECT * FROM `p.ds.t`", self.tool_context)
+        self.assertEqual(len(self.client.queries), 2)
+        tools.run_bigquery_validation("SELECT * FROM `p.ds.t`", self.tool_context)
+        self.assertEqual(len(self.client.queries), 2)
+
+    def test_cache_entries_expire(self):
+        tools.run_bigquery_validation("SELECT * FROM `p.ds.t`", self.tool_context)
+        self.now = 61.0
+        tools.run_bigquery_validation("SELECT * FROM `p.ds.t`", self.tool_context)
+        self.assertEqual(len(self.client.queries), 2)
+
+    def test_non_deterministic_queries_are_not_cached(self):
+        sql = "SELECT * FROM `p.ds.t` WHERE day < CURRENT_DATE()"
+        tools.run_bigquery_validation(sql, self.tool_context)
+        tools.run_bigquery_validation(sql, self.tool_context)
+        self.assertEqual(len(self.client.queries), 2)
+
+    def test_result_fingerprint_is_computed_by_bigquery(self):
+        self.assertEqual(
+            tools.backend.result_fingerprint(
+                "SELECT * FROM `p.ds.t`;", max_bytes_processed=1024
+            ),
+            (1000, 42),
+        )
+        self.assertEqual(
+            self.client.queries,
+            [
+                "SELECT COUNT(*) AS row_count,"
+                " BIT_XOR(FARM_FINGERPRINT(FORMAT('%T', t))) AS fingerprint"
+                " FROM (\nSELECT * FROM `p.ds.t`\n) AS t"
+            ],
+        )
+        self.assertEqual(self.client.job_configs[0].maximum_bytes_billed, 1024)
+
+    def test_cache_on_disk(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = result_cache.QueryResultCache(cache_dir=cache_dir)
+            result = {"query_result": [{"id": 1}], "total_rows": 1}
+            cache.store(tools.backend, "SELECT id FROM `p.ds.t`", ["p.ds.t"], result)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            restarted_cache = result_cache.QueryResultCache(cache_dir=cache_dir)
+            self.assertEqual(
+                restarted_cache.lookup(tools.backend, "SELECT id FROM `p.ds.t`"),
+                result,
+            )
+            self.assertIsNone(
+                restarted_cache.lookup(tools.backend, "SELECT id FROM `p.ds.T`")
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
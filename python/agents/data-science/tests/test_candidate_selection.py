@@ -0,0 +1,110 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the selection among CHASE-SQL candidates."""
+
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery.chase_sql import candidate_selection
+
+
+class TestCandidateSelection(unittest.TestCase):
+    """Test cases for `dedupe_candidates` and `select_candidate`."""
+
+    def test_dedupe_groups_equivalent_queries(self):
+        candidates = candidate_selection.dedupe_candidates(
+            [
+                "SELECT a FROM t",
+                "select A\nfrom T;",
+                None,
+                "Timeout",
+                "Error after retries: 429",
+                "SELECT b FROM t",
+            ],
+            dialect="bigquery",
+        )
+        self.assertEqual(
+            [(c.sql, c.votes) for c in candidates],
+            [("SELECT a FROM t", 2), ("SELECT b FROM t", 1)],
+        )
+
+    def test_dedupe_keeps_votes_of_candidates(self):
+        candidates = candidate_selection.dedupe_candidates(
+            [
+                candidate_selection.Candidate("SELECT a FROM t", "k1", votes=2),
+                candidate_selection.Candidate("SELECT  a FROM t", "k2", votes=3),
+            ],
+            dialect="bigquery",
+        )
+        self.assertEqual(len(candidates), 1)
+        self.assertEqual(candidates[0].votes, 5)
+
+    def test_selects_most_voted_valid_candidate(self):
+        candidates = candidate_selection.dedupe_candidates(
+            ["SELECT a FROM t", "SELECT b FROM t", "SELECT b FROM t"],
+            dialect="bigquery",
+        )
+        selected = candidate_selection.select_candidate(candidates)
+        self.assertEqual(selected.sql, "SELECT b FROM t")
+
+        selected = candidate_selection.select_candidate(
+            candidates,
+            validate=lambda sql: "no column b" if " b " in sql else None,
+        )
+        self.assertEqual(selected.sql, "SELECT a FROM t")
+
+    def test_votes_over_result_fingerprints(self):
+        candidates = candidate_selection.dedupe_candidates(
+            [
+                "SELECT a FROM t",
+                "SELECT a FROM t",
+                "SELECT x FROM u",
+                "SELECT y AS x FROM u",
+                "SELECT x FROM u ORDER BY x",
+            ],
+            dialect="bigquery",
+        )
+        results = {
+            "SELECT a FROM t": (1, 2),
+            "SELECT x FROM u": (3,),
+            "SELECT y AS x FROM u": (3,),
+            "SELECT x FROM u ORDER BY x": (3,),
+        }
+        selected = candidate_selection.select_candidate(
+            candidates, fingerprint=results.get
+        )
+        # Three distinct queries agree on the results of `u`, against two
+        # generations of the same query on `t`.
+        self.assertEqual(selected.sql, "SELECT x FROM u")
+
+    def test_returns_none_without_valid_candidate(self):
+        candidates = candidate_selection.dedupe_candidates(
+            ["SELECT a FROM t", "SELECT b FROM t"], dialect="bigquery"
+        )
+
+        def validate(sql):
+            raise RuntimeError(f"Cannot run {sql}")
+
+        self.assertIsNone(
+            candidate_selection.select_candidate(candidates, validate=validate)
+        )
+        self.assertEqual(candidates[0].error, "Cannot run SELECT a FROM t")
+
+
+if __name__ == "__main__":
+    unittest.main()
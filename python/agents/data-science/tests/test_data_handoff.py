@@ -0,0 +1,112 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the handoff of query results to the analytics agent."""
+
+import asyncio
+import base64
+import io
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+from google.adk.code_executors.code_executor_context import CodeExecutorContext
+
+from data_science.sub_agents.analytics import data_handoff
+
+
+class FakeToolContext:
+    """Keeps the state and the artifacts in memory."""
+
+    def __init__(self):
+        self.state = {}
+        self.artifacts = {}
+
+    async def save_artifact(self, filename, artifact):
+        self.artifacts[filename] = artifact
+
+
+class TestDataHandoff(unittest.TestCase):
+    """Test cases for `handoff_query_result`."""
+
+    def setUp(self):
+        self.tool_context = FakeToolContext()
+        self.rows = [
+            {"store": f"store_{i}", "day": "2025-01-01", "sales": i * 1.5}
+            for i in range(500)
+        ]
+
+    def _input_files(self):
+        return CodeExecutorContext(self.tool_context.state).get_input_files()
+
+    def test_rows_are_handed_off_as_parquet(self):
+        description = asyncio.run(
+            data_handoff.handoff_query_result(self.tool_context, self.rows)
+        )
+        # The prompt only holds a preview of the data.
+        self.assertIn("query_result.parquet", description)
+        self.assertIn("500 rows", description)
+        self.assertIn("sales: double", description)
+        self.assertIn("store_4", description)
+        self.assertNotIn("store_5", description)
+
+        [input_file] = self._input_files()
+        self.assertEqual(input_file.name, data_handoff.RESULT_FILE_NAME)
+        df = pd.read_parquet(io.BytesIO(base64.b64decode(input_file.content)))
+        pd.testing.assert_frame_equal(df, pd.DataFrame(self.rows))
+        self.assertEqual(
+            self.tool_context.artifacts[data_handoff.RESULT_FILE_NAME]
+            .inline_data.mime_type,
+            data_handoff.PARQUET_MIME_TYPE,
+        )
+
+    def test_truncated_results_are_described_as_such(self):
+        description = asyncio.run(
+            data_handoff.handoff_query_result(
+                self.tool_context, self.rows[:80], total_rows=1000
+            )
+        )
+        self.assertIn(
+            "The data is truncated: the query returned 1000 rows, only the"
+            " first 80 are available.",
+            description,
+        )
+        for total_rows in (None, 80):
+            self.assertNotIn(
+                "truncated",
+                data_handoff.describe_rows(self.rows[:80], total_rows),
+            )
+
+    def test_earlier_result_is_replaced(self):
+        asyncio.run(data_handoff.handoff_query_result(self.tool_context, self.rows))
+        asyncio.run(
+            data_handoff.handoff_query_result(self.tool_context, self.rows[:10])
+        )
+        [input_file] = self._input_files()
+        df = pd.read_parquet(io.BytesIO(base64.b64decode(input_file.content)))
+        self.assertEqual(len(df), 10)
+
+    def test_unconvertible_rows_are_not_handed_off(self):
+        rows = [{"value": 1}, {"value": "one"}]
+        self.assertIsNone(
+            asyncio.run(data_handoff.handoff_query_result(self.tool_context, rows))
+        )
+        self.assertEqual(self._input_files(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the local DuckDB backend of the NL2SQL tools."""
+
+import importlib.util
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery import backends
+from data_science.sub_agents.bigquery import result_cache
+from data_science.sub_agents.bigquery import tools
+
+SALES_CSV = """id,date,country,store,product,num_sold
+1,2017-01-01,Canada,Discount Stickers,Kaggle,10
+2,2017-01-01,Canada,Premium Sticker Mart,Kaggle,20
+3,2017-01-02,Finland,Discount Stickers,Kaggle Tiers,30
+4,2017-01-02,Finland,Discount Stickers,Kaggle,
+"""
+
+
+@unittest.skipUnless(
+    importlib.util.find_spec("duckdb"), "The duckdb package is not installed."
+)
+class TestDuckDBBackend(unittest.TestCase):
+    """Test cases for `DuckDBBackend`."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = tempfile.TemporaryDirectory()
+        with open(
+            os.path.join(cls.data_dir.name, "train.csv"), "w", encoding="utf-8"
+        ) as f:
+            f.write(SALES_CSV)
+        cls.backend = backends.DuckDBBackend(
+            "my-project", "stickers", data_dir=cls.data_dir.name
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.data_dir.cleanup()
+
+    def setUp(self):
+        self.tool_context = types.SimpleNamespace(state={})
+        self._previous_backend = tools.backend
+        self._previous_cache = tools.query_result_cache
+        tools.backend = self.backend
+        tools.query_result_cache = result_cache.QueryResultCache()
+
+    def tearDown(self):
+        tools.backend = self._previous_backend
+        tools.query_result_cache = self._previous_cache
+
+    def test_transpiles_bigquery_sql(self):
+        duckdb_sql, tables = backends.transpile_to_duckdb(
+            "WITH t AS (SELECT SAFE_DIVIDE(num_sold, 2) AS half "
+            "FROM `my-project.stickers.train`) SELECT * FROM t, test",
+            "my-project",
+            "stickers",
+        )
+        self.assertEqual(
+            duckdb_sql,
+            "WITH t AS (SELECT CASE WHEN 2 <> 0 THEN num_sold / 2 ELSE NULL END "
+            'AS half FROM "stickers"."train") SELECT * FROM t CROSS JOIN stickers.test',
+        )
+        self.assertEqual(
+            tables, ("my-project.stickers.test", "my-project.stickers.train")
+        )
+
+    def test_table_schemas_use_bigquery_types(self):
+        ddl = self.backend.get_table_schemas("my-project", "stickers")["train"]
+        self.assertTrue(
+            ddl.startswith("CREATE OR REPLACE TABLE `my-project.stickers.train`")
+        )
+        self.assertIn("`id` INT64", ddl)
+        self.assertIn("`date` DATE", ddl)
+        self.assertIn("`country` STRING", ddl)
+        self.assertIn(
+            "INSERT INTO `my-project.stickers.train` VALUES "
+            "(4, '2017-01-02', 'Finland', 'Discount Stickers', 'Kaggle', NULL);",
+            ddl,
+        )
+
+    def test_run_bigquery_validation(self):
+        result = tools.run_bigquery_validation(
+            "SELECT country, SUM(num_sold) AS total "
+            "FROM `my-project.stickers.train` GROUP BY country ORDER BY country",
+            self.tool_context,
+        )
+        self.assertIsNone(result["error_message"])
+        self.assertEqual(
+            result["query_result"],
+            [
+                {"country": "Canada", "total": 30},
+                {"country": "Finland", "total": 30},
+            ],
+        )
+        self.assertEqual(result["total_rows"], 2)
+        self.assertEqual(
+            result["dry_run"]["referenced_tables"], ["my-project.stickers.train"]
+        )
+
+    def test_total_rows_counts_rows_beyond_max_rows(self):
+        results = self.backend.execute(
+            "SELECT * FROM UNNEST(GENERATE_ARRAY(1, 1000)) AS n", max_rows=10
+        )
+        self.assertEqual(len(results.rows), 10)
+        self.assertEqual(results.total_rows, 1000)
+
+    def test_total_rows_of_results_up_to_max_rows(self):
+        for num_rows in [5, 10]:
+            results = self.backend.execute(
+                f"SELECT * FROM UNNEST(GENERATE_ARRAY(1, {num_rows})) AS n",
+                max_rows=10,
+            )
+            self.assertEqual(len(results.rows), num_rows)
+            self.assertEqual(results.total_rows, num_rows)
+
+    def test_truncated_results_are_counted(self):
+        result = tools.run_bigquery_validation(
+            "SELECT n FROM UNNEST(GENERATE_ARRAY(1, 1000)) AS n -- all",
+            self.tool_context,
+        )
+        self.assertIsNone(result["error_message"])
+        self.assertEqual(len(result["query_result"]), tools.MAX_NUM_ROWS)
+        self.assertEqual(result["total_rows"], 1000)
+
+    def test_result_fingerprints_cover_all_rows(self):
+        fingerprint = self.backend.result_fingerprint
+        all_rows = fingerprint(
+            "SELECT n FROM UNNEST(GENERATE_ARRAY(1, 1000)) AS n"
+        )
+        self.assertEqual(all_rows[0], 1000)
+        self.assertEqual(
+            fingerprint(
+                "SELECT n AS m FROM UNNEST(GENERATE_ARRAY(1, 1000)) AS n "
+                "ORDER BY n DESC;"
+            ),
+            all_rows,
+        )
+        last_row_differs = fingerprint(
+            "SELECT IF(n = 1000, 1001, n) AS n "
+            "FROM UNNEST(GENERATE_ARRAY(1, 1000)) AS n"
+        )
+        self.assertEqual(last_row_differs[0], 1000)
+        self.assertNotEqual(last_row_differs, all_rows)
+
+    def test_invalid_sql_is_reported(self):
+        result = tools.run_bigquery_validation(
+            "SELECT unknown_column FROM `my-project.stickers.train`",
+            self.tool_context,
+        )
+        self.assertTrue(result["error_message"].startswith("Invalid SQL"))
+        self.assertIn("unknown_column", result["error_message"])
+
+    def test_statements_other_than_queries_are_rejected(self):
+        escape_path = os.path.join(self.data_dir.name, "escape.csv")
+        for sql_string in (
+            f"COPY (SELECT 42 AS x) TO '{escape_path}'",
+            "INSTALL httpfs",
+            "SET enable_external_access = true",
+        ):
+            with self.subTest(sql_string=sql_string):
+                with self.assertRaises(Exception):
+                    self.backend.dry_run(sql_string)
+                with self.assertRaises(Exception):
+                    self.backend.execute(sql_string, max_rows=10)
+                result = tools.run_bigquery_validation(
+                    sql_string, self.tool_context
+                )
+                self.assertTrue(result["error_message"].startswith("Invalid SQL"))
+        self.assertFalse(os.path.exists(escape_path))
+
+    def test_database_cannot_access_files_once_loaded(self):
+        cursor = self.backend._cursor()  # pylint: disable=protected-access
+        try:
+            csv_file = os.path.join(self.data_dir.name, "train.csv")
+            with self.assertRaisesRegex(Exception, "Permission"):
+                cursor.execute(f"SELECT * FROM read_csv_auto('{csv_file}')")
+            with self.assertRaisesRegex(Exception, "Cannot change"):
+                cursor.execute("SET enable_external_access = true")
+        finally:
+            cursor.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
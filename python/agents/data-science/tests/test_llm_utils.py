@@ -0,0 +1,93 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the rate limiting and retries of the CHASE-SQL LLM utils."""
+
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery.chase_sql import llm_utils
+
+
+class FlakyGeminiModel(llm_utils.GeminiModel):
+    """Fails the first requests, then echoes the prompts."""
+
+    def __init__(self, num_failures, **kwargs):
+        super().__init__(**kwargs)
+        self.num_failures = num_failures
+        self.prompts = []
+
+    def _generate(self, prompt):
+        self.prompts.append(prompt)
+        if self.num_failures > 0:
+            self.num_failures -= 1
+            raise RuntimeError("429 Resource exhausted")
+        return f"response to {prompt}"
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test cases for `TokenBucket`."""
+
+    def test_reservations_are_spaced_by_the_rate(self):
+        now = [0.0]
+        bucket = llm_utils.TokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+        self.assertEqual([bucket.reserve() for _ in range(4)], [0, 0, 0.5, 1.0])
+        now[0] = 10.0
+        # The bucket refills up to its capacity.
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0, 0, 0.5])
+
+    def test_limiters_are_shared_per_model(self):
+        self.assertIs(
+            llm_utils.GeminiModel(model_name="m1").rate_limiter,
+            llm_utils.GeminiModel(model_name="m1").rate_limiter,
+        )
+        self.assertIsNot(
+            llm_utils.GeminiModel(model_name="m1").rate_limiter,
+            llm_utils.GeminiModel(model_name="m2").rate_limiter,
+        )
+
+
+class TestGeminiModel(unittest.TestCase):
+    """Test cases for the asyncio path of `GeminiModel`."""
+
+    def test_call_async_retries(self):
+        model = FlakyGeminiModel(num_failures=2, model_name="flaky")
+        response = asyncio.run(
+            model.call_async("q", parser_func=str.upper, base_delay=0.01)
+        )
+        self.assertEqual(response, "RESPONSE TO Q")
+        self.assertEqual(len(model.prompts), 3)
+
+    def test_call_async_gives_up(self):
+        model = FlakyGeminiModel(num_failures=5, model_name="flaky")
+        with self.assertRaises(RuntimeError):
+            asyncio.run(model.call_async("q", max_attempts=2, base_delay=0.01))
+
+    def test_call_parallel_from_running_loop(self):
+        model = FlakyGeminiModel(num_failures=0, model_name="flaky")
+
+        async def call():
+            return model.call_parallel(["a", "b", "c"])
+
+        self.assertEqual(
+            asyncio.run(call()), ["response to a", "response to b", "response to c"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
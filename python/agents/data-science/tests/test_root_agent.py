@@ -0,0 +1,72 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the instruction of the root agent."""
+
+import os
+import sys
+import types
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from google.genai import types as genai_types
+
+from data_science import agent
+
+
+class TestRootInstruction(unittest.TestCase):
+    """Test cases for the schema in the instruction of the root agent."""
+
+    def _setup(self, question):
+        callback_context = types.SimpleNamespace(
+            state={},
+            user_content=genai_types.Content(
+                role="user", parts=[genai_types.Part(text=question)]
+            ),
+        )
+        with mock.patch.object(
+            agent, "get_bq_database_settings", return_value={}
+        ), mock.patch.object(
+            agent,
+            "get_bq_relevant_schema",
+            side_effect=lambda question: f"-- Tables for: {question}",
+        ):
+            agent.setup_before_agent_call(callback_context)
+        return callback_context.state
+
+    def test_sessions_get_the_schema_of_their_question(self):
+        first = self._setup("sales by country")
+        second = self._setup("stores by product")
+        self.assertIn(
+            "-- Tables for: sales by country",
+            agent.root_instruction(types.SimpleNamespace(state=first)),
+        )
+        self.assertNotIn(
+            "sales by country",
+            agent.root_instruction(types.SimpleNamespace(state=second)),
+        )
+        # The agent shared by the sessions is not changed.
+        self.assertIs(agent.root_agent.instruction, agent.root_instruction)
+
+    def test_instruction_without_schema(self):
+        self.assertEqual(
+            agent.root_instruction(types.SimpleNamespace(state={})),
+            agent.return_instructions_root(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the retrieval of the tables relevant to a question."""
+
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery import schema_retrieval
+
+
+def _ddl(table_name, *columns):
+    column_defs = ",\n".join(f"  `{column}` STRING" for column in columns)
+    return f"CREATE OR REPLACE TABLE `p.ds.{table_name}` (\n{column_defs}\n);\n\n"
+
+
+TABLE_SCHEMAS = {
+    "customers": _ddl("customers", "customer_id", "name", "country"),
+    "orderItems": _ddl("orderItems", "order_id", "product_id", "quantity"),
+    "orders": _ddl("orders", "order_id", "customer_id", "orderDate"),
+    "products": _ddl("products", "product_id", "category", "price"),
+    "web_sessions": _ddl("web_sessions", "session_id", "page", "duration"),
+}
+
+
+class TestSchemaIndex(unittest.TestCase):
+    """Test cases for `SchemaIndex`."""
+
+    def setUp(self):
+        self.index = schema_retrieval.SchemaIndex(TABLE_SCHEMAS)
+
+    def test_tokenize(self):
+        self.assertEqual(
+            schema_retrieval.tokenize("How many orderItems per product_category?"),
+            ["many", "order", "item", "product", "category"],
+        )
+
+    def test_search_ranks_matching_tables(self):
+        matches = self.index.search("Average price by product category", top_k=2)
+        self.assertEqual(matches[0][0], "products")
+        self.assertEqual(len(matches), 2)
+        self.assertNotIn(
+            "web_sessions", [table_name for table_name, _ in matches]
+        )
+
+    def test_get_schema_keeps_top_k_tables(self):
+        schema = self.index.get_schema(
+            "Which countries do customers come from?", top_k=2
+        )
+        self.assertIn(TABLE_SCHEMAS["customers"], schema)
+        self.assertNotIn(TABLE_SCHEMAS["web_sessions"], schema)
+        self.assertIn("web_sessions", schema.splitlines()[-1])
+
+    def test_get_schema_falls_back_to_full_schema(self):
+        full_schema = "".join(TABLE_SCHEMAS.values())
+        self.assertEqual(self.index.full_schema, full_schema)
+        # Small enough datasets, disabled retrieval and unmatched questions.
+        self.assertEqual(self.index.get_schema("orders", top_k=5), full_schema)
+        self.assertEqual(self.index.get_schema("orders", top_k=0), full_schema)
+        self.assertEqual(self.index.get_schema("Hello there", top_k=2), full_schema)
+
+
+if __name__ == "__main__":
+    unittest.main()
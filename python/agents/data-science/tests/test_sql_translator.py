@@ -0,0 +1,147 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for the caches of the SQL translator."""
+
+import os
+import sys
+import types
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_science.sub_agents.bigquery.chase_sql import chase_db_tools
+from data_science.sub_agents.bigquery.chase_sql.sql_postprocessor import (
+    sql_translator,
+)
+
+DDL_SCHEMA = """CREATE OR REPLACE TABLE `p.ds.orders` (
+  `id` INT64 OPTIONS(description='Order id'),
+  `amount` FLOAT64
+);
+
+-- Example values for table `p.ds.orders`:
+INSERT INTO `p.ds.orders` VALUES (1, 2.5);
+
+"""
+
+
+class FakeModel:
+    """Answers every correction prompt with the same query."""
+
+    model_name = "fake-model"
+
+    def __init__(self, correction):
+        self.correction = correction
+        self.num_calls = 0
+
+    def call_parallel(self, prompts, parser_func=None):
+        self.num_calls += 1
+        response = f"```sql\n{self.correction}\n```"
+        return [parser_func(response) for _ in prompts]
+
+
+class TestSqlTranslator(unittest.TestCase):
+    """Test cases for `SqlTranslator`."""
+
+    def setUp(self):
+        sql_translator.SqlTranslator._translation_cache.clear()
+        self.model = FakeModel("SELECT id FROM orders")
+        self.translator = sql_translator.SqlTranslator(
+            model=self.model, process_input_errors=True
+        )
+
+    def _translate(self, sql_query, ddl_schema=DDL_SCHEMA):
+        return self.translator.translate(
+            sql_query, db="ds", catalog="p", ddl_schema=ddl_schema
+        )
+
+    def test_schema_is_parsed_once(self):
+        schema_dict, mapping_schema = self.translator.get_sqlglot_schema(
+            DDL_SCHEMA, dialect="bigquery"
+        )
+        self.assertEqual(
+            schema_dict, {"p": {"ds": {"orders": {"id": "INT64", "amount": "FLOAT64"}}}}
+        )
+        self.assertIs(
+            self.translator.get_sqlglot_schema(DDL_SCHEMA, dialect="bigquery")[1],
+            mapping_schema,
+        )
+
+    def test_translations_are_cached_by_normalized_query(self):
+        first = self._translate("SELECT unknown_column FROM orders")
+        self.assertEqual(self.model.num_calls, 1)
+        self.assertEqual(first, "SELECT id FROM orders")
+
+        second = self._translate("select unknown_column\n  from orders -- again")
+        self.assertEqual(second, first)
+        self.assertEqual(self.model.num_calls, 1)
+
+    def test_cache_key_includes_schema(self):
+        self._translate("SELECT unknown_column FROM orders")
+        self._translate(
+            "SELECT unknown_column FROM orders",
+            ddl_schema=DDL_SCHEMA.replace("amount", "total"),
+        )
+        self.assertEqual(self.model.num_calls, 2)
+
+    def test_cache_is_bounded(self):
+        size = sql_translator.SqlTranslator.TRANSLATION_CACHE_SIZE
+        for i in range(size + 10):
+            self._translate(f"SELECT id + {i} FROM orders")
+        self.assertEqual(len(sql_translator.SqlTranslator._translation_cache), size)
+
+    def test_translations_with_errors_are_not_cached(self):
+        self.model.correction = "SELECT still_unknown FROM orders"
+        self._translate("SELECT unknown_column FROM orders")
+        self._translate("SELECT unknown_column FROM orders")
+        self.assertEqual(self.model.num_calls, 2)
+        self.assertFalse(sql_translator.SqlTranslator._translation_cache)
+
+    def test_cache_key_includes_temperature(self):
+        self._translate("SELECT unknown_column FROM orders")
+        self.translator = sql_translator.SqlTranslator(
+            model=self.model, temperature=0.9, process_input_errors=True
+        )
+        self._translate("SELECT unknown_column FROM orders")
+        self.assertEqual(self.model.num_calls, 2)
+
+    def test_failed_translations_are_evicted(self):
+        self._translate("SELECT unknown_column FROM orders")
+        self._translate("SELECT other_column FROM orders")
+        self.assertEqual(
+            sql_translator.SqlTranslator.evict_translation(
+                "select id\nfrom orders -- failed"
+            ),
+            2,
+        )
+        self._translate("SELECT unknown_column FROM orders")
+        self.assertEqual(self.model.num_calls, 3)
+
+    def test_validation_errors_evict_the_translation(self):
+        self._translate("SELECT unknown_column FROM orders")
+        tool = types.SimpleNamespace(name="run_bigquery_validation")
+        args = {"sql_string": "SELECT id FROM orders"}
+        chase_db_tools.evict_failed_translation(
+            tool, args, None, {"error_message": "Query rejected: too large"}
+        )
+        self.assertEqual(len(sql_translator.SqlTranslator._translation_cache), 1)
+        chase_db_tools.evict_failed_translation(
+            tool, args, None, {"error_message": "Invalid SQL: no such table"}
+        )
+        self.assertFalse(sql_translator.SqlTranslator._translation_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()